@@ -1,6 +1,17 @@
+import os
+import sys
+import json
+import sqlite3
+import tempfile
+import threading
+
+
 class Producto:
     """Clase que representa un producto en el inventario"""
 
+    # Sin __dict__ por instancia: los atributos privados (también con name mangling) ocupan slots fijos
+    __slots__ = ('__id_producto', '__nombre', '__cantidad', '__precio')
+
     def __init__(self, id_producto, nombre, cantidad, precio):
         self.__id_producto = id_producto
         self.__nombre = nombre
@@ -34,77 +45,293 @@ class Producto:
         else:
             raise ValueError("El precio no puede ser negativo")
 
+    def to_dict(self):
+        """Convierte el producto a diccionario para serialización"""
+        return {
+            'id_producto': self.__id_producto,
+            'nombre': self.__nombre,
+            'cantidad': self.__cantidad,
+            'precio': self.__precio
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Crea un producto desde un diccionario"""
+        return cls(data['id_producto'], data['nombre'], data['cantidad'], data['precio'])
+
     def __str__(self):
         return f"ID: {self.__id_producto} | Nombre: {self.__nombre} | Cantidad: {self.__cantidad} | Precio: ${self.__precio:.2f}"
 
 
-class Inventario:
-    """Clase que gestiona el inventario de productos"""
+class AlmacenMemoria:
+    """Almacén sin persistencia (el comportamiento original): define la interfaz de los almacenes.
+
+    cargar() devuelve los productos guardados como diccionarios; escribir() recibe los cambios
+    acumulados como {id_producto: diccionario del producto, o None si se eliminó} junto con la
+    lista completa de productos, por si el almacén necesita reescribirse entero.
+    """
+
+    def cargar(self):
+        return []
+
+    def escribir(self, cambios, productos):
+        pass
+
+    def cerrar(self):
+        pass
+
+    def persiste(self):
+        """Indica si escribir() guarda algo; sin persistencia no tiene sentido acumular cambios"""
+        return False
+
+    def descripcion(self):
+        return "solo en memoria"
+
 
-    def __init__(self):
-        self.__productos = []
+class AlmacenLog(AlmacenMemoria):
+    """Log de cambios en JSON lines: cada escritura anexa una línea por producto cambiado.
+
+    Al cargar se reproduce el log; cuando tiene más del doble de líneas que productos vivos se
+    compacta reescribiéndolo (en un temporal que reemplaza al original) con una línea por producto.
+    """
+
+    def __init__(self, ruta="inventario.log"):
+        self.__ruta = ruta
+        self.__lineas = 0
+
+    def cargar(self):
+        productos = {}
+        self.__lineas = 0
+        if not os.path.exists(self.__ruta):
+            return []
+        with open(self.__ruta, 'r', encoding='utf-8') as archivo:
+            for linea in archivo:
+                try:
+                    registro = json.loads(linea)
+                except json.JSONDecodeError:
+                    continue  # línea truncada por un cierre inesperado
+                self.__lineas += 1
+                if registro['op'] == 'set':
+                    productos[registro['producto']['id_producto']] = registro['producto']
+                else:
+                    productos.pop(registro['id'], None)
+        return list(productos.values())
+
+    def escribir(self, cambios, productos):
+        lineas = []
+        for id_producto, datos in cambios.items():
+            registro = {'op': 'set', 'producto': datos} if datos is not None else {'op': 'del', 'id': id_producto}
+            lineas.append(json.dumps(registro, ensure_ascii=False) + "\n")
+        directorio = os.path.dirname(self.__ruta)
+        if directorio and not os.path.exists(directorio):
+            os.makedirs(directorio)
+        with open(self.__ruta, 'a', encoding='utf-8') as archivo:
+            archivo.writelines(lineas)
+        self.__lineas += len(lineas)
+        if self.__lineas > 2 * len(productos) + 100:
+            self.__compactar(productos)
+
+    def __compactar(self, productos):
+        """Reescribe el log con un registro por producto vivo"""
+        descriptor, temporal = tempfile.mkstemp(prefix=os.path.basename(self.__ruta) + ".", suffix=".tmp",
+                                                dir=os.path.dirname(self.__ruta) or '.')
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as archivo:
+                for producto in productos:
+                    archivo.write(json.dumps({'op': 'set', 'producto': producto.to_dict()}, ensure_ascii=False) + "\n")
+            os.replace(temporal, self.__ruta)
+        except BaseException:
+            os.remove(temporal)
+            raise
+        self.__lineas = len(productos)
+
+    def persiste(self):
+        return True
+
+    def descripcion(self):
+        return f"log de cambios '{self.__ruta}'"
+
+
+class AlmacenSQLite(AlmacenMemoria):
+    """Tabla SQLite: cada escritura aplica los cambios acumulados en una sola transacción"""
+
+    def __init__(self, ruta="inventario.db"):
+        self.__ruta = ruta
+        self.__conexion = None
+
+    def __conectar(self):
+        if self.__conexion is None:
+            # El flush diferido escribe desde otro hilo; Inventario serializa los accesos con su lock
+            self.__conexion = sqlite3.connect(self.__ruta, check_same_thread=False)
+            self.__conexion.execute(
+                "CREATE TABLE IF NOT EXISTS productos (id_producto INTEGER PRIMARY KEY, nombre TEXT NOT NULL, "
+                "cantidad INTEGER NOT NULL, precio REAL NOT NULL)")
+        return self.__conexion
+
+    def cargar(self):
+        cursor = self.__conectar().execute("SELECT id_producto, nombre, cantidad, precio FROM productos")
+        return [{'id_producto': id_producto, 'nombre': nombre, 'cantidad': cantidad, 'precio': precio}
+                for id_producto, nombre, cantidad, precio in cursor]
+
+    def escribir(self, cambios, productos):
+        with self.__conectar() as conexion:  # una transacción: se confirma entera o se revierte
+            conexion.executemany(
+                "INSERT INTO productos (id_producto, nombre, cantidad, precio) VALUES (:id_producto, :nombre, "
+                ":cantidad, :precio) ON CONFLICT(id_producto) DO UPDATE SET nombre = excluded.nombre, "
+                "cantidad = excluded.cantidad, precio = excluded.precio",
+                [datos for datos in cambios.values() if datos is not None])
+            conexion.executemany("DELETE FROM productos WHERE id_producto = ?",
+                                 [(id_producto,) for id_producto, datos in cambios.items() if datos is None])
+
+    def cerrar(self):
+        if self.__conexion is not None:
+            self.__conexion.close()
+            self.__conexion = None
+
+    def persiste(self):
+        return True
+
+    def descripcion(self):
+        return f"base SQLite '{self.__ruta}'"
+
+
+class Inventario:
+    """Clase que gestiona el inventario de productos.
+
+    Los productos se leen del almacén la primera vez que se necesitan. Los cambios se escriben
+    de forma diferida: se acumulan (el último cambio de cada producto gana) y se vuelcan al almacén
+    al juntar tamano_lote productos cambiados, intervalo_flush segundos después del primer cambio
+    pendiente (un temporizador en segundo plano, aunque no lleguen más cambios), o al llamar a
+    flush() o cerrar(). Con intervalo_flush=None no hay temporizador.
+    """
+
+    def __init__(self, almacen=None, tamano_lote=100, intervalo_flush=1.0):
+        self.__almacen = almacen if almacen is not None else AlmacenMemoria()
+        self.__productos = None  # None hasta la primera lectura del almacén
+        self.__pendientes = {}  # id_producto -> diccionario del producto, o None si se eliminó
+        self.__temporizador = None  # threading.Timer del próximo flush diferido
+        self.__tamano_lote = tamano_lote
+        self.__intervalo_flush = intervalo_flush
+        self.__lock = threading.RLock()  # el temporizador vuelca desde otro hilo
+
+    def __lista(self):
+        """Lista de productos; se carga del almacén en el primer acceso"""
+        if self.__productos is None:
+            self.__productos = [Producto.from_dict(datos) for datos in self.__almacen.cargar()]
+        return self.__productos
+
+    def __registrar_cambio(self, id_producto, producto):
+        """Anota el cambio para la próxima escritura; vuelca el lote si ya está completo"""
+        if not self.__almacen.persiste():
+            return  # AlmacenMemoria: ni to_dict() ni temporizador por cada cambio
+        self.__pendientes[id_producto] = producto.to_dict() if producto is not None else None
+        if len(self.__pendientes) >= self.__tamano_lote:
+            self.flush()
+        elif self.__temporizador is None:
+            self.__programar_flush()
+
+    def __programar_flush(self):
+        """Programa un flush en segundo plano dentro de intervalo_flush segundos"""
+        if self.__intervalo_flush is None:
+            return
+        self.__temporizador = threading.Timer(self.__intervalo_flush, self.flush)
+        self.__temporizador.daemon = True
+        self.__temporizador.start()
+
+    def flush(self):
+        """Escribe en el almacén los cambios pendientes; si falla se conservan y se reintenta más tarde"""
+        with self.__lock:
+            if self.__temporizador is not None:
+                self.__temporizador.cancel()
+                self.__temporizador = None
+            if not self.__pendientes:
+                return True, "No hay cambios pendientes"
+            try:
+                self.__almacen.escribir(self.__pendientes, self.__lista())
+            except (OSError, sqlite3.Error) as e:
+                self.__programar_flush()
+                return False, f"Error al guardar en {self.__almacen.descripcion()}: {str(e)}"
+            total = len(self.__pendientes)
+            self.__pendientes = {}
+            return True, f"{total} cambio(s) guardados en {self.__almacen.descripcion()}"
+
+    def cerrar(self):
+        """Vuelca los cambios pendientes y libera el almacén"""
+        with self.__lock:
+            resultado = self.flush()
+            if self.__temporizador is not None:  # el flush falló y programó un reintento
+                self.__temporizador.cancel()
+                self.__temporizador = None
+            self.__almacen.cerrar()
+            return resultado
 
     def __buscar_por_id(self, id_producto):
         """Método privado para buscar un producto por ID"""
-        for i, producto in enumerate(self.__productos):
+        for i, producto in enumerate(self.__lista()):
             if producto.get_id() == id_producto:
                 return i
         return -1
 
     def añadir_producto(self, id_producto, nombre, cantidad, precio):
         """Añade un nuevo producto al inventario"""
-        # Verificar que el ID sea único
-        if self.__buscar_por_id(id_producto) != -1:
-            return False, "Error: Ya existe un producto con ese ID"
-
-        try:
-            nuevo_producto = Producto(id_producto, nombre, cantidad, precio)
-            self.__productos.append(nuevo_producto)
-            return True, "Producto añadido exitosamente"
-        except ValueError as e:
-            return False, f"Error: {str(e)}"
+        with self.__lock:
+            # Verificar que el ID sea único
+            if self.__buscar_por_id(id_producto) != -1:
+                return False, "Error: Ya existe un producto con ese ID"
+
+            try:
+                nuevo_producto = Producto(id_producto, nombre, cantidad, precio)
+                self.__lista().append(nuevo_producto)
+                self.__registrar_cambio(id_producto, nuevo_producto)
+                return True, "Producto añadido exitosamente"
+            except ValueError as e:
+                return False, f"Error: {str(e)}"
 
     def eliminar_producto(self, id_producto):
         """Elimina un producto del inventario por ID"""
-        indice = self.__buscar_por_id(id_producto)
-        if indice == -1:
-            return False, "Error: No se encontró un producto con ese ID"
+        with self.__lock:
+            indice = self.__buscar_por_id(id_producto)
+            if indice == -1:
+                return False, "Error: No se encontró un producto con ese ID"
 
-        producto_eliminado = self.__productos.pop(indice)
-        return True, f"Producto '{producto_eliminado.get_nombre()}' eliminado exitosamente"
+            producto_eliminado = self.__lista().pop(indice)
+            self.__registrar_cambio(id_producto, None)
+            return True, f"Producto '{producto_eliminado.get_nombre()}' eliminado exitosamente"
 
     def actualizar_producto(self, id_producto, nueva_cantidad=None, nuevo_precio=None):
         """Actualiza la cantidad y/o precio de un producto por ID"""
-        indice = self.__buscar_por_id(id_producto)
-        if indice == -1:
-            return False, "Error: No se encontró un producto con ese ID"
-
-        producto = self.__productos[indice]
-        cambios = []
-
-        try:
-            if nueva_cantidad is not None:
-                producto.set_cantidad(nueva_cantidad)
-                cambios.append(f"cantidad: {nueva_cantidad}")
-
-            if nuevo_precio is not None:
-                producto.set_precio(nuevo_precio)
-                cambios.append(f"precio: ${nuevo_precio:.2f}")
-
-            if cambios:
-                return True, f"Producto actualizado: {', '.join(cambios)}"
-            else:
-                return False, "No se especificaron cambios"
+        with self.__lock:
+            indice = self.__buscar_por_id(id_producto)
+            if indice == -1:
+                return False, "Error: No se encontró un producto con ese ID"
+
+            producto = self.__lista()[indice]
+            cambios = []
+
+            try:
+                if nueva_cantidad is not None:
+                    producto.set_cantidad(nueva_cantidad)
+                    cambios.append(f"cantidad: {nueva_cantidad}")
+
+                if nuevo_precio is not None:
+                    producto.set_precio(nuevo_precio)
+                    cambios.append(f"precio: ${nuevo_precio:.2f}")
+
+                if cambios:
+                    self.__registrar_cambio(id_producto, producto)
+                    return True, f"Producto actualizado: {', '.join(cambios)}"
+                else:
+                    return False, "No se especificaron cambios"
 
-        except ValueError as e:
-            return False, f"Error: {str(e)}"
+            except ValueError as e:
+                return False, f"Error: {str(e)}"
 
     def buscar_por_nombre(self, nombre_busqueda):
         """Busca productos por nombre (búsqueda parcial, no sensible a mayúsculas)"""
         productos_encontrados = []
         nombre_busqueda = nombre_busqueda.lower()
 
-        for producto in self.__productos:
+        for producto in self.__lista():
             if nombre_busqueda in producto.get_nombre().lower():
                 productos_encontrados.append(producto)
 
@@ -112,18 +339,19 @@ class Inventario:
 
     def mostrar_todos(self):
         """Muestra todos los productos en el inventario"""
-        if not self.__productos:
+        productos = self.__lista()
+        if not productos:
             return "El inventario está vacío"
 
         resultado = "=== INVENTARIO COMPLETO ===\n"
-        for producto in self.__productos:
+        for producto in productos:
             resultado += str(producto) + "\n"
-        resultado += f"Total de productos: {len(self.__productos)}"
+        resultado += f"Total de productos: {len(productos)}"
         return resultado
 
     def get_total_productos(self):
         """Retorna el número total de productos"""
-        return len(self.__productos)
+        return len(self.__lista())
 
 
 def mostrar_menu():
@@ -154,139 +382,158 @@ def obtener_numero(mensaje, tipo=int, min_valor=None):
             print("Error: Ingrese un número válido")
 
 
-def main():
-    """Función principal que ejecuta el programa"""
-    inventario = Inventario()
-
-    # Datos de ejemplo (opcional)
-    print("Inicializando sistema con datos de ejemplo...")
-    inventario.añadir_producto(1, "Laptop Dell", 5, 650.99)
-    inventario.añadir_producto(2, "Mouse Inalámbrico", 15, 25.50)
-    inventario.añadir_producto(3, "Teclado Mecánico", 8, 30.00)
+def crear_almacen(argumentos):
+    """Almacén indicado en la línea de comandos: --log [ruta] o --sqlite [ruta]; por defecto solo memoria"""
+    for opcion, clase, ruta in (("--log", AlmacenLog, "inventario.log"), ("--sqlite", AlmacenSQLite, "inventario.db")):
+        if opcion in argumentos:
+            posicion = argumentos.index(opcion) + 1
+            if posicion < len(argumentos) and not argumentos[posicion].startswith("--"):
+                ruta = argumentos[posicion]
+            return clase(ruta)
+    return AlmacenMemoria()
 
-    while True:
-        mostrar_menu()
 
-        try:
-            opcion = input("Seleccione una opción: ").strip()
-
-            if opcion == "1":
-                # Añadir producto
-                print("\n--- AÑADIR NUEVO PRODUCTO ---")
-                id_producto = obtener_numero("ID del producto: ", int, 1)
-                nombre = input("Nombre del producto: ").strip()
-                cantidad = obtener_numero("Cantidad: ", int, 0)
-                precio = obtener_numero("Precio: $", float, 0)
-
-                exito, mensaje = inventario.añadir_producto(id_producto, nombre, cantidad, precio)
-                print(mensaje)
-
-            elif opcion == "2":
-                # Eliminar producto
-                print("\n--- ELIMINAR PRODUCTO ---")
-                id_producto = obtener_numero("ID del producto a eliminar: ", int, 1)
-
-                exito, mensaje = inventario.eliminar_producto(id_producto)
-                print(mensaje)
-
-            elif opcion == "3":
-                # Actualizar producto
-                print("\n--- ACTUALIZAR PRODUCTO ---")
-                id_producto = obtener_numero("ID del producto a actualizar: ", int, 1)
-
-                print("Deje en blanco si no desea cambiar ese campo:")
-                cantidad_input = input("Nueva cantidad (actual se mantiene si está vacío): ").strip()
-                precio_input = input("Nuevo precio (actual se mantiene si está vacío): ").strip()
-
-                nueva_cantidad = None
-                nuevo_precio = None
-
-                if cantidad_input:
-                    try:
-                        nueva_cantidad = int(cantidad_input)
-                        if nueva_cantidad < 0:
-                            print("Error: La cantidad no puede ser negativa")
+def main():
+    """Función principal que ejecuta el programa"""
+    inventario = Inventario(crear_almacen(sys.argv))
+
+    # Datos de ejemplo (opcional), solo si el almacén está vacío
+    if inventario.get_total_productos() == 0:
+        print("Inicializando sistema con datos de ejemplo...")
+        inventario.añadir_producto(1, "Laptop Dell", 5, 650.99)
+        inventario.añadir_producto(2, "Mouse Inalámbrico", 15, 25.50)
+        inventario.añadir_producto(3, "Teclado Mecánico", 8, 30.00)
+
+    # El finally vuelca lo pendiente aunque el programa se interrumpa fuera del try interno
+    try:
+        while True:
+            mostrar_menu()
+
+            try:
+                opcion = input("Seleccione una opción: ").strip()
+
+                if opcion == "1":
+                    # Añadir producto
+                    print("\n--- AÑADIR NUEVO PRODUCTO ---")
+                    id_producto = obtener_numero("ID del producto: ", int, 1)
+                    nombre = input("Nombre del producto: ").strip()
+                    cantidad = obtener_numero("Cantidad: ", int, 0)
+                    precio = obtener_numero("Precio: $", float, 0)
+
+                    exito, mensaje = inventario.añadir_producto(id_producto, nombre, cantidad, precio)
+                    print(mensaje)
+
+                elif opcion == "2":
+                    # Eliminar producto
+                    print("\n--- ELIMINAR PRODUCTO ---")
+                    id_producto = obtener_numero("ID del producto a eliminar: ", int, 1)
+
+                    exito, mensaje = inventario.eliminar_producto(id_producto)
+                    print(mensaje)
+
+                elif opcion == "3":
+                    # Actualizar producto
+                    print("\n--- ACTUALIZAR PRODUCTO ---")
+                    id_producto = obtener_numero("ID del producto a actualizar: ", int, 1)
+
+                    print("Deje en blanco si no desea cambiar ese campo:")
+                    cantidad_input = input("Nueva cantidad (actual se mantiene si está vacío): ").strip()
+                    precio_input = input("Nuevo precio (actual se mantiene si está vacío): ").strip()
+
+                    nueva_cantidad = None
+                    nuevo_precio = None
+
+                    if cantidad_input:
+                        try:
+                            nueva_cantidad = int(cantidad_input)
+                            if nueva_cantidad < 0:
+                                print("Error: La cantidad no puede ser negativa")
+                                continue
+                        except ValueError:
+                            print("Error: Cantidad inválida")
                             continue
-                    except ValueError:
-                        print("Error: Cantidad inválida")
-                        continue
-
-                if precio_input:
-                    try:
-                        nuevo_precio = float(precio_input)
-                        if nuevo_precio < 0:
-                            print("Error: El precio no puede ser negativo")
+
+                    if precio_input:
+                        try:
+                            nuevo_precio = float(precio_input)
+                            if nuevo_precio < 0:
+                                print("Error: El precio no puede ser negativo")
+                                continue
+                        except ValueError:
+                            print("Error: Precio inválido")
                             continue
-                    except ValueError:
-                        print("Error: Precio inválido")
-                        continue
 
-                exito, mensaje = inventario.actualizar_producto(id_producto, nueva_cantidad, nuevo_precio)
-                print(mensaje)
+                    exito, mensaje = inventario.actualizar_producto(id_producto, nueva_cantidad, nuevo_precio)
+                    print(mensaje)
 
-            elif opcion == "4":
-                # Buscar por nombre
-                print("\n--- BUSCAR PRODUCTOS ---")
-                nombre_busqueda = input("Ingrese el nombre a buscar: ").strip()
+                elif opcion == "4":
+                    # Buscar por nombre
+                    print("\n--- BUSCAR PRODUCTOS ---")
+                    nombre_busqueda = input("Ingrese el nombre a buscar: ").strip()
 
-                if nombre_busqueda:
-                    productos_encontrados = inventario.buscar_por_nombre(nombre_busqueda)
+                    if nombre_busqueda:
+                        productos_encontrados = inventario.buscar_por_nombre(nombre_busqueda)
 
-                    if productos_encontrados:
-                        print(f"\nSe encontraron {len(productos_encontrados)} producto(s):")
-                        for producto in productos_encontrados:
-                            print(producto)
+                        if productos_encontrados:
+                            print(f"\nSe encontraron {len(productos_encontrados)} producto(s):")
+                            for producto in productos_encontrados:
+                                print(producto)
+                        else:
+                            print("No se encontraron productos con ese nombre")
                     else:
-                        print("No se encontraron productos con ese nombre")
-                else:
-                    print("Error: Debe ingresar un nombre para buscar")
-
-            elif opcion == "5":
-                # Mostrar todos
-                print("\n" + inventario.mostrar_todos())
-
-            elif opcion == "6":
-                # Estadísticas
-                print("\n--- ESTADÍSTICAS DEL INVENTARIO ---")
-                total_productos = inventario.get_total_productos()
-                print(f"Total de productos diferentes: {total_productos}")
-
-                if total_productos > 0:
-                    # Calcular valor total del inventario
-                    valor_total = 0
-                    cantidad_total = 0
-
-                    # Obtener todos los productos para calcular estadísticas
-                    todos_productos = inventario.buscar_por_nombre("")  # Truco para obtener todos
-
-                    for producto in todos_productos:
-                        valor_total += producto.get_precio() * producto.get_cantidad()
-                        cantidad_total += producto.get_cantidad()
-
-                    print(f"Cantidad total de items: {cantidad_total}")
-                    print(f"Valor total del inventario: ${valor_total:.2f}")
-                    print(
-                        f"Valor promedio por producto: ${valor_total / cantidad_total:.2f}" if cantidad_total > 0 else "N/A")
-
-            elif opcion == "0":
-                # Salir
-                print("\n¡Gracias por usar el Sistema de Gestión de Inventarios!")
-                print("¡Hasta luego!")
-                break
+                        print("Error: Debe ingresar un nombre para buscar")
+
+                elif opcion == "5":
+                    # Mostrar todos
+                    print("\n" + inventario.mostrar_todos())
+
+                elif opcion == "6":
+                    # Estadísticas
+                    print("\n--- ESTADÍSTICAS DEL INVENTARIO ---")
+                    total_productos = inventario.get_total_productos()
+                    print(f"Total de productos diferentes: {total_productos}")
+
+                    if total_productos > 0:
+                        # Calcular valor total del inventario
+                        valor_total = 0
+                        cantidad_total = 0
 
-            else:
-                print("Error: Opción no válida. Por favor seleccione una opción del 0 al 6.")
+                        # Obtener todos los productos para calcular estadísticas
+                        todos_productos = inventario.buscar_por_nombre("")  # Truco para obtener todos
 
-        except KeyboardInterrupt:
-            print("\n\nPrograma interrumpido por el usuario.")
-            print("¡Hasta luego!")
-            break
-        except Exception as e:
-            print(f"Error inesperado: {e}")
-            print("Por favor, intente nuevamente.")
+                        for producto in todos_productos:
+                            valor_total += producto.get_precio() * producto.get_cantidad()
+                            cantidad_total += producto.get_cantidad()
 
-        # Pausa para que el usuario pueda leer los mensajes
-        input("\nPresione Enter para continuar...")
+                        print(f"Cantidad total de items: {cantidad_total}")
+                        print(f"Valor total del inventario: ${valor_total:.2f}")
+                        print(
+                            f"Valor promedio por producto: ${valor_total / cantidad_total:.2f}" if cantidad_total > 0 else "N/A")
+
+                elif opcion == "0":
+                    # Salir: el finally de main cierra el inventario
+                    print("\n¡Gracias por usar el Sistema de Gestión de Inventarios!")
+                    print("¡Hasta luego!")
+                    break
+
+                else:
+                    print("Error: Opción no válida. Por favor seleccione una opción del 0 al 6.")
+
+            except KeyboardInterrupt:
+                print("\n\nPrograma interrumpido por el usuario.")
+                print("¡Hasta luego!")
+                break
+            except Exception as e:
+                print(f"Error inesperado: {e}")
+                print("Por favor, intente nuevamente.")
+
+            # Pausa para que el usuario pueda leer los mensajes
+            input("\nPresione Enter para continuar...")
+    except KeyboardInterrupt:
+        print("\n\nPrograma interrumpido por el usuario.")
+    finally:
+        exito, mensaje = inventario.cerrar()
+        print(mensaje)
 
 
 if __name__ == "__main__":
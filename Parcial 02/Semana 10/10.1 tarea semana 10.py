@@ -1,11 +1,84 @@
 import os
+import sys
+import csv
+import gzip
+import cProfile
+import functools
 import json
+import random
+import struct
+import tempfile
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, redirect_stdout
+from itertools import islice
 from typing import List, Tuple, Optional
 
+try:
+    import fcntl
+except ImportError:  # Windows: sin locks entre procesos
+    fcntl = None
+
+
+# formato_binario.py (cabecera, registros de ancho fijo y tabla de cadenas) vive en Parcial 02 y lo comparte semana_11
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import formato_binario
+
+
+def escribir_json_productos(archivo, datos, tamano_bloque=1000):
+    """Escribe la lista de diccionarios de productos como JSON, un producto por línea.
+
+    json.dump recorre los datos con el codificador en Python puro; json.dumps usa el de C, así que se
+    codifica por bloques de tamano_bloque productos. '}, {"' solo aparece entre productos: dentro de una
+    cadena JSON las comillas van escapadas.
+    """
+    archivo.write('[')
+    for inicio in range(0, len(datos), tamano_bloque):
+        bloque = json.dumps(datos[inicio:inicio + tamano_bloque], ensure_ascii=False)[1:-1]
+        archivo.write((',' if inicio else '') + '\n' + bloque.replace('}, {"', '},\n{"'))
+    archivo.write('\n]\n')
+
+
+def serializar_binario(datos):
+    """Empaqueta una lista de diccionarios de productos en el formato binario compartido"""
+    return formato_binario.serializar((producto_data['id_producto'], producto_data['nombre'],
+                                       producto_data['cantidad'], producto_data['precio'], 0)
+                                      for producto_data in datos)
+
+
+def deserializar_binario(ruta):
+    """Lee un archivo binario y devuelve la lista de diccionarios de productos.
+
+    El formato guarda los IDs como texto; este inventario solo admite IDs enteros.
+    """
+    datos = []
+    for id_producto, nombre, cantidad, precio, _ in formato_binario.iterar(ruta):
+        try:
+            id_producto = int(id_producto)
+        except ValueError:
+            raise ValueError(f"El inventario requiere IDs enteros: {id_producto!r}") from None
+        datos.append({'id_producto': id_producto, 'nombre': nombre, 'cantidad': cantidad, 'precio': precio})
+    return datos
+
+
+def convertir_json_a_binario(origen, destino):
+    """Convierte un inventario guardado en JSON al formato binario"""
+    try:
+        with open(origen, 'r', encoding='utf-8') as archivo:
+            datos = json.load(archivo)
+        with open(destino, 'wb') as archivo:
+            archivo.write(serializar_binario(datos))
+        return True, f"✓ {len(datos)} productos convertidos a '{destino}'"
+    except (OSError, ValueError, KeyError) as e:
+        return False, f" Error al convertir: {str(e)}"
+
 
 class Producto:
     """Clase que representa un producto en el inventario"""
 
+    # Sin __dict__ por instancia: los atributos privados (también con name mangling) ocupan slots fijos
+    __slots__ = ('__id_producto', '__nombre', '__cantidad', '__precio')
+
     def __init__(self, id_producto, nombre, cantidad, precio):
         self.__id_producto = id_producto
         self.__nombre = nombre
@@ -57,32 +130,282 @@ class Producto:
         return f"ID: {self.__id_producto} | Nombre: {self.__nombre} | Cantidad: {self.__cantidad} | Precio: ${self.__precio:.2f}"
 
 
-class Inventario:
-    """Clase que gestiona el inventario de productos con persistencia en archivos"""
+# Columnas disponibles para iterar_reporte y cómo se formatea cada una
+COLUMNAS_REPORTE = {
+    'id': lambda producto: f"ID: {producto.get_id()}",
+    'nombre': lambda producto: f"Nombre: {producto.get_nombre()}",
+    'cantidad': lambda producto: f"Cantidad: {producto.get_cantidad()}",
+    'precio': lambda producto: f"Precio: ${producto.get_precio():.2f}",
+}
+
+
+class BloqueoArchivo:
+    """Lock consultivo entre procesos (flock) sobre <archivo>.lock.
+
+    El mismo archivo guarda un contador de versión que cada escritor incrementa al guardar,
+    así los lectores saben si otro proceso cambió el inventario sin volver a leerlo.
+    """
+
+    def __init__(self, archivo):
+        self.ruta = archivo + ".lock"
+
+    def adquirir(self, exclusivo=True):
+        """Abre el archivo de lock y espera el lock exclusivo (escritura) o compartido (lectura)"""
+        directorio = os.path.dirname(self.ruta)
+        if directorio and not os.path.exists(directorio):
+            os.makedirs(directorio)
+        archivo = open(self.ruta, 'a+', encoding='utf-8')
+        if fcntl is not None:
+            try:
+                fcntl.flock(archivo.fileno(), fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH)
+            except BaseException:
+                archivo.close()
+                raise
+        return archivo
+
+    def liberar(self, archivo):
+        """Suelta el lock y cierra el archivo"""
+        if fcntl is not None:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_UN)
+        archivo.close()
+
+    @contextmanager
+    def exclusivo(self):
+        archivo = self.adquirir()
+        try:
+            yield archivo
+        finally:
+            self.liberar(archivo)
+
+    @contextmanager
+    def compartido(self):
+        archivo = self.adquirir(exclusivo=False)
+        try:
+            yield archivo
+        finally:
+            self.liberar(archivo)
+
+    def version(self, archivo=None):
+        """Versión actual; sin lock una lectura simultánea a una escritura solo provoca una recarga de más"""
+        try:
+            if archivo is None:
+                with open(self.ruta, 'r', encoding='utf-8') as f:
+                    contenido = f.read()
+            else:
+                archivo.seek(0)
+                contenido = archivo.read()
+        except FileNotFoundError:
+            return 0
+        contenido = contenido.strip()
+        return int(contenido) if contenido.isdigit() else 0
+
+    def incrementar(self, archivo):
+        """Publica una nueva versión; debe llamarse con el lock exclusivo tomado"""
+        version = self.version(archivo) + 1
+        archivo.seek(0)
+        archivo.truncate()
+        archivo.write(str(version))
+        archivo.flush()
+        return version
+
+
+class Instrumentacion:
+    """Cuenta las llamadas de cada operación y guarda un histograma de sus latencias.
+
+    Con perfilar=True las operaciones se ejecutan además bajo cProfile y el perfil se puede
+    volcar a un archivo pstats.
+    """
+
+    LIMITES_MS = (0.01, 0.1, 1, 10, 100, 1000)  # cubetas: <= cada límite y una última para el resto
+
+    def __init__(self, perfilar=False):
+        self.__operaciones = {}
+        self.__perfil = cProfile.Profile() if perfilar else None
+        self.__profundidad = 0  # operaciones anidadas: guardar dentro de añadir, añadir dentro de un lote
+
+    @contextmanager
+    def medir(self, operacion):
+        """Mide el bloque y lo registra con el nombre de la operación"""
+        if self.__perfil is not None:
+            if self.__profundidad == 0:
+                self.__perfil.enable()
+            self.__profundidad += 1
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(operacion, time.perf_counter() - inicio)
+            if self.__perfil is not None:
+                self.__profundidad -= 1
+                if self.__profundidad == 0:
+                    self.__perfil.disable()
+
+    def registrar(self, operacion, segundos):
+        """Suma una llamada de la operación con su duración en segundos"""
+        milisegundos = segundos * 1000
+        datos = self.__operaciones.get(operacion)
+        if datos is None:
+            datos = self.__operaciones[operacion] = {
+                'llamadas': 0, 'total_ms': 0.0, 'min_ms': milisegundos, 'max_ms': 0.0,
+                'histograma': [0] * (len(self.LIMITES_MS) + 1)}
+        datos['llamadas'] += 1
+        datos['total_ms'] += milisegundos
+        datos['min_ms'] = min(datos['min_ms'], milisegundos)
+        datos['max_ms'] = max(datos['max_ms'], milisegundos)
+        datos['histograma'][bisect_left(self.LIMITES_MS, milisegundos)] += 1
+
+    def resumen(self):
+        """Llamadas, latencias (ms) e histograma de cada operación"""
+        etiquetas = [f"<={limite}ms" for limite in self.LIMITES_MS] + [f">{self.LIMITES_MS[-1]}ms"]
+        return {
+            operacion: {
+                'llamadas': datos['llamadas'],
+                'promedio_ms': datos['total_ms'] / datos['llamadas'],
+                'min_ms': datos['min_ms'],
+                'max_ms': datos['max_ms'],
+                'total_ms': datos['total_ms'],
+                'histograma': dict(zip(etiquetas, datos['histograma'])),
+            }
+            for operacion, datos in sorted(self.__operaciones.items())
+        }
+
+    def volcar_json(self, ruta):
+        """Escribe el resumen en un archivo JSON"""
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(self.resumen(), archivo, indent=2, ensure_ascii=False)
+
+    def guardar_perfil(self, ruta):
+        """Escribe el perfil de cProfile (se lee con python -m pstats); False si no se está perfilando"""
+        if self.__perfil is None:
+            return False
+        self.__perfil.dump_stats(ruta)
+        return True
+
 
-    def __init__(self, archivo_inventario="inventario.json"):
+def instrumentado(metodo):
+    """Decorador de los métodos de Inventario: los mide si el inventario tiene la instrumentación activa"""
+    nombre = metodo.__name__.lstrip('_')
+
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        instrumentacion = self.get_instrumentacion()
+        if instrumentacion is None:
+            return metodo(self, *args, **kwargs)
+        with instrumentacion.medir(nombre):
+            return metodo(self, *args, **kwargs)
+    return envoltura
+
+
+class Inventario:
+    """Clase que gestiona el inventario de productos con persistencia en archivos.
+
+    Varios procesos pueden compartir el archivo: cada guardado toma BloqueoArchivo y, si otro
+    proceso escribió desde la última lectura, fusiona sus cambios con los propios antes de escribir.
+    """
+
+    def __init__(self, archivo_inventario="inventario.json", formato="json", intervalo_vigilancia=0.0,
+                 instrumentar=False):
+        """intervalo_vigilancia: segundos mínimos entre dos comprobaciones del archivo en recargar_si_cambio.
+        instrumentar: mide las operaciones desde la carga inicial (ver activar_instrumentacion)
+        """
+        if formato not in ("json", "binario"):
+            raise ValueError(f"Formato desconocido: {formato}")
+        # Las bajas dejan un hueco (None) en la lista en lugar de desplazarla; __indice apunta a la posición
         self.__productos = []
+        self.__indice = {}  # id_producto -> posición en __productos
+        self.__eliminados = 0
+        # IDs modificados desde el último respaldo; None mientras no exista un respaldo completo en esta sesión
+        self.__modificados_desde_respaldo = None
+        self.__cambios_pendientes = None  # (deshacer, id_producto) del lote en curso
         self.__archivo_inventario = archivo_inventario
+        self.__formato = formato
+        self.__bloqueo = BloqueoArchivo(archivo_inventario)
+        self.__version = 0  # versión del archivo que refleja la memoria
+        self.__firma = None  # (inodo, mtime, tamaño) del archivo que refleja la memoria
+        self.__intervalo_vigilancia = intervalo_vigilancia
+        self.__ultima_comprobacion = None
+        self.__metricas_recarga = {'comprobaciones': 0, 'recargas': 0, 'productos_cambiados': 0,
+                                   'latencia_total': 0.0, 'latencia_maxima': 0.0,
+                                   'retraso_total': 0.0, 'retraso_maximo': 0.0}
+        self.__instrumentacion = Instrumentacion() if instrumentar else None
         self.__cargar_inventario()
 
     def __buscar_por_id(self, id_producto):
-        """Método privado para buscar un producto por ID"""
-        for i, producto in enumerate(self.__productos):
-            if producto.get_id() == id_producto:
-                return i
-        return -1
+        """Método privado para buscar un producto por ID (O(1) mediante el índice)"""
+        return self.__indice.get(id_producto, -1)
 
+    def __insertar(self, producto):
+        """Añade un producto al final de la lista y lo registra en el índice"""
+        self.__indice.setdefault(producto.get_id(), len(self.__productos))
+        self.__productos.append(producto)
+
+    def __marcar_eliminado(self, indice):
+        """Deja un hueco en la posición indicada y devuelve el producto que había"""
+        producto = self.__productos[indice]
+        self.__productos[indice] = None
+        del self.__indice[producto.get_id()]
+        self.__eliminados += 1
+        return producto
+
+    def __restaurar_eliminado(self, indice, producto):
+        """Deshace __marcar_eliminado"""
+        self.__productos[indice] = producto
+        self.__indice[producto.get_id()] = indice
+        self.__eliminados -= 1
+
+    def __compactar_si_necesario(self):
+        """Elimina los huecos cuando superan la mitad de la lista"""
+        if self.__eliminados > 1000 and self.__eliminados * 2 > len(self.__productos):
+            self.__productos = list(self.__productos_activos())
+            self.__indice = {producto.get_id(): i for i, producto in enumerate(self.__productos)}
+            self.__eliminados = 0
+
+    def __registrar_cambio(self, id_producto):
+        """Anota el ID para el próximo respaldo incremental"""
+        if self.__modificados_desde_respaldo is not None:
+            self.__modificados_desde_respaldo.add(id_producto)
+
+    def __productos_activos(self):
+        """Recorre los productos saltando los huecos de las bajas"""
+        return (producto for producto in self.__productos if producto is not None)
+
+    @instrumentado
     def __cargar_inventario(self):
         """Carga los productos desde el archivo de inventario"""
         try:
-            if os.path.exists(self.__archivo_inventario):
+            with self.__bloqueo.compartido() as bloqueo:
+                self.__version = self.__bloqueo.version(bloqueo)
+                self.__firma = self.__firma_archivo()
+                self.__cargar_archivo()
+        except OSError as e:
+            print(f" Error al tomar el lock de '{self.__archivo_inventario}': {str(e)}")
+            self.__firma = self.__firma_archivo()
+            self.__cargar_archivo()
+
+    def __firma_archivo(self):
+        """(inodo, mtime, tamaño) del archivo de inventario; None si no existe"""
+        try:
+            estado = os.stat(self.__archivo_inventario)
+        except FileNotFoundError:
+            return None
+        return estado.st_ino, estado.st_mtime_ns, estado.st_size
+
+    def __cargar_archivo(self):
+        """Lee el archivo de inventario e informa del resultado"""
+        try:
+            if os.path.exists(self.__archivo_inventario) and formato_binario.es_binario(self.__archivo_inventario):
+                for producto_data in deserializar_binario(self.__archivo_inventario):
+                    self.__insertar(Producto.from_dict(producto_data))
+                print(f"✓ Inventario binario cargado desde '{self.__archivo_inventario}'")
+                print(f"  Se cargaron {len(self.__productos)} productos")
+            elif os.path.exists(self.__archivo_inventario):
                 with open(self.__archivo_inventario, 'r', encoding='utf-8') as archivo:
                     contenido = archivo.read().strip()
                     if contenido:  # Solo procesar si el archivo no está vacío
                         datos = json.loads(contenido)
                         for producto_data in datos:
                             producto = Producto.from_dict(producto_data)
-                            self.__productos.append(producto)
+                            self.__insertar(producto)
                         print(f"✓ Inventario cargado exitosamente desde '{self.__archivo_inventario}'")
                         print(f"  Se cargaron {len(self.__productos)} productos")
                     else:
@@ -95,34 +418,200 @@ class Inventario:
         except PermissionError:
             print(f" Error de permisos: No se puede leer el archivo '{self.__archivo_inventario}'")
             print("   Verifique que tenga permisos de lectura en el directorio.")
-        except json.JSONDecodeError as e:
-            print(f" Error al leer el archivo '{self.__archivo_inventario}': formato JSON inválido")
+        except (ValueError, struct.error) as e:
+            print(f" Error al leer el archivo '{self.__archivo_inventario}': formato inválido")
             print(f"   Detalles: {str(e)}")
             print("   El inventario iniciará vacío. Considere revisar o respaldar el archivo.")
         except Exception as e:
             print(f" Error inesperado al cargar inventario: {str(e)}")
             print("   El inventario iniciará vacío.")
 
-    def __guardar_inventario(self):
-        """Guarda todos los productos en el archivo de inventario"""
+    def __leer_disco(self):
+        """Devuelve los productos (diccionarios) que hay ahora en el archivo"""
+        if not os.path.exists(self.__archivo_inventario):
+            return []
+        if formato_binario.es_binario(self.__archivo_inventario):
+            return deserializar_binario(self.__archivo_inventario)
+        with open(self.__archivo_inventario, 'r', encoding='utf-8') as archivo:
+            contenido = archivo.read().strip()
+        return json.loads(contenido) if contenido else []
+
+    def __fusionar_con_disco(self, ids_modificados):
+        """Estado del disco con los productos cambiados en esta operación por encima (gana el último en guardar)"""
+        datos = {producto_data['id_producto']: producto_data for producto_data in self.__leer_disco()}
+        for id_producto in ids_modificados:
+            indice = self.__buscar_por_id(id_producto)
+            if indice == -1:
+                datos.pop(id_producto, None)
+            else:
+                datos[id_producto] = self.__productos[indice].to_dict()
+        return list(datos.values())
+
+    def __aplicar_estado_disco(self, datos):
+        """Lleva la memoria al estado leído del disco cambiando solo los productos que difieren.
+
+        Devuelve cuántos productos se añadieron, modificaron o eliminaron.
+        """
+        # Primero se calcula la diferencia: solo se crea un Producto (y se valida) para las altas y los
+        # cambios, y un registro inválido no deja la memoria a medias
+        nuevos = {producto_data['id_producto']: producto_data for producto_data in datos}
+        bajas = []
+        modificados = []
+        for indice, producto in enumerate(self.__productos):
+            if producto is None:
+                continue
+            producto_data = nuevos.pop(producto.get_id(), None)
+            if producto_data is None:
+                bajas.append(indice)
+            elif (producto_data['nombre'] != producto.get_nombre() or producto_data['cantidad'] != producto.get_cantidad()
+                  or producto_data['precio'] != producto.get_precio()):
+                modificados.append((indice, Producto.from_dict(producto_data)))
+        altas = [Producto.from_dict(producto_data) for producto_data in nuevos.values()]
+
+        for indice in bajas:
+            self.__registrar_cambio(self.__marcar_eliminado(indice).get_id())
+        for indice, producto in modificados:
+            self.__productos[indice] = producto
+            self.__registrar_cambio(producto.get_id())
+        for producto in altas:
+            self.__insertar(producto)
+            self.__registrar_cambio(producto.get_id())
+        self.__compactar_si_necesario()
+        return len(bajas) + len(modificados) + len(altas)
+
+    def recargar_si_cambio(self):
+        """Aplica los cambios hechos al archivo desde fuera (otro proceso o una edición a mano).
+
+        Solo se consulta os.stat y la versión del lock, como mucho una vez por intervalo_vigilancia;
+        el archivo se lee únicamente si alguno de los dos cambió.
+        """
+        sin_cambios = (False, "Sin cambios externos")
+        if self.__cambios_pendientes is not None:
+            return sin_cambios
+        ahora = time.monotonic()
+        if (self.__ultima_comprobacion is not None
+                and ahora - self.__ultima_comprobacion < self.__intervalo_vigilancia):
+            return sin_cambios
+        self.__ultima_comprobacion = ahora
+        self.__metricas_recarga['comprobaciones'] += 1
+        if self.__firma_archivo() == self.__firma and self.__bloqueo.version() == self.__version:
+            return sin_cambios
+
+        inicio = time.perf_counter()
+        try:
+            with self.__bloqueo.compartido() as bloqueo:
+                version = self.__bloqueo.version(bloqueo)
+                firma = self.__firma_archivo()
+                cambios = self.__aplicar_estado_disco(self.__leer_disco())
+                self.__version, self.__firma = version, firma
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            return False, f" Error al recargar el inventario: {str(e)}"
+        latencia = time.perf_counter() - inicio
+        # Retraso: desde la modificación del archivo hasta que la memoria la refleja
+        retraso = max(0.0, time.time() - firma[1] / 1e9) if firma else 0.0
+        metricas = self.__metricas_recarga
+        metricas['recargas'] += 1
+        metricas['productos_cambiados'] += cambios
+        metricas['latencia_total'] += latencia
+        metricas['latencia_maxima'] = max(metricas['latencia_maxima'], latencia)
+        metricas['retraso_total'] += retraso
+        metricas['retraso_maximo'] = max(metricas['retraso_maximo'], retraso)
+        return True, f"✓ Inventario recargado: {cambios} producto(s) cambiados externamente ({latencia * 1000:.1f} ms)"
+
+    def vigilar(self, intervalo=1.0, duracion=None, al_recargar=print):
+        """Comprueba el archivo cada intervalo segundos y recarga los cambios externos.
+
+        Se detiene al pasar duracion segundos (None: hasta Ctrl+C); al_recargar recibe el mensaje de cada recarga.
+        """
+        fin = None if duracion is None else time.monotonic() + duracion
+        intervalo_anterior, self.__intervalo_vigilancia = self.__intervalo_vigilancia, 0.0
         try:
-            datos = [producto.to_dict() for producto in self.__productos]
+            while fin is None or time.monotonic() < fin:
+                recargado, mensaje = self.recargar_si_cambio()
+                if recargado and al_recargar is not None:
+                    al_recargar(mensaje)
+                time.sleep(intervalo if fin is None else max(0.0, min(intervalo, fin - time.monotonic())))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.__intervalo_vigilancia = intervalo_anterior
+
+    def metricas_recarga(self):
+        """Comprobaciones, recargas y latencias (ms) de recargar_si_cambio"""
+        metricas = self.__metricas_recarga
+        recargas = metricas['recargas']
+        return {
+            'comprobaciones': metricas['comprobaciones'],
+            'recargas': recargas,
+            'productos_cambiados': metricas['productos_cambiados'],
+            'latencia_promedio_ms': metricas['latencia_total'] * 1000 / recargas if recargas else 0.0,
+            'latencia_maxima_ms': metricas['latencia_maxima'] * 1000,
+            'retraso_promedio_ms': metricas['retraso_total'] * 1000 / recargas if recargas else 0.0,
+            'retraso_maximo_ms': metricas['retraso_maximo'] * 1000,
+        }
+
+    @instrumentado
+    def __guardar_inventario(self, ids_modificados=(), reemplazar=False):
+        """Guarda todos los productos en el archivo de inventario.
 
+        Si otro proceso guardó desde la última lectura, se fusiona su estado con los productos
+        de ids_modificados y la memoria queda con el resultado; reemplazar=True escribe la memoria tal cual.
+        """
+        try:
             # Crear el directorio si no existe
             directorio = os.path.dirname(self.__archivo_inventario)
             if directorio and not os.path.exists(directorio):
                 os.makedirs(directorio)
 
-            with open(self.__archivo_inventario, 'w', encoding='utf-8') as archivo:
-                json.dump(datos, archivo, indent=2, ensure_ascii=False)
+            with self.__bloqueo.exclusivo() as bloqueo:
+                fusionar = not reemplazar and self.__bloqueo.version(bloqueo) != self.__version
+                if fusionar:
+                    datos = self.__fusionar_con_disco(ids_modificados)
+                else:
+                    datos = [producto.to_dict() for producto in self.__productos_activos()]
+
+                if self.__formato == "binario":
+                    with open(self.__archivo_inventario, 'wb') as archivo:
+                        archivo.write(serializar_binario(datos))
+                else:
+                    with open(self.__archivo_inventario, 'w', encoding='utf-8') as archivo:
+                        escribir_json_productos(archivo, datos)
+                self.__version = self.__bloqueo.incrementar(bloqueo)
+                self.__firma = self.__firma_archivo()
+            if fusionar:
+                self.__aplicar_estado_disco(datos)
             return True, f"Inventario guardado exitosamente en '{self.__archivo_inventario}'"
         except PermissionError:
             return False, f"Error de permisos: No se puede escribir en '{self.__archivo_inventario}'"
         except OSError as e:
             return False, f"Error del sistema al guardar: {str(e)}"
+        except (ValueError, struct.error) as e:
+            return False, f"Error de formato al guardar: {str(e)}"
         except Exception as e:
             return False, f"Error inesperado al guardar inventario: {str(e)}"
 
+    def __confirmar(self, deshacer, id_producto):
+        """Persiste un cambio ya aplicado en memoria; si el guardado falla lo revierte con deshacer().
+
+        Dentro de un lote (aplicar_cambios) el cambio queda pendiente y se guarda junto con los demás.
+        """
+        if self.__cambios_pendientes is not None:
+            self.__cambios_pendientes.append((deshacer, id_producto))
+            return True, "Cambio pendiente de guardar"
+        exito_guardado, mensaje_guardado = self.__guardar_inventario((id_producto,))
+        if exito_guardado:
+            self.__compactar_si_necesario()
+            self.__registrar_cambio(id_producto)
+        else:
+            deshacer()
+        return exito_guardado, mensaje_guardado
+
+    def __deshacer_insercion(self, id_producto):
+        """Quita el último producto insertado (los cambios se deshacen en orden inverso)"""
+        self.__productos.pop()
+        del self.__indice[id_producto]
+
+    @instrumentado
     def añadir_producto(self, id_producto, nombre, cantidad, precio):
         """Añade un nuevo producto al inventario y lo guarda en archivo"""
         # Verificar que el ID sea único
@@ -131,37 +620,34 @@ class Inventario:
 
         try:
             nuevo_producto = Producto(id_producto, nombre, cantidad, precio)
-            self.__productos.append(nuevo_producto)
-
-            # Guardar en archivo
-            exito_guardado, mensaje_guardado = self.__guardar_inventario()
-            if exito_guardado:
-                return True, f"✓ Producto añadido exitosamente y guardado en archivo\n  {mensaje_guardado}"
-            else:
-                # Si no se pudo guardar, remover el producto de memoria
-                self.__productos.pop()
-                return False, f" Producto no añadido - Error al guardar: {mensaje_guardado}"
-
         except ValueError as e:
             return False, f"Error de validación: {str(e)}"
+        self.__insertar(nuevo_producto)
+
+        # Guardar en archivo
+        exito_guardado, mensaje_guardado = self.__confirmar(
+            lambda: self.__deshacer_insercion(id_producto), id_producto)
+        if exito_guardado:
+            return True, f"✓ Producto añadido exitosamente y guardado en archivo\n  {mensaje_guardado}"
+        return False, f" Producto no añadido - Error al guardar: {mensaje_guardado}"
 
+    @instrumentado
     def eliminar_producto(self, id_producto):
         """Elimina un producto del inventario por ID y actualiza el archivo"""
         indice = self.__buscar_por_id(id_producto)
         if indice == -1:
             return False, "Error: No se encontró un producto con ese ID"
 
-        producto_eliminado = self.__productos.pop(indice)
+        producto_eliminado = self.__marcar_eliminado(indice)
 
         # Guardar cambios en archivo
-        exito_guardado, mensaje_guardado = self.__guardar_inventario()
+        exito_guardado, mensaje_guardado = self.__confirmar(
+            lambda: self.__restaurar_eliminado(indice, producto_eliminado), id_producto)
         if exito_guardado:
             return True, f"✓ Producto '{producto_eliminado.get_nombre()}' eliminado exitosamente\n  {mensaje_guardado}"
-        else:
-            # Si no se pudo guardar, restaurar el producto
-            self.__productos.insert(indice, producto_eliminado)
-            return False, f" Producto no eliminado - Error al guardar: {mensaje_guardado}"
+        return False, f" Producto no eliminado - Error al guardar: {mensaje_guardado}"
 
+    @instrumentado
     def actualizar_producto(self, id_producto, nueva_cantidad=None, nuevo_precio=None):
         """Actualiza la cantidad y/o precio de un producto por ID y guarda en archivo"""
         indice = self.__buscar_por_id(id_producto)
@@ -173,8 +659,12 @@ class Inventario:
         # Guardar valores originales para posible rollback
         cantidad_original = producto.get_cantidad()
         precio_original = producto.get_precio()
-        cambios = []
 
+        def restaurar():
+            producto.set_cantidad(cantidad_original)
+            producto.set_precio(precio_original)
+
+        cambios = []
         try:
             if nueva_cantidad is not None:
                 producto.set_cantidad(nueva_cantidad)
@@ -183,68 +673,504 @@ class Inventario:
             if nuevo_precio is not None:
                 producto.set_precio(nuevo_precio)
                 cambios.append(f"precio: ${nuevo_precio:.2f}")
-
-            if cambios:
-                # Guardar cambios en archivo
-                exito_guardado, mensaje_guardado = self.__guardar_inventario()
-                if exito_guardado:
-                    return True, f"✓ Producto actualizado: {', '.join(cambios)}\n  {mensaje_guardado}"
-                else:
-                    # Rollback si no se pudo guardar
-                    producto.set_cantidad(cantidad_original)
-                    producto.set_precio(precio_original)
-                    return False, f" Producto no actualizado - Error al guardar: {mensaje_guardado}"
-            else:
-                return False, "No se especificaron cambios"
-
         except ValueError as e:
             # Rollback en caso de error de validación
-            producto.set_cantidad(cantidad_original)
-            producto.set_precio(precio_original)
+            restaurar()
             return False, f"Error de validación: {str(e)}"
 
+        if not cambios:
+            return False, "No se especificaron cambios"
+
+        # Guardar cambios en archivo
+        exito_guardado, mensaje_guardado = self.__confirmar(restaurar, id_producto)
+        if exito_guardado:
+            return True, f"✓ Producto actualizado: {', '.join(cambios)}\n  {mensaje_guardado}"
+        return False, f" Producto no actualizado - Error al guardar: {mensaje_guardado}"
+
+    def aplicar_cambios(self, operaciones):
+        """Aplica un lote de operaciones con una sola escritura del archivo.
+
+        operaciones: tuplas ("añadir", id, nombre, cantidad, precio), ("eliminar", id)
+        o ("actualizar", id, nueva_cantidad, nuevo_precio). Si alguna operación falla,
+        o falla el guardado final, se revierte el lote completo en memoria.
+        """
+        metodos = {
+            "añadir": self.añadir_producto,
+            "eliminar": self.eliminar_producto,
+            "actualizar": self.actualizar_producto,
+        }
+        self.__cambios_pendientes = []
+        try:
+            for numero, (tipo, *argumentos) in enumerate(operaciones, 1):
+                if tipo not in metodos:
+                    self.__revertir_pendientes()
+                    return False, f"Error en la operación {numero}: tipo '{tipo}' no soportado"
+                exito, mensaje = metodos[tipo](*argumentos)
+                if not exito:
+                    self.__revertir_pendientes()
+                    return False, f"Lote revertido - operación {numero} ({tipo}): {mensaje}"
+
+            if not self.__cambios_pendientes:
+                return True, "No había cambios que aplicar"
+            exito_guardado, mensaje_guardado = self.__guardar_inventario(
+                [id_producto for _, id_producto in self.__cambios_pendientes])
+            if not exito_guardado:
+                self.__revertir_pendientes()
+                return False, f" Lote revertido - Error al guardar: {mensaje_guardado}"
+
+            total = len(self.__cambios_pendientes)
+            for _, id_producto in self.__cambios_pendientes:
+                self.__registrar_cambio(id_producto)
+            self.__compactar_si_necesario()
+            return True, f"✓ Lote de {total} cambios guardado\n  {mensaje_guardado}"
+        except (TypeError, ValueError) as e:
+            self.__revertir_pendientes()
+            return False, f"Lote revertido - operación inválida: {str(e)}"
+        finally:
+            self.__cambios_pendientes = None
+
+    def __revertir_pendientes(self):
+        """Deshace los cambios del lote en curso en orden inverso"""
+        while self.__cambios_pendientes:
+            deshacer, _ = self.__cambios_pendientes.pop()
+            deshacer()
+
+    @instrumentado
     def buscar_por_nombre(self, nombre_busqueda):
         """Busca productos por nombre (búsqueda parcial, no sensible a mayúsculas)"""
         productos_encontrados = []
         nombre_busqueda = nombre_busqueda.lower()
 
-        for producto in self.__productos:
+        for producto in self.__productos_activos():
             if nombre_busqueda in producto.get_nombre().lower():
                 productos_encontrados.append(producto)
 
         return productos_encontrados
 
-    def mostrar_todos(self):
-        """Muestra todos los productos en el inventario"""
-        if not self.__productos:
-            return "El inventario está vacío"
-
-        resultado = "=== INVENTARIO COMPLETO ===\n"
-        for producto in self.__productos:
-            resultado += str(producto) + "\n"
-        resultado += f"Total de productos: {len(self.__productos)}\n"
-        resultado += f"Archivo: {self.__archivo_inventario}"
-        return resultado
+    def mostrar_todos(self, destino=None):
+        """Muestra todos los productos en el inventario escribiéndolos a medida que se generan"""
+        return self.escribir_reporte(destino)
+
+    def iterar_reporte(self, columnas=None, pagina=None, tamano_pagina=20):
+        """Devuelve un generador del reporte línea a línea sin construirlo completo en memoria.
+
+        columnas: subconjunto de COLUMNAS_REPORTE (por defecto todas).
+        pagina: número de página desde 1; None recorre todo el inventario.
+        Los parámetros se validan al llamar, no al empezar a iterar.
+        """
+        self.__validar_paginacion(pagina, tamano_pagina)
+        columnas = list(columnas) if columnas else list(COLUMNAS_REPORTE)
+        desconocidas = [columna for columna in columnas if columna not in COLUMNAS_REPORTE]
+        if desconocidas:
+            raise ValueError(f"Columnas no válidas: {', '.join(desconocidas)}")
+        return self.__generar_reporte(columnas, pagina, tamano_pagina)
+
+    def __generar_reporte(self, columnas, pagina, tamano_pagina):
+        """Genera las líneas del reporte con parámetros ya validados"""
+        if not self.__indice:
+            yield "El inventario está vacío"
+            return
+
+        productos = self.__productos_activos()
+        total = self.get_total_productos()
+        if pagina is None:
+            yield "=== INVENTARIO COMPLETO ==="
+        else:
+            total_paginas = max(1, -(-total // tamano_pagina))
+            yield f"=== INVENTARIO (página {pagina} de {total_paginas}) ==="
+            productos = islice(productos, (pagina - 1) * tamano_pagina, pagina * tamano_pagina)
+
+        for producto in productos:
+            yield " | ".join(COLUMNAS_REPORTE[columna](producto) for columna in columnas)
+        yield f"Total de productos: {total}"
+        yield f"Archivo: {self.__archivo_inventario}"
+
+    def __validar_paginacion(self, pagina, tamano_pagina):
+        """Rechaza páginas y tamaños de página menores que 1"""
+        if pagina is not None and pagina < 1:
+            raise ValueError("El número de página debe ser mayor o igual a 1")
+        if tamano_pagina < 1:
+            raise ValueError("El tamaño de página debe ser mayor o igual a 1")
+
+    def escribir_reporte(self, destino=None, columnas=None, pagina=None, tamano_pagina=20):
+        """Escribe el reporte a medida que se genera en stdout, en una ruta o en un archivo abierto"""
+        # iterar_reporte valida al llamarse: con una ruta, el archivo no se trunca si los parámetros no son válidos
+        lineas_reporte = self.iterar_reporte(columnas, pagina, tamano_pagina)
+        if isinstance(destino, str):
+            with open(destino, 'w', encoding='utf-8') as archivo:
+                return self.__volcar_lineas(lineas_reporte, archivo)
+        return self.__volcar_lineas(lineas_reporte, destino or sys.stdout)
+
+    def __volcar_lineas(self, lineas_reporte, destino):
+        """Escribe cada línea en destino y devuelve cuántas se escribieron"""
+        lineas = 0
+        for linea in lineas_reporte:
+            destino.write(linea + "\n")
+            lineas += 1
+        return lineas
 
     def get_total_productos(self):
         """Retorna el número total de productos"""
-        return len(self.__productos)
-
-    def crear_respaldo(self, archivo_respaldo=None):
-        """Crea un respaldo del inventario actual"""
+        return len(self.__indice)
+
+    def get_instrumentacion(self):
+        """Instrumentación activa o None"""
+        return self.__instrumentacion
+
+    def activar_instrumentacion(self, perfilar=False):
+        """Empieza a medir las operaciones desde cero; con perfilar=True también las perfila con cProfile"""
+        self.__instrumentacion = Instrumentacion(perfilar)
+        return self.__instrumentacion
+
+    def desactivar_instrumentacion(self):
+        """Deja de medir las operaciones"""
+        self.__instrumentacion = None
+
+    def metricas_operaciones(self):
+        """Resumen de la instrumentación por operación; vacío si no está activa"""
+        if self.__instrumentacion is None:
+            return {}
+        return self.__instrumentacion.resumen()
+
+    def crear_respaldo(self, archivo_respaldo=None, incremental=False, comprimir=False):
+        """Crea un respaldo del inventario actual.
+
+        Con incremental=True solo se guardan los productos modificados desde el último respaldo;
+        si aún no hay un respaldo completo en esta sesión se crea uno completo como base.
+        Con comprimir=True el archivo se escribe comprimido con gzip.
+        """
+        incremental = incremental and self.__modificados_desde_respaldo is not None
         if archivo_respaldo is None:
             import datetime
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            archivo_respaldo = f"respaldo_inventario_{timestamp}.txt"
+            archivo_respaldo = f"respaldo_inventario_{timestamp}{'_inc' if incremental else ''}.txt"
+            if comprimir:
+                archivo_respaldo += ".gz"
 
         try:
-            datos = [producto.to_dict() for producto in self.__productos]
-            with open(archivo_respaldo, 'w', encoding='utf-8') as archivo:
-                json.dump(datos, archivo, indent=2, ensure_ascii=False)
+            if incremental:
+                productos, eliminados = [], []
+                for id_producto in self.__modificados_desde_respaldo:
+                    indice = self.__buscar_por_id(id_producto)
+                    if indice == -1:
+                        eliminados.append(id_producto)
+                    else:
+                        productos.append(self.__productos[indice].to_dict())
+                datos = {'tipo': 'incremental', 'productos': productos, 'eliminados': eliminados}
+            else:
+                datos = [producto.to_dict() for producto in self.__productos_activos()]
+
+            abrir = gzip.open if comprimir else open
+            with abrir(archivo_respaldo, 'wt', encoding='utf-8') as archivo:
+                json.dump(datos, archivo, indent=None if comprimir else 2, ensure_ascii=False)
+            self.__modificados_desde_respaldo = set()
+
+            if incremental:
+                return True, (f"✓ Respaldo incremental creado: '{archivo_respaldo}' "
+                              f"({len(datos['productos'])} modificados, {len(datos['eliminados'])} eliminados)")
             return True, f"✓ Respaldo creado exitosamente: '{archivo_respaldo}'"
         except Exception as e:
             return False, f" Error al crear respaldo: {str(e)}"
 
+    def restaurar_respaldo(self, archivo_base, archivos_incrementales=()):
+        """Reemplaza el inventario por un respaldo completo más sus respaldos incrementales, en orden"""
+        try:
+            productos = {}
+            base = leer_respaldo(archivo_base)
+            if not isinstance(base, list):
+                return False, f"Error: '{archivo_base}' no es un respaldo completo"
+            for producto_data in base:
+                productos[producto_data['id_producto']] = producto_data
+            for archivo in archivos_incrementales:
+                delta = leer_respaldo(archivo)
+                if not isinstance(delta, dict) or delta.get('tipo') != 'incremental':
+                    return False, f"Error: '{archivo}' no es un respaldo incremental"
+                for id_producto in delta['eliminados']:
+                    productos.pop(id_producto, None)
+                for producto_data in delta['productos']:
+                    productos[producto_data['id_producto']] = producto_data
+            nuevos = [Producto.from_dict(producto_data) for producto_data in productos.values()]
+        except (OSError, ValueError, KeyError) as e:
+            return False, f" Error al leer el respaldo: {str(e)}"
+
+        anterior = (self.__productos, self.__indice, self.__eliminados)
+        self.__productos, self.__indice, self.__eliminados = [], {}, 0
+        for producto in nuevos:
+            self.__insertar(producto)
+
+        exito_guardado, mensaje_guardado = self.__guardar_inventario(reemplazar=True)
+        if not exito_guardado:
+            self.__productos, self.__indice, self.__eliminados = anterior
+            return False, f" Respaldo no restaurado - Error al guardar: {mensaje_guardado}"
+        # El estado cambió por completo: el siguiente incremental necesita una base nueva
+        self.__modificados_desde_respaldo = None
+        return True, f"✓ Inventario restaurado con {len(nuevos)} productos\n  {mensaje_guardado}"
+
+    def importar(self, ruta, tamano_bloque=10_000, max_errores=100):
+        """Importa productos desde un CSV con cabecera o un archivo JSON lines (.jsonl).
+
+        El archivo se lee en bloques de tamano_bloque filas; cada fila se valida con las reglas de
+        Producto y las inválidas o con ID repetido se informan y se omiten sin abortar la importación.
+        Cada bloque validado se añade de una vez a la lista y el índice por ID se actualiza una sola vez
+        al final; el inventario se guarda una vez y, si la lectura o el guardado fallan, se revierten
+        todas las altas. Devuelve (exito, mensaje, errores) con errores como lista de (línea, motivo),
+        como mucho max_errores.
+        """
+        errores = []
+        rechazadas = 0
+        inicio = len(self.__productos)  # las altas quedan a partir de esta posición
+        nuevos = set()
+        try:
+            for bloque in en_bloques(leer_filas(ruta), tamano_bloque):
+                validos = {}
+                for numero, fila in bloque:
+                    try:
+                        producto = producto_desde_fila(fila)
+                        id_producto = producto.get_id()
+                        if id_producto in validos or id_producto in nuevos or self.__buscar_por_id(id_producto) != -1:
+                            raise ValueError(f"ya existe un producto con el ID {id_producto}")
+                    except ValueError as e:
+                        rechazadas += 1
+                        if len(errores) < max_errores:
+                            errores.append((numero, str(e)))
+                        continue
+                    validos[id_producto] = producto
+                self.__productos.extend(validos.values())
+                nuevos.update(validos)
+        except (OSError, csv.Error) as e:
+            del self.__productos[inicio:]
+            return False, f"Lote revertido - operación inválida: no se pudo leer '{ruta}': {str(e)}", errores
+
+        if not nuevos:
+            return True, f"No había cambios que aplicar\n  Importados: 0 | Rechazados: {rechazadas}", errores
+        for posicion in range(inicio, len(self.__productos)):
+            self.__indice[self.__productos[posicion].get_id()] = posicion
+        exito_guardado, mensaje_guardado = self.__guardar_inventario(nuevos)
+        if not exito_guardado:
+            for id_producto in nuevos:
+                del self.__indice[id_producto]
+            del self.__productos[inicio:]
+            return False, f" Lote revertido - Error al guardar: {mensaje_guardado}", errores
+        for id_producto in nuevos:
+            self.__registrar_cambio(id_producto)
+        return True, (f"✓ Lote de {len(nuevos)} cambios guardado\n  {mensaje_guardado}\n"
+                      f"  Importados: {len(nuevos)} | Rechazados: {rechazadas}"), errores
+
+    def exportar(self, ruta):
+        """Escribe el inventario en CSV o JSON lines (según la extensión) producto a producto"""
+        total = 0
+        try:
+            with open(ruta, 'w', encoding='utf-8', newline='') as archivo:
+                if es_json_lines(ruta):
+                    for producto in self.__productos_activos():
+                        archivo.write(json.dumps(producto.to_dict(), ensure_ascii=False) + "\n")
+                        total += 1
+                else:
+                    escritor = csv.writer(archivo)
+                    escritor.writerow(CAMPOS_PRODUCTO)
+                    for producto in self.__productos_activos():
+                        escritor.writerow((producto.get_id(), producto.get_nombre(), producto.get_cantidad(),
+                                           producto.get_precio()))
+                        total += 1
+        except OSError as e:
+            return False, f" Error al exportar: {str(e)}"
+        return True, f"✓ {total} productos exportados a '{ruta}'"
+
+
+def leer_respaldo(ruta):
+    """Lee un archivo de respaldo, comprimido con gzip o en texto plano"""
+    with open(ruta, 'rb') as archivo:
+        comprimido = archivo.read(2) == b'\x1f\x8b'
+    abrir = gzip.open if comprimido else open
+    with abrir(ruta, 'rt', encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+
+# Columnas de los archivos de importación/exportación, en el orden de Producto.to_dict
+CAMPOS_PRODUCTO = ('id_producto', 'nombre', 'cantidad', 'precio')
+
+
+def es_json_lines(ruta):
+    """Indica si la ruta es un archivo JSON lines (un producto por línea); si no se trata como CSV"""
+    return ruta.lower().endswith(('.jsonl', '.ndjson'))
+
+
+def leer_filas(ruta):
+    """Recorre un CSV con cabecera o un archivo JSON lines devolviendo (número de línea, fila).
+
+    Las líneas JSON mal formadas se devuelven con fila None para que se informen como inválidas.
+    """
+    with open(ruta, 'r', encoding='utf-8', newline='') as archivo:
+        if es_json_lines(ruta):
+            for numero, linea in enumerate(archivo, 1):
+                if not linea.strip():
+                    continue
+                try:
+                    yield numero, json.loads(linea)
+                except json.JSONDecodeError:
+                    yield numero, None
+        else:
+            lector = csv.DictReader(archivo)
+            for fila in lector:
+                yield lector.line_num, fila
+
+
+def en_bloques(iterable, tamano):
+    """Agrupa un iterable en listas de como mucho tamano elementos"""
+    iterador = iter(iterable)
+    while True:
+        bloque = list(islice(iterador, tamano))
+        if not bloque:
+            return
+        yield bloque
+
+
+def producto_desde_fila(fila):
+    """Crea un Producto desde una fila importada con las mismas reglas que el menú; ValueError si no es válida"""
+    if not isinstance(fila, dict):
+        raise ValueError("fila mal formada")
+    faltantes = [campo for campo in CAMPOS_PRODUCTO if fila.get(campo) in (None, '')]
+    if faltantes:
+        raise ValueError(f"faltan campos: {', '.join(faltantes)}")
+    try:
+        id_producto = int(fila['id_producto'])
+        cantidad = int(fila['cantidad'])
+        precio = float(fila['precio'])
+    except (TypeError, ValueError):
+        raise ValueError("el ID, la cantidad y el precio deben ser numéricos")
+    nombre = str(fila['nombre']).strip()
+    if id_producto < 1:
+        raise ValueError("el ID debe ser mayor o igual a 1")
+    if not nombre:
+        raise ValueError("el nombre no puede estar vacío")
+    producto = Producto(id_producto, nombre, 0, 0.0)
+    producto.set_cantidad(cantidad)
+    producto.set_precio(precio)
+    return producto
+
+
+def benchmark_indice(cantidad=100_000, operaciones=1_000):
+    """Compara la búsqueda lineal anterior con el índice por ID y la baja con pop() frente a los huecos"""
+    directorio = tempfile.mkdtemp()
+    inventario = Inventario(os.path.join(directorio, "benchmark.json"))
+    for i in range(1, cantidad + 1):
+        inventario._Inventario__insertar(Producto(i, f"Producto {i}", i % 50, 1.5))
+    productos = list(inventario._Inventario__productos)
+    ids = [random.randint(1, cantidad) for _ in range(operaciones)]
+
+    inicio = time.perf_counter()
+    for id_producto in ids:
+        next((i for i, p in enumerate(productos) if p.get_id() == id_producto), -1)
+    lineal = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for id_producto in ids:
+        inventario._Inventario__buscar_por_id(id_producto)
+    indexado = time.perf_counter() - inicio
+
+    print(f"Búsqueda por ID ({operaciones} ops sobre {cantidad} productos)")
+    print(f"  lineal: {lineal * 1000:.1f} ms | índice: {indexado * 1000:.3f} ms")
+
+    bajas = random.sample(range(1, cantidad + 1), operaciones)
+    copia = list(productos)
+    inicio = time.perf_counter()
+    for id_producto in bajas:
+        copia.pop(next(i for i, p in enumerate(copia) if p.get_id() == id_producto))
+    lineal = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for id_producto in bajas:
+        inventario._Inventario__marcar_eliminado(inventario._Inventario__buscar_por_id(id_producto))
+        inventario._Inventario__compactar_si_necesario()
+    indexado = time.perf_counter() - inicio
+    print(f"Bajas en memoria ({operaciones} ops)")
+    print(f"  búsqueda + pop: {lineal * 1000:.1f} ms | índice + hueco: {indexado * 1000:.3f} ms")
+
+
+def _escritor_concurrente(archivo, numero, operaciones):
+    """Proceso de la prueba de estrés: añade sus propios productos y actualiza uno de cada tres"""
+    with redirect_stdout(open(os.devnull, 'w')):
+        inventario = Inventario(archivo)
+        for i in range(operaciones):
+            id_producto = numero * 100_000 + i
+            if i % 10 == 9:
+                # Una parte de las altas va en lote para ejercitar aplicar_cambios
+                inventario.aplicar_cambios([("añadir", id_producto, f"Producto {numero} {i}", 1, 1.0 + i)])
+            else:
+                inventario.añadir_producto(id_producto, f"Producto {numero} {i}", 1, 1.0 + i)
+            if i % 3 == 0:
+                inventario.actualizar_producto(id_producto, nueva_cantidad=99)
+
+
+def prueba_estres_concurrente(procesos=8, operaciones=100):
+    """Lanza varios procesos que escriben a la vez el mismo archivo y comprueba que no se pierda ningún cambio"""
+    import multiprocessing
+    archivo = os.path.join(tempfile.mkdtemp(), "compartido.json")
+    hijos = [multiprocessing.Process(target=_escritor_concurrente, args=(archivo, numero, operaciones))
+             for numero in range(1, procesos + 1)]
+    inicio = time.perf_counter()
+    for hijo in hijos:
+        hijo.start()
+    for hijo in hijos:
+        hijo.join()
+    duracion = time.perf_counter() - inicio
+
+    with redirect_stdout(open(os.devnull, 'w')):
+        final = Inventario(archivo)
+    por_id = {producto.get_id(): producto for producto in final.buscar_por_nombre("")}
+    perdidos = cantidades_mal = 0
+    for numero in range(1, procesos + 1):
+        for i in range(operaciones):
+            producto = por_id.get(numero * 100_000 + i)
+            if producto is None:
+                perdidos += 1
+            elif producto.get_cantidad() != (99 if i % 3 == 0 else 1):
+                cantidades_mal += 1
+    print(f"{procesos} procesos x {operaciones} operaciones en {duracion:.2f} s")
+    print(f"  productos: {final.get_total_productos()} de {procesos * operaciones}")
+    print(f"  perdidos: {perdidos} | cantidades incorrectas: {cantidades_mal}")
+    return (perdidos == 0 and cantidades_mal == 0 and final.get_total_productos() == procesos * operaciones
+            and all(hijo.exitcode == 0 for hijo in hijos))
+
+
+def importar_exportar(argumentos):
+    """Línea de comandos: --importar <archivo> y/o --exportar <archivo> sobre inventario.json, sin el menú.
+
+    --convertir <origen.json> <destino> pasa un inventario guardado en JSON al formato binario.
+    """
+    correcto = True
+    if "--convertir" in argumentos:
+        posicion = argumentos.index("--convertir") + 1
+        if posicion + 1 >= len(argumentos):
+            print("Error: uso --convertir <origen.json> <destino>")
+            return False
+        inicio = time.perf_counter()
+        exito, mensaje = convertir_json_a_binario(argumentos[posicion], argumentos[posicion + 1])
+        print(f"{mensaje}\n  ({time.perf_counter() - inicio:.2f} s)")
+        correcto = exito
+        if "--importar" not in argumentos and "--exportar" not in argumentos:
+            return correcto
+
+    with redirect_stdout(open(os.devnull, 'w')):
+        inventario = Inventario()
+    for opcion in ("--importar", "--exportar"):
+        if opcion not in argumentos:
+            continue
+        posicion = argumentos.index(opcion) + 1
+        if posicion >= len(argumentos):
+            print(f"Error: falta el archivo de {opcion}")
+            return False
+        inicio = time.perf_counter()
+        if opcion == "--importar":
+            exito, mensaje, errores = inventario.importar(argumentos[posicion])
+            for numero, motivo in errores:
+                print(f"  Línea {numero}: {motivo}")
+        else:
+            exito, mensaje = inventario.exportar(argumentos[posicion])
+        print(f"{mensaje}\n  ({time.perf_counter() - inicio:.2f} s)")
+        correcto = correcto and exito
+    return correcto
+
 
 def mostrar_menu():
     """Muestra el menú principal"""
@@ -258,6 +1184,11 @@ def mostrar_menu():
     print("5. Mostrar todos los productos")
     print("6. Estadísticas del inventario")
     print("7. Crear respaldo del inventario")
+    print("8. Restaurar respaldo")
+    print("9. Vigilar cambios externos")
+    print("10. Importar productos (CSV / JSON lines)")
+    print("11. Exportar productos (CSV / JSON lines)")
+    print("12. Métricas de rendimiento")
     print("0. Salir")
     print("=" * 60)
 
@@ -281,7 +1212,7 @@ def main():
     print("    INICIALIZANDO SISTEMA DE GESTIÓN DE INVENTARIOS")
     print("=" * 60)
 
-    inventario = Inventario()
+    inventario = Inventario(instrumentar="--instrumentar" in sys.argv)
 
     # Solo añadir datos de ejemplo si el inventario está vacío
     if inventario.get_total_productos() == 0:
@@ -296,6 +1227,9 @@ def main():
 
         try:
             opcion = input("Seleccione una opción: ").strip()
+            recargado, mensaje = inventario.recargar_si_cambio()
+            if recargado:
+                print(f"\n{mensaje}")
 
             if opcion == "1":
                 # Añadir producto
@@ -372,8 +1306,9 @@ def main():
                     print("Error: Debe ingresar un nombre para buscar")
 
             elif opcion == "5":
-                # Mostrar todos
-                print("\n" + inventario.mostrar_todos())
+                # Mostrar todos (se imprime a medida que se genera)
+                print()
+                inventario.escribir_reporte()
 
             elif opcion == "6":
                 # Estadísticas
@@ -403,16 +1338,91 @@ def main():
                 print("\n--- CREAR RESPALDO DEL INVENTARIO ---")
                 respuesta = input("¿Desea especificar el nombre del archivo de respaldo? (s/n): ").strip().lower()
 
+                incremental = input("¿Respaldo incremental (solo cambios)? (s/n): ").strip().lower() == 's'
+                comprimir = input("¿Comprimir el respaldo? (s/n): ").strip().lower() == 's'
+
                 if respuesta == 's':
                     nombre_respaldo = input("Nombre del archivo de respaldo: ").strip()
                     if not nombre_respaldo.endswith('.json'):
                         nombre_respaldo += '.json'
-                    exito, mensaje = inventario.crear_respaldo(nombre_respaldo)
+                    if comprimir:
+                        nombre_respaldo += '.gz'
+                    exito, mensaje = inventario.crear_respaldo(nombre_respaldo, incremental, comprimir)
                 else:
-                    exito, mensaje = inventario.crear_respaldo()
+                    exito, mensaje = inventario.crear_respaldo(incremental=incremental, comprimir=comprimir)
 
                 print(f"\n{mensaje}")
 
+            elif opcion == "8":
+                # Restaurar respaldo
+                print("\n--- RESTAURAR RESPALDO ---")
+                archivo_base = input("Archivo del respaldo completo: ").strip()
+                incrementales = input("Respaldos incrementales en orden, separados por comas (opcional): ").strip()
+                archivos = [nombre.strip() for nombre in incrementales.split(',') if nombre.strip()]
+
+                if input("Se reemplazará el inventario actual. ¿Continuar? (s/n): ").strip().lower() == 's':
+                    exito, mensaje = inventario.restaurar_respaldo(archivo_base, archivos)
+                    print(f"\n{mensaje}")
+
+            elif opcion == "9":
+                # Vigilar el archivo hasta Ctrl+C
+                print("\n--- VIGILAR CAMBIOS EXTERNOS ---")
+                intervalo = obtener_numero("Intervalo de comprobación (segundos): ", float, 0.05)
+                print("Vigilando el archivo... (Ctrl+C para terminar)")
+                inventario.vigilar(intervalo)
+                metricas = inventario.metricas_recarga()
+                print(f"\nComprobaciones: {metricas['comprobaciones']} | Recargas: {metricas['recargas']} "
+                      f"| Productos cambiados: {metricas['productos_cambiados']}")
+                print(f"Latencia de recarga: {metricas['latencia_promedio_ms']:.1f} ms promedio, "
+                      f"{metricas['latencia_maxima_ms']:.1f} ms máxima")
+                print(f"Retraso de detección: {metricas['retraso_promedio_ms']:.1f} ms promedio, "
+                      f"{metricas['retraso_maximo_ms']:.1f} ms máximo")
+
+            elif opcion == "10":
+                # Importación masiva
+                print("\n--- IMPORTAR PRODUCTOS ---")
+                ruta = input("Archivo a importar (.csv o .jsonl): ").strip()
+                exito, mensaje, errores = inventario.importar(ruta)
+                print(f"\n{mensaje}")
+                for numero, motivo in errores:
+                    print(f"  Línea {numero}: {motivo}")
+
+            elif opcion == "11":
+                # Exportación
+                print("\n--- EXPORTAR PRODUCTOS ---")
+                ruta = input("Archivo de destino (.csv o .jsonl): ").strip()
+                exito, mensaje = inventario.exportar(ruta)
+                print(f"\n{mensaje}")
+
+            elif opcion == "12":
+                # Instrumentación: se activa la primera vez, después muestra y guarda las métricas
+                print("\n--- MÉTRICAS DE RENDIMIENTO ---")
+                instrumentacion = inventario.get_instrumentacion()
+                if instrumentacion is None:
+                    if input("La instrumentación está desactivada. ¿Activarla? (s/n): ").strip().lower() == 's':
+                        perfilar = input("¿Perfilar también con cProfile? (s/n): ").strip().lower() == 's'
+                        inventario.activar_instrumentacion(perfilar)
+                        print("✓ Instrumentación activada")
+                    continue
+
+                metricas = instrumentacion.resumen()
+                if not metricas:
+                    print("Aún no hay operaciones medidas")
+                for operacion, datos in metricas.items():
+                    print(f"{operacion}: {datos['llamadas']} llamadas | promedio {datos['promedio_ms']:.3f} ms "
+                          f"| máximo {datos['max_ms']:.3f} ms")
+                    print("  " + "  ".join(f"{cubeta}: {n}" for cubeta, n in datos['histograma'].items() if n))
+                ruta = input("Guardar las métricas en JSON (ruta, Enter para omitir): ").strip()
+                if ruta:
+                    instrumentacion.volcar_json(ruta)
+                    print(f"✓ Métricas guardadas en '{ruta}'")
+                ruta = input("Guardar el perfil pstats (ruta, Enter para omitir): ").strip()
+                if ruta:
+                    if instrumentacion.guardar_perfil(ruta):
+                        print(f"✓ Perfil guardado en '{ruta}' (python -m pstats {ruta})")
+                    else:
+                        print("Error: El perfilado con cProfile no está activo")
+
             elif opcion == "0":
                 # Salir
                 print("\n¡Gracias por usar el Sistema de Gestión de Inventarios!")
@@ -421,7 +1431,7 @@ def main():
                 break
 
             else:
-                print("Error: Opción no válida. Por favor seleccione una opción del 0 al 7.")
+                print("Error: Opción no válida. Por favor seleccione una opción del 0 al 12.")
 
         except KeyboardInterrupt:
             print("\n\nPrograma interrumpido por el usuario.")
@@ -437,4 +1447,11 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if "--benchmark" in sys.argv:
+        benchmark_indice()
+    elif "--estres" in sys.argv:
+        sys.exit(0 if prueba_estres_concurrente() else 1)
+    elif "--importar" in sys.argv or "--exportar" in sys.argv or "--convertir" in sys.argv:
+        sys.exit(0 if importar_exportar(sys.argv) else 1)
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,449 @@
+"""Benchmark comparativo de los tres Inventario: lista en memoria (Semana 09), lista + JSON (Semana 10)
+y diccionario + índices + JSON (semana_11).
+
+Uso:
+    python benchmark_inventarios.py --tamanos 1000,10000 --salida resultados.json
+    python benchmark_inventarios.py --comparar resultados_anteriores.json
+    python benchmark_inventarios.py --producto 1000000
+
+Cada operación se repite hasta --repeticiones veces o hasta agotar --tiempo-maximo segundos, lo que
+ocurra primero; el catálogo sintético depende solo de --semilla, así que dos versiones del código
+se miden sobre los mismos datos. Semana 10 y semana_11 guardan y cargan tanto en JSON como en el
+formato binario compartido (formato_binario.py).
+
+La suite completa se repite --rondas veces. Como en timeit.repeat, se informa el mejor promedio de ronda
+junto con la dispersión entre rondas, y --comparar solo marca una regresión cuando el empeoramiento supera
+--umbral y además es mayor que esa dispersión.
+"""
+import argparse
+import gc
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+RUTAS_MODULOS = {
+    'semana_09': os.path.join(DIRECTORIO, "Semana 09", "9.1 Tarea semana 9.py"),
+    'semana_10': os.path.join(DIRECTORIO, "Semana 10", "10.1 tarea semana 10.py"),
+    'semana_11': os.path.join(DIRECTORIO, "semana_11", "11.1 Tarea semana 11.py"),
+}
+# Las operaciones binarias van al final: guardan en el mismo archivo y el formato se detecta al cargar
+OPERACIONES = ('agregar', 'eliminar', 'actualizar', 'buscar_nombre', 'listar', 'estadisticas', 'guardar', 'cargar',
+               'guardar_binario', 'cargar_binario')
+TAMANOS = (1_000, 10_000, 100_000, 1_000_000)
+PALABRAS = ["Mouse", "Teclado", "Monitor", "Cable", "Usb", "Laptop", "Disco", "Memoria", "Camara", "Audifono"]
+CONSULTAS = ["usb", "modelo 12", "teclado mon", "xyz"]
+
+
+def cargar_modulo(nombre):
+    """Importa uno de los scripts de las semanas (sus nombres de archivo no son importables con import)"""
+    spec = importlib.util.spec_from_file_location(f"inventario_{nombre}", RUTAS_MODULOS[nombre])
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def generar_catalogo(cantidad, semilla=42, desde=1):
+    """Catálogo sintético reproducible: (número, nombre, cantidad, precio) para cantidad números desde desde"""
+    aleatorio = random.Random(semilla)
+    for numero in range(desde, desde + cantidad):
+        nombre = f"{aleatorio.choice(PALABRAS)} {aleatorio.choice(PALABRAS)} Modelo {numero}"
+        yield numero, nombre, aleatorio.randrange(50), round(aleatorio.uniform(1, 1000), 2)
+
+
+class AdaptadorSemana09:
+    """Lista con el almacén por defecto (solo memoria): guardar y cargar no aplican"""
+
+    def __init__(self, modulo, directorio):
+        self.modulo = modulo
+        self.inventario = modulo.Inventario()
+
+    def poblar(self, catalogo):
+        # Directo sobre la lista: añadir_producto comprueba el ID con una búsqueda lineal (O(N²) al poblar)
+        self.inventario._Inventario__lista().extend(self.modulo.Producto(*datos) for datos in catalogo)
+
+    def agregar(self, numero, nombre, cantidad, precio):
+        self.inventario.añadir_producto(numero, nombre, cantidad, precio)
+
+    def eliminar(self, numero):
+        self.inventario.eliminar_producto(numero)
+
+    def actualizar(self, numero):
+        self.inventario.actualizar_producto(numero, nueva_cantidad=7)
+
+    def buscar_nombre(self, texto):
+        self.inventario.buscar_por_nombre(texto)
+
+    def listar(self):
+        self.inventario.mostrar_todos()
+
+    def estadisticas(self):
+        # Mismo cálculo que la opción 6 del menú
+        productos = self.inventario.buscar_por_nombre("")
+        sum(p.get_precio() * p.get_cantidad() for p in productos)
+        sum(p.get_cantidad() for p in productos)
+
+    guardar = cargar = guardar_binario = cargar_binario = None
+
+
+class AdaptadorSemana10:
+    """Lista con índice por ID; cada cambio reescribe el archivo JSON completo"""
+
+    def __init__(self, modulo, directorio):
+        self.modulo = modulo
+        self.archivo = os.path.join(directorio, "semana_10.json")
+        with redirect_stdout(io.StringIO()):
+            self.inventario = modulo.Inventario(self.archivo)
+
+    def poblar(self, catalogo):
+        insertar = self.inventario._Inventario__insertar
+        for datos in catalogo:
+            insertar(self.modulo.Producto(*datos))
+        self.guardar()
+
+    def agregar(self, numero, nombre, cantidad, precio):
+        self.inventario.añadir_producto(numero, nombre, cantidad, precio)
+
+    def eliminar(self, numero):
+        self.inventario.eliminar_producto(numero)
+
+    def actualizar(self, numero):
+        self.inventario.actualizar_producto(numero, nueva_cantidad=7)
+
+    def buscar_nombre(self, texto):
+        self.inventario.buscar_por_nombre(texto)
+
+    def listar(self):
+        with open(os.devnull, 'w', encoding='utf-8') as destino:
+            self.inventario.escribir_reporte(destino)
+
+    def estadisticas(self):
+        productos = self.inventario.buscar_por_nombre("")
+        sum(p.get_precio() * p.get_cantidad() for p in productos)
+        sum(p.get_cantidad() for p in productos)
+
+    def guardar(self):
+        exito, mensaje = self.inventario._Inventario__guardar_inventario()
+        if not exito:
+            raise RuntimeError(mensaje)
+
+    def cargar(self):
+        with redirect_stdout(io.StringIO()):
+            self.modulo.Inventario(self.archivo)
+
+    def guardar_binario(self):
+        self.inventario._Inventario__formato = "binario"
+        try:
+            self.guardar()
+        finally:
+            self.inventario._Inventario__formato = "json"
+
+    def cargar_binario(self):
+        with redirect_stdout(io.StringIO()):
+            self.modulo.Inventario(self.archivo, formato="binario")
+
+
+class AdaptadorSemana11:
+    """Diccionario con índices y agregados mantenidos; snapshot JSON reescrito en cada cambio (modo json)"""
+
+    def __init__(self, modulo, directorio):
+        self.modulo = modulo
+        self.archivo = os.path.join(directorio, "semana_11.json")
+        self.inventario = modulo.Inventario(self.archivo)
+
+    @staticmethod
+    def _id(numero):
+        return f"P{numero:07d}"
+
+    def poblar(self, catalogo):
+        for numero, nombre, cantidad, precio in catalogo:
+            self.inventario._poner(self.modulo.Producto(self._id(numero), nombre, cantidad, precio))
+        self.guardar()
+
+    def agregar(self, numero, nombre, cantidad, precio):
+        self.inventario.agregar(self._id(numero), nombre, cantidad, precio)
+
+    def eliminar(self, numero):
+        self.inventario.eliminar(self._id(numero))
+
+    def actualizar(self, numero):
+        self.inventario.actualizar_cantidad(self._id(numero), 7)
+
+    def buscar_nombre(self, texto):
+        self.inventario.buscar_por_nombre(texto)
+
+    def listar(self):
+        self.inventario.listar_todos()
+
+    def estadisticas(self):
+        self.inventario.estadisticas()
+
+    def guardar(self):
+        if not self.inventario._escribir_estado():
+            raise RuntimeError(f"no se pudo guardar {self.archivo}")
+
+    def cargar(self):
+        self.modulo.Inventario(self.archivo).cerrar()
+
+    def guardar_binario(self):
+        self.inventario._formato = "binario"
+        try:
+            self.guardar()
+        finally:
+            self.inventario._formato = "json"
+
+    def cargar_binario(self):
+        self.modulo.Inventario(self.archivo, formato="binario").cerrar()
+
+    def cerrar(self):
+        self.inventario.cerrar()
+
+
+ADAPTADORES = {'semana_09': AdaptadorSemana09, 'semana_10': AdaptadorSemana10, 'semana_11': AdaptadorSemana11}
+
+
+def medir(funcion, argumentos, repeticiones, tiempo_maximo):
+    """Ejecuta funcion(*args) para cada args hasta completar las repeticiones o agotar tiempo_maximo.
+
+    Como timeit, el recolector de basura se desactiva mientras se mide. Devuelve los tiempos en segundos.
+    """
+    tiempos = []
+    limite = time.perf_counter() + tiempo_maximo
+    gc_activo = gc.isenabled()
+    gc.disable()
+    try:
+        for args in argumentos:
+            inicio = time.perf_counter()
+            funcion(*args)
+            tiempos.append(time.perf_counter() - inicio)
+            if len(tiempos) >= repeticiones or time.perf_counter() >= limite:
+                break
+    finally:
+        if gc_activo:
+            gc.enable()
+    return tiempos
+
+
+def medir_implementacion(nombre, tamano, repeticiones=20, tiempo_maximo=5.0, semilla=42):
+    """Mide todas las operaciones de una implementación sobre un catálogo de tamano productos.
+
+    Devuelve una lista de (operación, tiempos en segundos) en el orden de OPERACIONES.
+    """
+    modulo = cargar_modulo(nombre)
+    directorio = tempfile.mkdtemp(prefix=f"benchmark_{nombre}_")
+    aleatorio = random.Random(semilla)
+    resultados = []
+    try:
+        adaptador = ADAPTADORES[nombre](modulo, directorio)
+        inicio = time.perf_counter()
+        adaptador.poblar(generar_catalogo(tamano, semilla))
+        resultados.append(('poblar', [time.perf_counter() - inicio]))
+
+        # Altas con números nuevos, bajas y cambios sobre números existentes elegidos al azar
+        altas = generar_catalogo(repeticiones, semilla + 1, desde=tamano + 1)
+        existentes = aleatorio.sample(range(1, tamano + 1), min(tamano, 2 * repeticiones))
+        argumentos = {
+            'agregar': altas,
+            'eliminar': ((numero,) for numero in existentes[:repeticiones]),
+            'actualizar': ((numero,) for numero in existentes[repeticiones:]),
+            'buscar_nombre': ((CONSULTAS[i % len(CONSULTAS)],) for i in range(repeticiones)),
+        }
+        for operacion in OPERACIONES:
+            funcion = getattr(adaptador, operacion)
+            if funcion is None:
+                continue  # la implementación no tiene esa operación
+            tiempos = medir(funcion, argumentos.get(operacion, (() for _ in range(repeticiones))),
+                            repeticiones, tiempo_maximo)
+            resultados.append((operacion, tiempos))
+        if hasattr(adaptador, 'cerrar'):
+            adaptador.cerrar()
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    return resultados
+
+
+def _resultado(implementacion, tamano, operacion, rondas):
+    """Resume los tiempos de cada ronda: como timeit.repeat, el mejor promedio de ronda es el menos afectado
+    por otros procesos, y la distancia entre el mejor y el peor estima el ruido de la medición"""
+    tiempos = [tiempo for ronda in rondas for tiempo in ronda]
+    medias = [sum(ronda) / len(ronda) for ronda in rondas if ronda]
+    return {
+        'implementacion': implementacion,
+        'tamano': tamano,
+        'operacion': operacion,
+        'rondas': len(medias),
+        'repeticiones': len(tiempos),
+        'media_s': sum(tiempos) / len(tiempos) if tiempos else None,
+        'mejor_s': min(medias, default=None),
+        'dispersion_s': max(medias) - min(medias) if medias else None,
+        'min_s': min(tiempos, default=None),
+        'max_s': max(tiempos, default=None),
+    }
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=DIRECTORIO, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ejecutar(implementaciones=tuple(RUTAS_MODULOS), tamanos=TAMANOS, repeticiones=20, tiempo_maximo=5.0,
+             semilla=42, rondas=5):
+    """Ejecuta la suite completa rondas veces y devuelve el informe (metadatos del entorno + resultados)"""
+    informe = {
+        'fecha': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'commit': _commit_actual(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'semilla': semilla,
+        'repeticiones': repeticiones,
+        'tiempo_maximo_s': tiempo_maximo,
+        'rondas': rondas,
+        'resultados': [],
+    }
+    for tamano in tamanos:
+        for nombre in implementaciones:
+            por_operacion = {}
+            for _ in range(rondas):
+                # Cada ronda empieza con un inventario nuevo, así que las rondas son independientes entre sí
+                for operacion, tiempos in medir_implementacion(nombre, tamano, repeticiones, tiempo_maximo, semilla):
+                    por_operacion.setdefault(operacion, []).append(tiempos)
+                gc.collect()
+            for operacion, tiempos_rondas in por_operacion.items():
+                resultado = _resultado(nombre, tamano, operacion, tiempos_rondas)
+                informe['resultados'].append(resultado)
+                if resultado['mejor_s'] is None:
+                    continue
+                print(f"{nombre:>10} | {tamano:>9} | {operacion:>15} | {resultado['mejor_s'] * 1000:>12.3f} ms | "
+                      f"± {resultado['dispersion_s'] * 1000:>10.3f} ms | {resultado['repeticiones']:>4} rep.")
+    return informe
+
+
+def _mejor(resultado):
+    """Mejor tiempo de ronda y su dispersión; los informes anteriores a las rondas solo tienen la media"""
+    if 'mejor_s' in resultado:
+        return resultado['mejor_s'], resultado['dispersion_s'] or 0.0
+    return resultado['media_s'], 0.0
+
+
+def comparar(anterior, actual, umbral=1.2):
+    """Resultados que empeoraron respecto a un informe anterior.
+
+    Se compara el mejor tiempo de ronda de cada informe. Cuenta como regresión si supera umbral veces
+    al anterior y además la diferencia es mayor que la dispersión medida en cualquiera de los dos informes:
+    un salto que cabe dentro del ruido entre rondas no es una regresión.
+    """
+    previos = {(r['implementacion'], r['tamano'], r['operacion']): r for r in anterior['resultados']}
+    regresiones = []
+    for resultado in actual['resultados']:
+        clave = (resultado['implementacion'], resultado['tamano'], resultado['operacion'])
+        if clave not in previos:
+            continue
+        previo, ruido_previo = _mejor(previos[clave])
+        nuevo, ruido_nuevo = _mejor(resultado)
+        if not previo or nuevo is None:
+            continue
+        if nuevo > previo * umbral and nuevo - previo > max(ruido_previo, ruido_nuevo):
+            regresiones.append((*clave, previo, nuevo))
+    return regresiones
+
+
+class ProductoConDict:
+    """Representación anterior de Producto: atributos privados en el __dict__ de cada instancia"""
+
+    def __init__(self, id_producto, nombre, cantidad, precio):
+        self.__id_producto = id_producto
+        self.__nombre = nombre
+        self.__cantidad = cantidad
+        self.__precio = precio
+
+    def get_cantidad(self):
+        return self.__cantidad
+
+    def get_precio(self):
+        return self.__precio
+
+
+def benchmark_producto(implementaciones=('semana_09', 'semana_10'), cantidad=1_000_000):
+    """Mide bytes por producto y velocidad de los getters: Producto con __slots__ frente a uno con __dict__"""
+    clases = [('con __dict__', ProductoConDict)]
+    clases += [(nombre, cargar_modulo(nombre).Producto) for nombre in implementaciones]
+    print(f"{'clase':>16} | {'bytes/producto':>14} | {'getters/s':>12}")
+    for etiqueta, clase in clases:
+        gc.collect()
+        tracemalloc.start()
+        productos = [clase(i, "Producto", i % 50, 1.5) for i in range(cantidad)]
+        memoria = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        inicio = time.perf_counter()
+        for producto in productos:
+            producto.get_cantidad()
+            producto.get_precio()
+        llamadas = 2 * cantidad / (time.perf_counter() - inicio)
+        print(f"{etiqueta:>16} | {memoria / cantidad:>14.1f} | {llamadas:>12,.0f}")
+        del productos
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmark de las implementaciones de Inventario")
+    parser.add_argument("--implementaciones", default=",".join(RUTAS_MODULOS),
+                        help="lista separada por comas (semana_09,semana_10,semana_11)")
+    parser.add_argument("--tamanos", default=",".join(map(str, TAMANOS)), help="tamaños del catálogo")
+    parser.add_argument("--repeticiones", type=int, default=20, help="repeticiones máximas por operación")
+    parser.add_argument("--tiempo-maximo", type=float, default=5.0,
+                        help="segundos máximos por operación en cada ronda")
+    parser.add_argument("--rondas", type=int, default=5,
+                        help="veces que se repite la suite; se informa el mejor promedio y la dispersión")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", default="benchmark_inventarios.json", help="archivo JSON de resultados")
+    parser.add_argument("--comparar", help="informe JSON anterior contra el que buscar regresiones")
+    parser.add_argument("--umbral", type=float, default=1.2, help="factor de empeoramiento que cuenta como regresión")
+    parser.add_argument("--producto", type=int, metavar="N",
+                        help="solo mide memoria y getters de N Producto (Semana 09 y Semana 10) y termina")
+    opciones = parser.parse_args(argumentos)
+
+    if opciones.producto:
+        benchmark_producto(cantidad=opciones.producto)
+        return 0
+
+    implementaciones = [nombre.strip() for nombre in opciones.implementaciones.split(",") if nombre.strip()]
+    desconocidas = [nombre for nombre in implementaciones if nombre not in RUTAS_MODULOS]
+    if desconocidas:
+        parser.error(f"implementaciones desconocidas: {', '.join(desconocidas)}")
+    tamanos = [int(tamano) for tamano in opciones.tamanos.split(",") if tamano.strip()]
+
+    if opciones.rondas < 1:
+        parser.error("--rondas debe ser al menos 1")
+
+    print(f"{'impl.':>10} | {'productos':>9} | {'operación':>15} | {'mejor ronda':>15} | {'dispersión':>13} | rep.")
+    informe = ejecutar(implementaciones, tamanos, opciones.repeticiones, opciones.tiempo_maximo, opciones.semilla,
+                       opciones.rondas)
+    with open(opciones.salida, 'w', encoding='utf-8') as f:
+        json.dump(informe, f, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {opciones.salida}")
+
+    if opciones.comparar:
+        with open(opciones.comparar, 'r', encoding='utf-8') as f:
+            regresiones = comparar(json.load(f), informe, opciones.umbral)
+        for implementacion, tamano, operacion, previo, actual in regresiones:
+            print(f"REGRESIÓN {implementacion} {tamano} {operacion}: "
+                  f"{previo * 1000:.3f} ms -> {actual * 1000:.3f} ms")
+        return 1 if regresiones else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Formato binario de los snapshots de inventario, compartido por Semana 10 y semana_11.
+
+Cabecera | registros de ancho fijo | tabla de cadenas (cantidad, offsets, bytes UTF-8).
+Los IDs y los nombres van en la tabla de cadenas (los textos repetidos se guardan una sola vez) y los
+campos numéricos se empaquetan con struct; el crc32 del cuerpo detecta archivos dañados.
+"""
+import mmap
+import struct
+import zlib
+
+MAGIA = b'INVB'
+VERSION = 2
+CABECERA = struct.Struct('<4sHHII')  # magia, versión, reservado, productos, crc32 del cuerpo
+REGISTRO = struct.Struct('<IIqdq')  # índice del ID, índice del nombre, cantidad, precio, punto de reorden
+REGISTROS_POR_VERSION = {1: struct.Struct('<IIqd'), VERSION: REGISTRO}  # la versión 1 no tenía punto de reorden
+
+
+def es_binario(ruta):
+    """Indica si el archivo empieza con la firma del formato"""
+    with open(ruta, 'rb') as archivo:
+        return archivo.read(len(MAGIA)) == MAGIA
+
+
+def serializar(productos):
+    """Empaqueta tuplas (id, nombre, cantidad, precio, punto_reorden); los IDs se guardan como texto"""
+    cadenas = {}  # texto -> índice en la tabla
+    registros = bytearray()
+    for id_producto, nombre, cantidad, precio, punto_reorden in productos:
+        registros += REGISTRO.pack(cadenas.setdefault(str(id_producto), len(cadenas)),
+                                   cadenas.setdefault(nombre, len(cadenas)), cantidad, precio, punto_reorden)
+    codificadas = [texto.encode('utf-8') for texto in cadenas]
+    offsets = [0]
+    for cadena in codificadas:
+        offsets.append(offsets[-1] + len(cadena))
+    cuerpo = b''.join([registros, struct.pack('<I', len(codificadas)),
+                       struct.pack(f'<{len(offsets)}Q', *offsets), *codificadas])
+    total = len(registros) // REGISTRO.size
+    return CABECERA.pack(MAGIA, VERSION, 0, total, zlib.crc32(cuerpo)) + cuerpo
+
+
+def iterar(ruta):
+    """Recorre el archivo mediante mmap y genera tuplas (id, nombre, cantidad, precio, punto_reorden).
+
+    El sistema pagina el archivo bajo demanda en lugar de copiarlo completo; los IDs salen como texto.
+    """
+    with open(ruta, 'rb') as archivo, mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+        magia, version, _, total, crc = CABECERA.unpack_from(mapa, 0)
+        registro = REGISTROS_POR_VERSION.get(version)
+        if magia != MAGIA or registro is None:
+            raise ValueError(f"formato binario no soportado (versión {version})")
+        calculado = 0
+        for inicio in range(CABECERA.size, len(mapa), 1 << 20):
+            calculado = zlib.crc32(mapa[inicio:inicio + (1 << 20)], calculado)
+        if calculado != crc:
+            raise ValueError("checksum inválido: el archivo está dañado")
+
+        inicio_tabla = CABECERA.size + total * registro.size
+        (num_cadenas,) = struct.unpack_from('<I', mapa, inicio_tabla)
+        offsets = struct.unpack_from(f'<{num_cadenas + 1}Q', mapa, inicio_tabla + 4)
+        base = inicio_tabla + 4 + 8 * (num_cadenas + 1)
+        cadenas = [mapa[base + offsets[i]:base + offsets[i + 1]].decode('utf-8') for i in range(num_cadenas)]
+
+        for i in range(total):
+            i_id, i_nombre, cantidad, precio, *punto = registro.unpack_from(mapa, CABECERA.size + i * registro.size)
+            yield cadenas[i_id], cadenas[i_nombre], cantidad, precio, punto[0] if punto else 0
@@ -1,123 +1,2573 @@
+import cProfile
+import csv
+import functools
+import heapq
 import json
+import operator
 import os
-from typing import Dict, List, Optional
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from multiprocessing import shared_memory
+from typing import Callable, Collection, Dict, Iterable, Iterator, List, Optional, Set
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin locks entre procesos
+    fcntl = None
+
+# formato_binario.py vive en Parcial 02, un nivel por encima de este script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import formato_binario
 
 
 class Producto:
-    def __init__(self, id_producto: str, nombre: str, cantidad: int, precio: float):
+    # punto_reorden: con menos unidades que este valor el producto necesita reposición (0: sin punto de reorden)
+    def __init__(self, id_producto: str, nombre: str, cantidad: int, precio: float, punto_reorden: int = 0):
         self.id_producto = id_producto.strip().upper()
         self.nombre = nombre.strip().title()
         self.cantidad = max(0, int(cantidad))
         self.precio = max(0.0, float(precio))
+        self.punto_reorden = max(0, int(punto_reorden))
 
     def valor_total(self) -> float:
         return self.cantidad * self.precio
 
+    def bajo_reorden(self) -> bool:
+        return self.cantidad < self.punto_reorden
+
     def to_dict(self) -> Dict:
         return {
             'id_producto': self.id_producto,
             'nombre': self.nombre,
             'cantidad': self.cantidad,
-            'precio': self.precio
+            'precio': self.precio,
+            'punto_reorden': self.punto_reorden
         }
 
     @classmethod
     def from_dict(cls, data: Dict):
-        return cls(data['id_producto'], data['nombre'], data['cantidad'], data['precio'])
+        # Los archivos anteriores a los puntos de reorden no traen el campo
+        return cls(data['id_producto'], data['nombre'], data['cantidad'], data['precio'],
+                   data.get('punto_reorden', 0))
 
     def __str__(self) -> str:
         return f"ID: {self.id_producto} | {self.nombre} | Cant: {self.cantidad} | ${self.precio:.2f} | Total: ${self.valor_total():.2f}"
 
 
+class ListaOrdenada:
+    # Lista ordenada partida en bloques (al estilo de sortedcontainers): insertar y quitar cuestan O(√N)
+    # en lugar del O(N) de desplazar una sola lista enorme
+    TAMANO_BLOQUE = 1000
+
+    def __init__(self, valores: Iterable[str] = ()):
+        ordenados = sorted(valores)
+        t = self.TAMANO_BLOQUE
+        self._bloques: List[List[str]] = [ordenados[i:i + t] for i in range(0, len(ordenados), t)]
+        self._maximos: List[str] = [bloque[-1] for bloque in self._bloques]
+        self._longitud = len(ordenados)
+
+    def agregar(self, valor: str):
+        if not self._bloques:
+            self._bloques.append([valor])
+            self._maximos.append(valor)
+            self._longitud = 1
+            return
+        i = min(bisect_left(self._maximos, valor), len(self._bloques) - 1)
+        bloque = self._bloques[i]
+        insort(bloque, valor)
+        self._maximos[i] = bloque[-1]
+        if len(bloque) > 2 * self.TAMANO_BLOQUE:
+            mitad = len(bloque) // 2
+            self._bloques[i:i + 1] = [bloque[:mitad], bloque[mitad:]]
+            self._maximos[i:i + 1] = [bloque[mitad - 1], bloque[-1]]
+        self._longitud += 1
+
+    def quitar(self, valor: str):
+        i = bisect_left(self._maximos, valor)
+        if i < len(self._bloques):
+            bloque = self._bloques[i]
+            j = bisect_left(bloque, valor)
+            if j < len(bloque) and bloque[j] == valor:
+                del bloque[j]
+                if bloque:
+                    self._maximos[i] = bloque[-1]
+                else:
+                    del self._bloques[i]
+                    del self._maximos[i]
+                self._longitud -= 1
+                return
+        raise ValueError(f"{valor!r} no está en la lista")
+
+    def rebanada(self, inicio: int, fin: int) -> List[str]:
+        # Se saltan bloques completos hasta llegar a la posición inicio
+        resultado: List[str] = []
+        for bloque in self._bloques:
+            if inicio >= len(bloque):
+                inicio -= len(bloque)
+                fin -= len(bloque)
+                continue
+            resultado.extend(bloque[inicio:fin])
+            fin -= len(bloque)
+            inicio = 0
+            if fin <= 0:
+                break
+        return resultado
+
+    def desde(self, valor: str) -> Iterator[str]:
+        i = bisect_left(self._maximos, valor)
+        if i == len(self._bloques):
+            return
+        bloque = self._bloques[i]
+        yield from bloque[bisect_left(bloque, valor):]
+        for bloque in self._bloques[i + 1:]:
+            yield from bloque
+
+    def posicion(self, valor: str) -> int:
+        # Cantidad de elementos menores que valor: O(√N) sumando los bloques anteriores
+        i = bisect_left(self._maximos, valor)
+        previos = sum(len(bloque) for bloque in self._bloques[:i])
+        return previos + (bisect_left(self._bloques[i], valor) if i < len(self._bloques) else 0)
+
+    def __iter__(self) -> Iterator[str]:
+        for bloque in self._bloques:
+            yield from bloque
+
+    def __len__(self) -> int:
+        return self._longitud
+
+
+class IndiceNgramas:
+    # Índice invertido n-grama -> posiciones (slots) del almacén cuyo nombre lo contiene, en un array('I') por
+    # n-grama: 4 bytes por entrada, sin un set ni referencias a los IDs. Se construye de una pasada; después
+    # las altas se anexan y las bajas no se buscan en los arrays: solo se cuentan. Las entradas obsoletas (o de
+    # una posición ya reutilizada) pueden devolver candidatos de más, así que quien consulta verifica cada
+    # candidato contra el nombre actual
+    def __init__(self, n: int, pares: Iterable[tuple] = ()):
+        self._n = n
+        self._listas: Dict[str, array] = {}
+        self._obsoletas = 0
+        listas, entradas = self._listas, 0
+        for slot, nombre in pares:
+            texto = nombre.lower()
+            ngramas = {texto[i:i + n] for i in range(len(texto) - n + 1)}
+            entradas += len(ngramas)
+            for ngrama in ngramas:
+                lista = listas.get(ngrama)
+                if lista is None:
+                    listas[ngrama] = array('I', (slot,))
+                else:
+                    lista.append(slot)
+        self._entradas = entradas
+
+    def ngramas(self, texto: str) -> Set[str]:
+        n = self._n
+        return {texto[i:i + n] for i in range(len(texto) - n + 1)}
+
+    def agregar(self, slot: int, nombre: str):
+        for ngrama in self.ngramas(nombre.lower()):
+            lista = self._listas.get(ngrama)
+            if lista is None:
+                self._listas[ngrama] = array('I', (slot,))
+            else:
+                lista.append(slot)
+            self._entradas += 1
+
+    def quitar(self, nombre: str):
+        self._obsoletas += len(self.ngramas(nombre.lower()))
+
+    def degradado(self) -> bool:
+        # Con más de la mitad de entradas obsoletas conviene reconstruirlo
+        return self._obsoletas * 2 > self._entradas
+
+    def estimar(self, ngramas: Iterable[str]) -> int:
+        return min((len(self._listas.get(ngrama, ())) for ngrama in ngramas), default=0)
+
+    def candidatos(self, ngramas: Iterable[str]) -> Set[int]:
+        # Se parte de la lista más corta y se intersecan las siguientes mientras sean comparables en tamaño;
+        # intersecar una lista mucho más larga cuesta más que verificar los candidatos que descartaría
+        listas = sorted((self._listas.get(ngrama, ()) for ngrama in ngramas), key=len)
+        if not listas or not listas[0]:
+            return set()
+        candidatos = set(listas[0])
+        for lista in listas[1:]:
+            if len(lista) > 8 * len(candidatos):
+                break
+            candidatos.intersection_update(lista)
+        return candidatos
+
+
+class ProductoVista(Producto):
+    # Vista sobre una fila de AlmacenColumnar: lee y escribe directamente en las columnas
+    def __init__(self, almacen: 'AlmacenColumnar', id_producto: str):
+        self._almacen = almacen
+        self.id_producto = id_producto
+
+    @property
+    def nombre(self) -> str:
+        return self._almacen._nombres[self._almacen._slots[self.id_producto]]
+
+    @nombre.setter
+    def nombre(self, valor: str):
+        self._almacen._nombres[self._almacen._slots[self.id_producto]] = sys.intern(valor)
+
+    @property
+    def cantidad(self) -> int:
+        return self._almacen._cantidades[self._almacen._slots[self.id_producto]]
+
+    @cantidad.setter
+    def cantidad(self, valor: int):
+        self._almacen._cantidades[self._almacen._slots[self.id_producto]] = valor
+
+    @property
+    def precio(self) -> float:
+        return self._almacen._precios[self._almacen._slots[self.id_producto]]
+
+    @precio.setter
+    def precio(self, valor: float):
+        self._almacen._precios[self._almacen._slots[self.id_producto]] = valor
+
+    @property
+    def punto_reorden(self) -> int:
+        return self._almacen._puntos_reorden[self._almacen._slots[self.id_producto]]
+
+    @punto_reorden.setter
+    def punto_reorden(self, valor: int):
+        self._almacen._puntos_reorden[self._almacen._slots[self.id_producto]] = valor
+
+
+class _AlmacenPorPosiciones(MutableMapping):
+    # Base de los almacenes en memoria: cada producto ocupa una posición (slot) estable mientras exista.
+    # Al borrarlo la posición queda libre y la reutiliza la próxima alta; así los índices pueden guardar
+    # posiciones enteras en arrays en lugar de referencias a los IDs
+    def __init__(self):
+        self._slots: Dict[str, int] = {}  # ID -> posición
+        self._ids: List[Optional[str]] = []  # posición -> ID, None si está libre
+        self._libres: List[int] = []
+
+    def _ocupar(self, id_prod: str) -> int:
+        # Posición para un ID nuevo: una libre o una más al final (las subclases agregan sus columnas)
+        if self._libres:
+            slot = self._libres.pop()
+            self._ids[slot] = id_prod
+        else:
+            slot = len(self._ids)
+            self._ids.append(id_prod)
+        self._slots[id_prod] = slot
+        return slot
+
+    def _liberar(self, id_prod: str) -> int:
+        slot = self._slots.pop(id_prod)
+        self._ids[slot] = None
+        self._libres.append(slot)
+        return slot
+
+    def slot(self, id_prod: str) -> Optional[int]:
+        return self._slots.get(id_prod)
+
+    def id_en(self, slot: int) -> Optional[str]:
+        return self._ids[slot]
+
+    def __contains__(self, id_prod) -> bool:
+        return id_prod in self._slots
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._slots)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+
+class AlmacenColumnar(_AlmacenPorPosiciones):
+    # Guarda los productos en columnas paralelas (arrays tipados) en lugar de un objeto por producto;
+    # los Producto se materializan como vistas solo al accederlos
+    def __init__(self):
+        super().__init__()
+        self._nombres: List[str] = []
+        self._cantidades = array('q')
+        self._precios = array('d')
+        self._puntos_reorden = array('q')
+
+    def __getitem__(self, id_prod: str) -> Producto:
+        if id_prod not in self._slots:
+            raise KeyError(id_prod)
+        return ProductoVista(self, id_prod)
+
+    def __setitem__(self, id_prod: str, producto: Producto):
+        self._escribir(id_prod, producto.nombre, producto.cantidad, producto.precio, producto.punto_reorden)
+
+    def _escribir(self, id_prod: str, nombre: str, cantidad: int, precio: float, punto_reorden: int):
+        fila = self._slots.get(id_prod)
+        if fila is None:
+            fila = self._ocupar(id_prod)
+            if fila == len(self._nombres):
+                self._nombres.append(sys.intern(nombre))
+                self._cantidades.append(cantidad)
+                self._precios.append(precio)
+                self._puntos_reorden.append(punto_reorden)
+                return
+        self._nombres[fila] = sys.intern(nombre)
+        self._cantidades[fila] = cantidad
+        self._precios[fila] = precio
+        self._puntos_reorden[fila] = punto_reorden
+
+    def __delitem__(self, id_prod: str):
+        self._nombres[self._liberar(id_prod)] = ''  # la fila queda libre para la próxima alta
+
+    def pop(self, id_prod: str, *defecto):
+        # Se devuelve una copia independiente: la vista dejaría de ser válida al borrar la fila
+        fila = self._slots.get(id_prod)
+        if fila is None:
+            if defecto:
+                return defecto[0]
+            raise KeyError(id_prod)
+        producto = Producto(id_prod, self._nombres[fila], self._cantidades[fila], self._precios[fila],
+                            self._puntos_reorden[fila])
+        del self[id_prod]
+        return producto
+
+    def cargar_registros(self, registros: Iterable[tuple]):
+        # Pares (ID, dict del archivo); los archivos anteriores a los puntos de reorden no traen el campo
+        for id_prod, datos in registros:
+            self._escribir(id_prod, datos['nombre'], datos['cantidad'], datos['precio'], datos.get('punto_reorden', 0))
+
+    def fila(self, id_prod: str) -> tuple:
+        # (nombre, cantidad, precio, punto_reorden) sin crear la vista
+        i = self._slots[id_prod]
+        return self._nombres[i], self._cantidades[i], self._precios[i], self._puntos_reorden[i]
+
+    def filas(self) -> Iterator[tuple]:
+        # (id, nombre, cantidad, precio, punto_reorden) de las filas ocupadas, en orden de posición
+        return (fila for fila in zip(self._ids, self._nombres, self._cantidades, self._precios, self._puntos_reorden)
+                if fila[0] is not None)
+
+    def nombres(self) -> Iterator[tuple]:
+        # (posición, nombre) de las filas ocupadas
+        return ((slot, nombre) for slot, (id_prod, nombre) in enumerate(zip(self._ids, self._nombres))
+                if id_prod is not None)
+
+
+class AlmacenPerezoso(_AlmacenPorPosiciones):
+    # Almacén por defecto: en cada posición la fila cruda del archivo (nombre, cantidad, precio, punto_reorden)
+    # o el Producto, que se construye la primera vez que se accede (los dados de alta en ejecución ya son Producto).
+    # Una tupla ocupa bastante menos que el dict decodificado, que repite sus claves en cada registro
+    def __init__(self):
+        super().__init__()
+        self._datos: List[object] = []  # posición -> fila cruda, Producto o None si está libre
+
+    def _poner_en(self, id_prod: str, valor):
+        slot = self._slots.get(id_prod)
+        if slot is None:
+            slot = self._ocupar(id_prod)
+            if slot == len(self._datos):
+                self._datos.append(valor)
+                return
+        self._datos[slot] = valor
+
+    def cargar_registros(self, registros: Iterable[tuple]):
+        # Pares (ID, dict del archivo) de la carga inicial, en un solo bucle sobre el almacén recién creado;
+        # los archivos anteriores a los puntos de reorden no traen el campo
+        if self._libres:
+            raise RuntimeError("cargar_registros solo se usa sobre un almacén sin bajas")
+        slots, ids, filas = self._slots, self._ids, self._datos
+        for id_prod, datos in registros:
+            fila = (datos['nombre'], datos['cantidad'], datos['precio'], datos.get('punto_reorden', 0))
+            slot = slots.get(id_prod)
+            if slot is None:
+                slots[id_prod] = len(ids)
+                ids.append(id_prod)
+                filas.append(fila)
+            else:
+                filas[slot] = fila  # ID repetido en el archivo: gana el último, como con json.load
+
+    def fila(self, id_prod: str) -> tuple:
+        # (nombre, cantidad, precio, punto_reorden) sin materializar el Producto
+        valor = self._datos[self._slots[id_prod]]
+        if type(valor) is tuple:
+            return valor
+        return valor.nombre, valor.cantidad, valor.precio, valor.punto_reorden
+
+    def filas(self) -> Iterator[tuple]:
+        # (id, nombre, cantidad, precio, punto_reorden), en orden de posición
+        for id_prod, valor in zip(self._ids, self._datos):
+            if type(valor) is tuple:
+                yield (id_prod,) + valor
+            elif valor is not None:
+                yield id_prod, valor.nombre, valor.cantidad, valor.precio, valor.punto_reorden
+
+    def registros(self) -> Iterator[tuple]:
+        for id_prod, nombre, cantidad, precio, punto_reorden in self.filas():
+            yield id_prod, {'id_producto': id_prod, 'nombre': nombre, 'cantidad': cantidad, 'precio': precio,
+                            'punto_reorden': punto_reorden}
+
+    def nombres(self) -> Iterator[tuple]:
+        # (posición, nombre) de las posiciones ocupadas, sin materializar las filas crudas
+        for slot, valor in enumerate(self._datos):
+            if type(valor) is tuple:
+                yield slot, valor[0]
+            elif valor is not None:
+                yield slot, valor.nombre
+
+    def __getitem__(self, id_prod: str) -> Producto:
+        slot = self._slots[id_prod]
+        valor = self._datos[slot]
+        if type(valor) is tuple:
+            valor = self._datos[slot] = Producto(id_prod, *valor)
+        return valor
+
+    def __setitem__(self, id_prod: str, producto: Producto):
+        self._poner_en(id_prod, producto)
+
+    def __delitem__(self, id_prod: str):
+        self._datos[self._liberar(id_prod)] = None
+
+
+# '"ID": ' con sus espacios (el ID sin escapes, que es el caso común) y ', ' o '}' tras cada registro
+_CLAVE_JSON = re.compile(r'[ \t\r\n]*"([^"\\]*)"[ \t\r\n]*:[ \t\r\n]*')
+_SEPARADOR_JSON = re.compile(r'[ \t\r\n]*([,}])')
+_ESPACIOS_JSON = re.compile(r'[ \t\r\n]*')
+
+
+def _iterar_snapshot(ruta: str, tamano_bloque: int = 1 << 20) -> Iterator[tuple]:
+    # Recorre un archivo {"ID": {...}, ...} registro a registro leyendo bloques de tamano_bloque caracteres.
+    # Cada registro cuesta dos expresiones regulares y una llamada al escáner de json; uno cortado al final
+    # del bloque se vuelve a decodificar desde su inicio cuando llega el bloque siguiente
+    escanear = json.JSONDecoder().scan_once
+    clave, separador, espacios = _CLAVE_JSON.match, _SEPARADOR_JSON.match, _ESPACIOS_JSON.match
+    with open(ruta, 'r', encoding='utf-8') as f:
+        buffer = ''
+
+        def siguiente_caracter(desde: int) -> int:
+            # Posición del siguiente carácter que no es espacio, leyendo bloques si hace falta
+            nonlocal buffer
+            while True:
+                pos = espacios(buffer, desde).end()
+                if pos < len(buffer):
+                    return pos
+                bloque = f.read(tamano_bloque)
+                if not bloque:
+                    raise ValueError("archivo JSON incompleto")
+                buffer += bloque
+
+        inicio = siguiente_caracter(0)
+        if buffer[inicio] != '{':
+            raise ValueError("se esperaba un objeto JSON")
+        inicio = siguiente_caracter(inicio + 1)
+        if buffer[inicio] == '}':
+            return
+        while True:
+            encontrada = clave(buffer, inicio)
+            try:
+                if encontrada is None:
+                    # ID con escapes o texto que no es una clave: lo resuelve el escáner de json
+                    id_prod, pos = escanear(buffer, espacios(buffer, inicio).end())
+                    pos = espacios(buffer, pos).end()
+                    if buffer[pos] != ':':
+                        raise ValueError(f"se esperaba ':' tras {id_prod!r}")
+                    pos = espacios(buffer, pos + 1).end()
+                else:
+                    id_prod, pos = encontrada.group(1), encontrada.end()
+                datos, pos = escanear(buffer, pos)
+                fin = separador(buffer, pos)
+                if fin is None:
+                    pos = espacios(buffer, pos).end()
+                    if pos < len(buffer):
+                        raise ValueError(f"separador inesperado {buffer[pos]!r}")
+                    raise IndexError(pos)  # el bloque terminó antes del separador
+            except (StopIteration, json.JSONDecodeError, IndexError) as e:
+                bloque = f.read(tamano_bloque)
+                if not bloque:
+                    if isinstance(e, json.JSONDecodeError):
+                        raise
+                    raise ValueError("archivo JSON incompleto") from e
+                buffer, inicio = buffer[inicio:] + bloque, 0
+                continue
+            yield id_prod, datos
+            if fin.group(1) == '}':
+                return
+            inicio = fin.end()
+
+
+# === FORMATO BINARIO ===
+# La estructura (cabecera, registros y tabla de cadenas) está en Parcial 02/formato_binario.py, compartida con
+# Semana 10; aquí solo se adapta a los diccionarios del snapshot
+def _serializar_binario(datos: Dict[str, Dict]) -> bytes:
+    return formato_binario.serializar((id_prod, prod_data['nombre'], prod_data['cantidad'], prod_data['precio'],
+                                       prod_data.get('punto_reorden', 0)) for id_prod, prod_data in datos.items())
+
+
+def _escribir_snapshot_json(f, datos: Dict, tamano_bloque: int = 1000):
+    # json.dump recorre todo con el codificador en Python puro; json.dumps usa el de C, así que se codifica por
+    # bloques de tamano_bloque productos y se escribe uno por línea. '}, "' solo aparece entre registros: dentro
+    # de una cadena JSON las comillas van escapadas
+    iterador = iter(datos.items())
+    separador = '{'
+    while True:
+        bloque = dict(islice(iterador, tamano_bloque))
+        if not bloque:
+            break
+        f.write(separador + '\n' + json.dumps(bloque)[1:-1].replace('}, "', '},\n"'))
+        separador = ','
+    f.write('{\n}\n' if separador == '{' else '\n}\n')
+
+
+def _iterar_snapshot_binario(ruta: str) -> Iterator[tuple]:
+    for id_prod, nombre, cantidad, precio, punto_reorden in formato_binario.iterar(ruta):
+        yield id_prod, {'id_producto': id_prod, 'nombre': nombre, 'cantidad': cantidad, 'precio': precio,
+                        'punto_reorden': punto_reorden}
+
+
+def convertir_json_a_binario(origen: str, destino: str) -> int:
+    datos = dict(_iterar_snapshot(origen))
+    with open(destino, 'wb') as f:
+        f.write(_serializar_binario(datos))
+    return len(datos)
+
+
+# === IMPORTACIÓN / EXPORTACIÓN ===
+# CSV con cabecera o JSON lines (.jsonl/.ndjson, un producto por línea) con las columnas de Producto.to_dict
+CAMPOS_PRODUCTO = ('id_producto', 'nombre', 'cantidad', 'precio', 'punto_reorden')
+CAMPOS_OBLIGATORIOS = CAMPOS_PRODUCTO[:4]  # sin punto_reorden se toma 0
+
+
+def _es_json_lines(ruta: str) -> bool:
+    return ruta.lower().endswith(('.jsonl', '.ndjson'))
+
+
+def _leer_filas(ruta: str) -> Iterator[tuple]:
+    # (número de línea, fila); una línea JSON mal formada llega como None para informarla como inválida
+    with open(ruta, 'r', encoding='utf-8', newline='') as f:
+        if _es_json_lines(ruta):
+            for numero, linea in enumerate(f, 1):
+                if not linea.strip():
+                    continue
+                try:
+                    yield numero, json.loads(linea)
+                except json.JSONDecodeError:
+                    yield numero, None
+        else:
+            lector = csv.DictReader(f)
+            for fila in lector:
+                yield lector.line_num, fila
+
+
+def _en_bloques(iterable: Iterable, tamano: int) -> Iterator[list]:
+    iterador = iter(iterable)
+    while True:
+        bloque = list(islice(iterador, tamano))
+        if not bloque:
+            return
+        yield bloque
+
+
+def _producto_desde_fila(fila) -> Producto:
+    # Mismas reglas que el alta desde el menú (ID obligatorio) y que Producto; ValueError si la fila no sirve
+    if not isinstance(fila, dict):
+        raise ValueError("fila mal formada")
+    faltantes = [campo for campo in CAMPOS_OBLIGATORIOS if fila.get(campo) in (None, '')]
+    if faltantes:
+        raise ValueError(f"faltan campos: {', '.join(faltantes)}")
+    id_prod = str(fila['id_producto'])
+    if not id_prod.strip():
+        raise ValueError("ID requerido")
+    try:
+        return Producto(id_prod, str(fila['nombre']), fila['cantidad'], fila['precio'],
+                        fila.get('punto_reorden') or 0)
+    except (TypeError, ValueError):
+        raise ValueError("cantidad, precio o punto de reorden no numérico")
+
+
+class ProductoSQLite(Producto):
+    # Producto leído de AlmacenSQLite: los cambios de cantidad, precio y punto de reorden se escriben en la tabla
+    def __init__(self, almacen: 'AlmacenSQLite', id_producto: str, nombre: str, cantidad: int, precio: float,
+                 punto_reorden: int = 0):
+        self._almacen = almacen
+        self.id_producto = id_producto
+        self.nombre = nombre
+        self._cantidad = cantidad
+        self._precio = precio
+        self._punto_reorden = punto_reorden
+
+    @property
+    def cantidad(self) -> int:
+        return self._cantidad
+
+    @cantidad.setter
+    def cantidad(self, valor: int):
+        self._almacen._actualizar_campo(self.id_producto, 'cantidad', valor)
+        self._cantidad = valor
+
+    @property
+    def precio(self) -> float:
+        return self._precio
+
+    @precio.setter
+    def precio(self, valor: float):
+        self._almacen._actualizar_campo(self.id_producto, 'precio', valor)
+        self._precio = valor
+
+    @property
+    def punto_reorden(self) -> int:
+        return self._punto_reorden
+
+    @punto_reorden.setter
+    def punto_reorden(self, valor: int):
+        self._almacen._actualizar_campo(self.id_producto, 'punto_reorden', valor)
+        self._punto_reorden = valor
+
+
+class AlmacenSQLite(MutableMapping):
+    # Productos en una tabla SQLite indexada; nada se carga completo en memoria
+    EXTENSIONES = ('.sqlite', '.sqlite3', '.db')
+    OPERADORES = {'eq': '=', 'ne': '!=', 'lt': '<', 'le': '<=', 'gt': '>', 'ge': '>='}
+
+    def __init__(self, ruta: str):
+        os.makedirs(os.path.dirname(ruta) if os.path.dirname(ruta) else '.', exist_ok=True)
+        # isolation_level=None: autocommit salvo entre iniciar() y confirmar()/revertir()
+        self._conexion = sqlite3.connect(ruta, isolation_level=None, check_same_thread=False)
+        # lower() de SQLite solo pasa a minúsculas ASCII; py_lower compara igual que nombre.lower() en memoria
+        self._conexion.create_function("py_lower", 1, str.lower, deterministic=True)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.executescript("""
+            CREATE TABLE IF NOT EXISTS productos (
+                id_producto TEXT PRIMARY KEY,
+                nombre TEXT NOT NULL,
+                cantidad INTEGER NOT NULL,
+                precio REAL NOT NULL,
+                punto_reorden INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_productos_nombre ON productos(nombre COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS idx_productos_cantidad ON productos(cantidad);
+        """)
+        columnas = {fila[1] for fila in self._conexion.execute("PRAGMA table_info(productos)")}
+        if 'punto_reorden' not in columnas:  # base creada antes de los puntos de reorden
+            self._conexion.execute("ALTER TABLE productos ADD COLUMN punto_reorden INTEGER NOT NULL DEFAULT 0")
+        # Índice parcial por margen (cantidad - punto_reorden): solo los productos con punto de reorden
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_productos_reorden "
+                               "ON productos(cantidad - punto_reorden) WHERE punto_reorden > 0")
+        self._fts = self._crear_indice_texto()
+
+    def _crear_indice_texto(self) -> bool:
+        # Índice FTS5 de trigramas para búsquedas por subcadena; sin FTS5 se recurre a instr()
+        existe = self._conexion.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'productos_fts'").fetchone()
+        if existe:
+            return True
+        try:
+            self._conexion.executescript("""
+                CREATE VIRTUAL TABLE productos_fts USING fts5(
+                    nombre, content='productos', content_rowid='rowid', tokenize='trigram');
+                CREATE TRIGGER productos_fts_ai AFTER INSERT ON productos BEGIN
+                    INSERT INTO productos_fts(rowid, nombre) VALUES (new.rowid, new.nombre);
+                END;
+                CREATE TRIGGER productos_fts_ad AFTER DELETE ON productos BEGIN
+                    INSERT INTO productos_fts(productos_fts, rowid, nombre) VALUES ('delete', old.rowid, old.nombre);
+                END;
+                CREATE TRIGGER productos_fts_au AFTER UPDATE OF nombre ON productos BEGIN
+                    INSERT INTO productos_fts(productos_fts, rowid, nombre) VALUES ('delete', old.rowid, old.nombre);
+                    INSERT INTO productos_fts(rowid, nombre) VALUES (new.rowid, new.nombre);
+                END;
+                INSERT INTO productos_fts(productos_fts) VALUES ('rebuild');
+            """)
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    def _producto(self, fila) -> Producto:
+        return ProductoSQLite(self, *fila)
+
+    def _actualizar_campo(self, id_prod: str, campo: str, valor):
+        self._conexion.execute(f"UPDATE productos SET {campo} = ? WHERE id_producto = ?", (valor, id_prod))
+
+    def __getitem__(self, id_prod: str) -> Producto:
+        fila = self._conexion.execute(
+            "SELECT id_producto, nombre, cantidad, precio, punto_reorden FROM productos WHERE id_producto = ?",
+            (id_prod,)).fetchone()
+        if fila is None:
+            raise KeyError(id_prod)
+        return self._producto(fila)
+
+    def __setitem__(self, id_prod: str, producto: Producto):
+        self._conexion.execute(
+            "INSERT INTO productos (id_producto, nombre, cantidad, precio, punto_reorden) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(id_producto) DO UPDATE SET nombre = excluded.nombre, "
+            "cantidad = excluded.cantidad, precio = excluded.precio, punto_reorden = excluded.punto_reorden",
+            (id_prod, producto.nombre, producto.cantidad, producto.precio, producto.punto_reorden))
+
+    def agregar_muchos(self, productos: Iterable[Producto]):
+        # Altas de productos que no existen, con una sola sentencia preparada para todo el bloque
+        self._conexion.executemany(
+            "INSERT INTO productos (id_producto, nombre, cantidad, precio, punto_reorden) VALUES (?, ?, ?, ?, ?)",
+            ((p.id_producto, p.nombre, p.cantidad, p.precio, p.punto_reorden) for p in productos))
+
+    def __delitem__(self, id_prod: str):
+        if self._conexion.execute("DELETE FROM productos WHERE id_producto = ?", (id_prod,)).rowcount == 0:
+            raise KeyError(id_prod)
+
+    def __contains__(self, id_prod) -> bool:
+        return self._conexion.execute(
+            "SELECT 1 FROM productos WHERE id_producto = ?", (id_prod,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for (id_prod,) in self._conexion.execute("SELECT id_producto FROM productos ORDER BY id_producto"):
+            yield id_prod
+
+    def __len__(self) -> int:
+        return self._conexion.execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+
+    def registros(self) -> Iterator[tuple]:
+        # (ID, registro) leyendo la tabla con un solo cursor, sin una consulta por producto
+        for id_prod, nombre, cantidad, precio, punto_reorden in self._conexion.execute(
+                "SELECT id_producto, nombre, cantidad, precio, punto_reorden FROM productos ORDER BY id_producto"):
+            yield id_prod, {'id_producto': id_prod, 'nombre': nombre, 'cantidad': cantidad, 'precio': precio,
+                            'punto_reorden': punto_reorden}
+
+    # === CONSULTAS ===
+    def _filtro_nombre_contiene(self, texto: str) -> tuple:
+        # (condición, parámetros) de "texto está en el nombre", con la misma semántica que en memoria:
+        # subcadena literal (% y _ no son comodines) sobre nombre.lower(). El índice FTS solo preselecciona:
+        # una frase entre comillas es literal, pero FTS5 pliega mayúsculas a su manera y py_lower decide
+        texto = texto.lower()
+        condicion, parametros = "instr(py_lower(nombre), ?) > 0", [texto]
+        if self._fts and len(texto) >= 3:
+            condicion = "rowid IN (SELECT rowid FROM productos_fts WHERE productos_fts MATCH ?) AND " + condicion
+            parametros.insert(0, '"' + texto.replace('"', '""') + '"')
+        return condicion, parametros
+
+    def buscar_por_nombre(self, nombre: str) -> List[Producto]:
+        condicion, parametros = self._filtro_nombre_contiene(nombre)
+        return [self._producto(fila) for fila in self._conexion.execute(
+            "SELECT id_producto, nombre, cantidad, precio, punto_reorden FROM productos "
+            f"WHERE {condicion} ORDER BY id_producto", parametros)]
+
+    def listar_todos(self) -> List[Producto]:
+        return [self._producto(fila) for fila in self._conexion.execute(
+            "SELECT id_producto, nombre, cantidad, precio, punto_reorden FROM productos ORDER BY id_producto")]
+
+    def listar_pagina(self, offset: int, limite: int) -> List[Producto]:
+        return [self._producto(fila) for fila in self._conexion.execute(
+            "SELECT id_producto, nombre, cantidad, precio, punto_reorden FROM productos "
+            "ORDER BY id_producto LIMIT ? OFFSET ?",
+            (limite, offset))]
+
+    def listar_por_prefijo(self, prefijo: str, limite: int = -1) -> List[Producto]:
+        # Rango [prefijo, siguiente) sobre la clave primaria en lugar de LIKE, que no usaría el índice
+        if not prefijo:
+            return self.listar_pagina(0, limite)
+        siguiente = prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+        return [self._producto(fila) for fila in self._conexion.execute(
+            "SELECT id_producto, nombre, cantidad, precio, punto_reorden FROM productos "
+            "WHERE id_producto >= ? AND id_producto < ? ORDER BY id_producto LIMIT ?", (prefijo, siguiente, limite))]
+
+    def sin_stock(self) -> List[Producto]:
+        return [self._producto(fila) for fila in self._conexion.execute(
+            "SELECT id_producto, nombre, cantidad, precio, punto_reorden FROM productos "
+            "WHERE cantidad = 0 ORDER BY id_producto")]
+
+    def consultar(self, condiciones: Iterable[tuple], orden: Optional[str] = None, descendente: bool = False,
+                  limite: Optional[int] = None) -> Iterator[Producto]:
+        sql, parametros = self.sql_consulta(condiciones, orden, descendente, limite)
+        for fila in self._conexion.execute(sql, parametros):
+            yield self._producto(fila)
+
+    def sql_consulta(self, condiciones: Iterable[tuple], orden: Optional[str] = None, descendente: bool = False,
+                     limite: Optional[int] = None) -> tuple:
+        # (sql, parámetros) de una Consulta: filtros, orden y límite los resuelve SQLite con sus índices.
+        # Los valores ya vienen normalizados por Consulta (nombre en minúsculas, ID en mayúsculas)
+        filtros, parametros = [], []
+        for campo, operador, valor in condiciones:
+            columna = "py_lower(nombre)" if campo == 'nombre' else campo
+            if operador == 'contiene' and campo == 'nombre':
+                condicion, parametros_condicion = self._filtro_nombre_contiene(valor)
+                filtros.append(condicion)
+                parametros.extend(parametros_condicion)
+            elif operador == 'contiene':
+                filtros.append("instr(id_producto, ?) > 0")
+                parametros.append(valor)
+            elif operador == 'prefijo' and campo == 'nombre':
+                filtros.append("substr(py_lower(nombre), 1, ?) = ?")
+                parametros.extend((len(valor), valor))
+            elif operador == 'prefijo':
+                # Rango sobre la clave primaria, como en listar_por_prefijo
+                if valor:
+                    filtros.append("id_producto >= ? AND id_producto < ?")
+                    parametros.extend((valor, valor[:-1] + chr(ord(valor[-1]) + 1)))
+            elif operador == 'en':
+                filtros.append(f"{columna} IN ({', '.join('?' * len(valor))})" if valor else "0")
+                parametros.extend(valor)
+            else:
+                filtros.append(f"{columna} {self.OPERADORES[operador]} ?")
+                parametros.append(valor)
+        sql = "SELECT id_producto, nombre, cantidad, precio, punto_reorden FROM productos"
+        if filtros:
+            sql += " WHERE " + " AND ".join(filtros)
+        sentido = " DESC" if descendente else ""
+        if orden in (None, 'id_producto'):
+            sql += f" ORDER BY id_producto{sentido}"
+        else:
+            columna = "py_lower(nombre)" if orden == 'nombre' else orden
+            sql += f" ORDER BY {columna}{sentido}, id_producto{sentido}"
+        sql += " LIMIT ?"
+        parametros.append(-1 if limite is None else limite)
+        return sql, parametros
+
+    def plan_consulta(self, sql: str, parametros: List) -> List[str]:
+        return [fila[-1] for fila in self._conexion.execute("EXPLAIN QUERY PLAN " + sql, parametros)]
+
+    def bajo_reorden(self, holgura: int = 0) -> List[Producto]:
+        return [self._producto(fila) for fila in self._conexion.execute(
+            "SELECT id_producto, nombre, cantidad, precio, punto_reorden FROM productos "
+            "WHERE punto_reorden > 0 AND cantidad - punto_reorden < ? "
+            "ORDER BY cantidad - punto_reorden, id_producto", (holgura,))]
+
+    def agregados(self) -> Dict:
+        total, items, valor, suma_precios = self._conexion.execute(
+            "SELECT COUNT(*), TOTAL(cantidad), TOTAL(cantidad * precio), TOTAL(precio) FROM productos").fetchone()
+        sin_stock = self._conexion.execute("SELECT COUNT(*) FROM productos WHERE cantidad = 0").fetchone()[0]
+        return {'total_productos': total, 'total_items': int(items), 'valor_total': valor,
+                'sin_stock': sin_stock, 'suma_precios': suma_precios}
+
+    # === TRANSACCIONES ===
+    def iniciar(self):
+        self._conexion.execute("BEGIN")
+
+    def confirmar(self):
+        self._conexion.execute("COMMIT")
+
+    def revertir(self):
+        self._conexion.execute("ROLLBACK")
+
+    def cerrar(self):
+        self._conexion.close()
+
+
+class BloqueoArchivo:
+    # Lock consultivo entre procesos (flock) sobre <archivo>.lock; el mismo archivo guarda
+    # un contador de versión que cada escritor incrementa al persistir
+    def __init__(self, archivo: str):
+        self.ruta = archivo + ".lock"
+
+    def adquirir(self, exclusivo: bool = True):
+        os.makedirs(os.path.dirname(self.ruta) or '.', exist_ok=True)
+        f = open(self.ruta, 'a+', encoding='utf-8')
+        if fcntl is not None:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH)
+            except BaseException:
+                f.close()
+                raise
+        return f
+
+    def liberar(self, f):
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        f.close()
+
+    @contextmanager
+    def exclusivo(self) -> Iterator:
+        f = self.adquirir()
+        try:
+            yield f
+        finally:
+            self.liberar(f)
+
+    @contextmanager
+    def compartido(self) -> Iterator:
+        f = self.adquirir(exclusivo=False)
+        try:
+            yield f
+        finally:
+            self.liberar(f)
+
+    def version(self, f=None) -> int:
+        # Sin lock la lectura puede coincidir con una escritura: el valor erróneo solo provoca una recarga de más
+        try:
+            if f is None:
+                with open(self.ruta, 'r', encoding='utf-8') as archivo:
+                    contenido = archivo.read()
+            else:
+                f.seek(0)
+                contenido = f.read()
+        except FileNotFoundError:
+            return 0
+        contenido = contenido.strip()
+        return int(contenido) if contenido.isdigit() else 0
+
+    def incrementar(self, f) -> int:
+        version = self.version(f) + 1
+        f.seek(0)
+        f.truncate()
+        f.write(str(version))
+        f.flush()
+        return version
+
+
+class EscritorDiferido:
+    # Hilo que agrupa las solicitudes de guardado: escribe como mucho una vez por intervalo
+    def __init__(self, escribir: Callable[[], bool], intervalo: float):
+        self._escribir = escribir
+        self._intervalo = intervalo
+        self._condicion = threading.Condition()
+        self._lock_escritura = threading.Lock()  # serializa el hilo y los flush() explícitos
+        self._detener = threading.Event()
+        self._sucio = False
+        self._solicitudes = 0
+        self._escrituras = 0
+        self._fallos = 0
+        self._latencia_total = 0.0
+        self._latencia_maxima = 0.0
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+
+    def marcar_sucio(self):
+        with self._condicion:
+            self._sucio = True
+            self._solicitudes += 1
+            self._condicion.notify()
+
+    def flush(self):
+        self._escribir_pendiente()
+
+    def cerrar(self):
+        self._detener.set()
+        with self._condicion:
+            self._condicion.notify()
+        self._hilo.join()
+        self._escribir_pendiente()
+
+    def metricas(self) -> Dict:
+        return {
+            'solicitudes': self._solicitudes,
+            'escrituras': self._escrituras,
+            'coalescidas': max(0, self._solicitudes - self._escrituras - self._pendientes()),
+            'fallos': self._fallos,
+            'latencia_promedio_ms': self._latencia_total * 1000 / self._escrituras if self._escrituras else 0.0,
+            'latencia_maxima_ms': self._latencia_maxima * 1000
+        }
+
+    def _pendientes(self) -> int:
+        return 1 if self._sucio else 0
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            with self._condicion:
+                self._condicion.wait_for(lambda: self._sucio or self._detener.is_set())
+            # Los cambios que lleguen durante la espera se escriben juntos
+            self._detener.wait(self._intervalo)
+            self._escribir_pendiente()
+
+    def _escribir_pendiente(self):
+        with self._lock_escritura:
+            with self._condicion:
+                if not self._sucio:
+                    return
+                self._sucio = False
+            inicio = time.perf_counter()
+            if not self._escribir():
+                self._fallos += 1
+                with self._condicion:
+                    self._sucio = True  # se reintenta en el próximo ciclo
+                return
+            latencia = time.perf_counter() - inicio
+            self._escrituras += 1
+            self._latencia_total += latencia
+            self._latencia_maxima = max(self._latencia_maxima, latencia)
+
+
+class Instrumentacion:
+    # Conteo e histograma de latencias por operación; con perfilar=True las operaciones del hilo que activó
+    # la instrumentación se ejecutan además bajo cProfile y se pueden volcar a un archivo pstats
+    LIMITES_MS = (0.01, 0.1, 1, 10, 100, 1000)  # cubetas: <= cada límite y una última para el resto
+
+    def __init__(self, perfilar: bool = False):
+        self._lock = threading.Lock()
+        self._operaciones: Dict[str, Dict] = {}
+        self._perfil = cProfile.Profile() if perfilar else None
+        self._hilo_perfil = threading.get_ident()
+        self._profundidad = 0  # llamadas instrumentadas anidadas en el hilo perfilado
+
+    @contextmanager
+    def medir(self, operacion: str):
+        perfilar = self._perfil is not None and threading.get_ident() == self._hilo_perfil
+        if perfilar:
+            if self._profundidad == 0:
+                self._perfil.enable()
+            self._profundidad += 1
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(operacion, time.perf_counter() - inicio)
+            if perfilar:
+                self._profundidad -= 1
+                if self._profundidad == 0:
+                    self._perfil.disable()
+
+    def registrar(self, operacion: str, segundos: float):
+        milisegundos = segundos * 1000
+        with self._lock:
+            datos = self._operaciones.get(operacion)
+            if datos is None:
+                datos = self._operaciones[operacion] = {
+                    'llamadas': 0, 'total_ms': 0.0, 'min_ms': milisegundos, 'max_ms': 0.0,
+                    'histograma': [0] * (len(self.LIMITES_MS) + 1)}
+            datos['llamadas'] += 1
+            datos['total_ms'] += milisegundos
+            datos['min_ms'] = min(datos['min_ms'], milisegundos)
+            datos['max_ms'] = max(datos['max_ms'], milisegundos)
+            datos['histograma'][bisect_left(self.LIMITES_MS, milisegundos)] += 1
+
+    def resumen(self) -> Dict[str, Dict]:
+        etiquetas = [f"<={limite}ms" for limite in self.LIMITES_MS] + [f">{self.LIMITES_MS[-1]}ms"]
+        with self._lock:
+            return {
+                operacion: {
+                    'llamadas': datos['llamadas'],
+                    'promedio_ms': datos['total_ms'] / datos['llamadas'],
+                    'min_ms': datos['min_ms'],
+                    'max_ms': datos['max_ms'],
+                    'total_ms': datos['total_ms'],
+                    'histograma': dict(zip(etiquetas, datos['histograma'])),
+                }
+                for operacion, datos in sorted(self._operaciones.items())
+            }
+
+    def volcar_json(self, ruta: str):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(self.resumen(), f, indent=2)
+
+    def guardar_perfil(self, ruta: str) -> bool:
+        # Archivo pstats: python -m pstats <ruta>
+        if self._perfil is None:
+            return False
+        self._perfil.dump_stats(ruta)
+        return True
+
+
+def _instrumentado(metodo):
+    # Mide el método si el inventario tiene instrumentación; sin ella solo cuesta una comprobación
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        if self._instrumentacion is None:
+            return metodo(self, *args, **kwargs)
+        with self._instrumentacion.medir(metodo.__name__):
+            return metodo(self, *args, **kwargs)
+    return envoltura
+
+
 class Inventario:
-    def __init__(self, archivo: str = "inventario.json"):
-        self._productos: Dict[str, Producto] = {}
+    # modo "json": cada cambio reescribe el archivo completo
+    # modo "journal": cada cambio se anexa a <archivo>.log y se compacta al pasar limite_journal bytes
+    # n_gram: longitud de los fragmentos del índice de búsqueda por nombre; el índice se construye de una pasada
+    # en la primera búsqueda que lo necesita, no registro a registro al cargar o importar
+    # almacen "dict": un objeto Producto por ID (registro crudo hasta el primer acceso); "columnar": columnas
+    # tipadas con menos memoria por producto. Ambos dan a cada producto una posición estable que usa el índice
+    # Un archivo .sqlite/.sqlite3/.db usa AlmacenSQLite: escrituras directas a la tabla, sin journal ni índices en memoria
+    # intervalo_guardado (modo json): segundos que un hilo en segundo plano agrupa cambios antes de escribir;
+    # lo pendiente se escribe en flush()/cerrar() (el menú lo activa con INTERVALO_GUARDADO_MENU)
+    # formato "binario": el snapshot se guarda con campos empaquetados en lugar de JSON (se detecta al cargar)
+    # Varios procesos pueden compartir el archivo: las escrituras toman BloqueoArchivo y, si otro proceso
+    # cambió la versión desde la última lectura, recargan el disco y reaplican los cambios propios encima
+    # instrumentar: mide cada operación pública y de persistencia (ver activar_instrumentacion)
+    # Cada producto puede tener un punto de reorden; bajo_reorden() lo resuelve con un índice por margen
+    # y al_cruzar_reorden() registra avisos que se disparan cuando un producto cruza el suyo
+    def __init__(self, archivo: str = "inventario.json", modo: str = "json", limite_journal: int = 1_000_000,
+                 n_gram: int = 3, almacen: str = "dict", intervalo_guardado: Optional[float] = None,
+                 formato: str = "json", instrumentar: bool = False):
+        if modo not in ("json", "journal"):
+            raise ValueError(f"Modo de almacenamiento desconocido: {modo}")
+        if n_gram < 1:
+            raise ValueError("n_gram debe ser mayor o igual a 1")
+        if almacen not in ("dict", "columnar"):
+            raise ValueError(f"Almacén desconocido: {almacen}")
+        if formato not in ("json", "binario"):
+            raise ValueError(f"Formato de snapshot desconocido: {formato}")
+        self._sql = archivo.lower().endswith(AlmacenSQLite.EXTENSIONES)
+        if self._sql and (modo != "json" or almacen != "dict"):
+            raise ValueError("El almacenamiento SQLite no admite modo journal ni almacén columnar")
+        self._productos: MutableMapping[str, Producto]
+        if self._sql:
+            self._productos = AlmacenSQLite(archivo)
+        else:
+            self._productos = AlmacenColumnar() if almacen == "columnar" else AlmacenPerezoso()
+        self._n_gram = n_gram
+        self._indice_nombres: Optional[IndiceNgramas] = None  # None hasta la primera búsqueda que lo use
+        # Agregados mantenidos en cada mutación para que estadisticas() no recorra el inventario
+        self._total_items = 0
+        self._suma_precios = 0.0
+        self._valor_acumulado = 0.0
+        self._ids_por_cantidad: Dict[int, Set[str]] = {}  # cantidad -> IDs (sin_stock y consultas por rango)
+        self._cantidades: List[int] = []  # claves de _ids_por_cantidad, ordenadas
+        # Margen (cantidad - punto_reorden) -> IDs, solo de los productos con punto de reorden
+        self._ids_por_margen: Dict[int, Set[str]] = {}
+        self._margenes: List[int] = []  # claves de _ids_por_margen, ordenadas
+        self._avisos_reorden: List[Callable[[Producto, bool], None]] = []
+        self._reorden_en_transaccion: Dict[str, bool] = {}  # ID -> si estaba bajo reorden al empezar
+        self._ids_ordenados = ListaOrdenada()  # para listar por ID sin ordenar en cada llamada
+        self._generacion = 0  # cambia con cada alta, baja o modificación (invalida copias como ConsultaParalela)
         self._archivo = archivo
+        self._modo = modo
+        self._formato = formato
+        self._journal = archivo + ".log"
+        self._limite_journal = limite_journal
+        self._lock = threading.RLock()
+        self._hilo_compactacion: Optional[threading.Thread] = None
+        self._pendientes: Optional[List[Dict]] = None  # registros de la transacción en curso
+        self._originales: Dict[str, Optional[Dict]] = {}
+        self._escritor: Optional[EscritorDiferido] = None
+        self._bloqueo: Optional[BloqueoArchivo] = None if self._sql else BloqueoArchivo(archivo)
+        self._version = 0  # versión del archivo que refleja el estado en memoria
+        self._sin_guardar: List[Dict] = []  # registros del modo json aún no escritos en el snapshot
+        self._firma_snapshot: Optional[tuple] = None  # (inodo, mtime) del snapshot cargado
+        self._journal_leido: Optional[tuple] = None  # (inodo, bytes ya aplicados) del journal activo
+        self._instrumentacion: Optional[Instrumentacion] = Instrumentacion() if instrumentar else None
         self._cargar()
+        if intervalo_guardado is not None and modo == "json" and not self._sql:
+            self._escritor = EscritorDiferido(self._escribir_estado, intervalo_guardado)
 
-    def agregar(self, id_prod: str, nombre: str, cantidad: int, precio: float) -> bool:
+    @_instrumentado
+    def agregar(self, id_prod: str, nombre: str, cantidad: int, precio: float, punto_reorden: int = 0) -> bool:
         id_prod = id_prod.strip().upper()
-        if id_prod in self._productos:
-            return False
-        self._productos[id_prod] = Producto(id_prod, nombre, cantidad, precio)
-        self._guardar()
-        return True
+        with self._lock:
+            if id_prod in self._productos:
+                return False
+            producto = Producto(id_prod, nombre, cantidad, precio, punto_reorden)
+            self._antes_de_modificar(id_prod)
+            self._poner(producto)
+            self._registrar({'op': 'set', 'producto': producto.to_dict()})
+            self._cruce_reorden(id_prod, False)
+            return True
 
+    @_instrumentado
     def eliminar(self, id_prod: str) -> bool:
         id_prod = id_prod.strip().upper()
-        if id_prod in self._productos:
-            del self._productos[id_prod]
-            self._guardar()
-            return True
-        return False
+        with self._lock:
+            if id_prod in self._productos:
+                self._antes_de_modificar(id_prod)
+                self._quitar(id_prod)
+                self._registrar({'op': 'del', 'id': id_prod})
+                return True
+            return False
 
+    @_instrumentado
     def actualizar_cantidad(self, id_prod: str, cantidad: int) -> bool:
-        producto = self.obtener(id_prod)
-        if producto:
-            producto.cantidad = max(0, int(cantidad))
-            self._guardar()
-            return True
-        return False
+        with self._lock:
+            producto = self.obtener(id_prod)
+            if producto:
+                cantidad = max(0, int(cantidad))
+                bajo_antes = producto.bajo_reorden()
+                self._antes_de_modificar(producto.id_producto)
+                self._acumular(producto.id_producto, producto.cantidad, producto.precio, -1, producto.punto_reorden)
+                producto.cantidad = cantidad
+                self._acumular(producto.id_producto, producto.cantidad, producto.precio, 1, producto.punto_reorden)
+                self._registrar({'op': 'set', 'producto': producto.to_dict()})
+                self._cruce_reorden(producto.id_producto, bajo_antes)
+                return True
+            return False
 
+    @_instrumentado
     def actualizar_precio(self, id_prod: str, precio: float) -> bool:
-        producto = self.obtener(id_prod)
-        if producto:
-            producto.precio = max(0.0, float(precio))
-            self._guardar()
-            return True
-        return False
+        with self._lock:
+            producto = self.obtener(id_prod)
+            if producto:
+                precio = max(0.0, float(precio))
+                self._antes_de_modificar(producto.id_producto)
+                self._acumular(producto.id_producto, producto.cantidad, producto.precio, -1, producto.punto_reorden)
+                producto.precio = precio
+                self._acumular(producto.id_producto, producto.cantidad, producto.precio, 1, producto.punto_reorden)
+                self._registrar({'op': 'set', 'producto': producto.to_dict()})
+                return True
+            return False
+
+    @_instrumentado
+    def actualizar_punto_reorden(self, id_prod: str, punto_reorden: int) -> bool:
+        with self._lock:
+            producto = self.obtener(id_prod)
+            if producto:
+                punto_reorden = max(0, int(punto_reorden))
+                bajo_antes = producto.bajo_reorden()
+                self._antes_de_modificar(producto.id_producto)
+                self._acumular(producto.id_producto, producto.cantidad, producto.precio, -1, producto.punto_reorden)
+                producto.punto_reorden = punto_reorden
+                self._acumular(producto.id_producto, producto.cantidad, producto.precio, 1, producto.punto_reorden)
+                self._registrar({'op': 'set', 'producto': producto.to_dict()})
+                self._cruce_reorden(producto.id_producto, bajo_antes)
+                return True
+            return False
 
     def obtener(self, id_prod: str) -> Optional[Producto]:
         return self._productos.get(id_prod.strip().upper())
 
+    @_instrumentado
     def buscar_por_nombre(self, nombre: str) -> List[Producto]:
+        if self._sql:
+            return self._productos.buscar_por_nombre(nombre)
         nombre = nombre.lower()
+        if len(nombre) < self._n_gram:
+            return self._buscar_secuencial(nombre)
+
+        # Solo se verifican los candidatos del índice; la verificación descarta también las entradas obsoletas
+        candidatos = self._indice().candidatos(self._ngramas(nombre))
+        productos = (self._productos[id_p] for id_p in sorted(filter(None, map(self._productos.id_en, candidatos))))
+        return [p for p in productos if nombre in p.nombre.lower()]
+
+    def _buscar_secuencial(self, nombre: str) -> List[Producto]:
         return [p for p in self._productos.values() if nombre in p.nombre.lower()]
 
     def listar_todos(self) -> List[Producto]:
-        return sorted(self._productos.values(), key=lambda p: p.id_producto)
+        if self._sql:
+            return self._productos.listar_todos()
+        return [self._productos[id_p] for id_p in self._ids_ordenados]
+
+    def listar_pagina(self, offset: int, limite: int) -> List[Producto]:
+        offset, limite = max(0, offset), max(0, limite)
+        if self._sql:
+            return self._productos.listar_pagina(offset, limite)
+        return [self._productos[id_p] for id_p in self._ids_ordenados.rebanada(offset, offset + limite)]
+
+    def listar_por_prefijo(self, prefijo: str, limite: Optional[int] = None) -> List[Producto]:
+        prefijo = prefijo.strip().upper()
+        if self._sql:
+            return self._productos.listar_por_prefijo(prefijo, -1 if limite is None else limite)
+        resultado = []
+        for id_p in self._ids_ordenados.desde(prefijo):
+            if not id_p.startswith(prefijo) or (limite is not None and len(resultado) >= limite):
+                break
+            resultado.append(self._productos[id_p])
+        return resultado
 
     def sin_stock(self) -> List[Producto]:
-        return [p for p in self._productos.values() if p.cantidad == 0]
+        if self._sql:
+            return self._productos.sin_stock()
+        return [self._productos[id_p] for id_p in sorted(self._ids_por_cantidad.get(0, ()))]
+
+    def bajo_reorden(self, holgura: int = 0) -> List[Producto]:
+        # Productos con cantidad < punto_reorden + holgura, del más urgente (menor margen) al menos urgente;
+        # holgura > 0 adelanta los que están a punto de cruzar. Solo se visitan las cubetas de margen < holgura
+        if self._sql:
+            return self._productos.bajo_reorden(holgura)
+        fin = bisect_left(self._margenes, holgura)
+        return [self._productos[id_p] for margen in self._margenes[:fin]
+                for id_p in sorted(self._ids_por_margen[margen])]
+
+    def al_cruzar_reorden(self, aviso: Callable[[Producto, bool], None]) -> Callable[[Producto, bool], None]:
+        # aviso(producto, bajo) se llama cuando un cambio de este proceso deja al producto bajo su punto de reorden
+        # (bajo=True) o lo repone por encima (bajo=False). Dentro de una transacción se avisa al confirmar y
+        # solo si el estado final difiere del inicial. Se ejecuta en el hilo que hizo el cambio
+        self._avisos_reorden.append(aviso)
+        return aviso
+
+    def quitar_aviso_reorden(self, aviso: Callable[[Producto, bool], None]):
+        if aviso in self._avisos_reorden:
+            self._avisos_reorden.remove(aviso)
+
+    def consulta(self) -> 'Consulta':
+        return Consulta(self)
 
     def valor_total(self) -> float:
-        return sum(p.valor_total() for p in self._productos.values())
+        if self._sql:
+            return self._productos.agregados()['valor_total']
+        return self._valor_acumulado
 
     def estadisticas(self) -> Dict:
-        productos = list(self._productos.values())
-        if not productos:
+        if self._sql:
+            agregados = self._productos.agregados()
+        else:
+            agregados = {'total_productos': len(self._productos), 'total_items': self._total_items,
+                         'valor_total': self._valor_acumulado, 'sin_stock': len(self._ids_por_cantidad.get(0, ())),
+                         'suma_precios': self._suma_precios}
+        total = agregados['total_productos']
+        if not total:
             return {'total_productos': 0, 'valor_total': 0.0, 'sin_stock': 0}
 
         return {
-            'total_productos': len(productos),
-            'total_items': sum(p.cantidad for p in productos),
-            'valor_total': self.valor_total(),
-            'sin_stock': len(self.sin_stock()),
-            'precio_promedio': sum(p.precio for p in productos) / len(productos)
+            'total_productos': total,
+            'total_items': agregados['total_items'],
+            'valor_total': agregados['valor_total'],
+            'sin_stock': agregados['sin_stock'],
+            'precio_promedio': agregados['suma_precios'] / total
         }
 
+    # === TRANSACCIONES ===
+    @contextmanager
+    def transaccion(self):
+        # Los cambios se aplican en memoria y se persisten una sola vez al confirmar;
+        # ante cualquier excepción se restaura el estado original de los productos tocados
+        with self._lock:
+            if self._pendientes is not None:
+                yield self  # transacción anidada: se une a la externa
+                return
+            self._pendientes = []
+            self._originales = {}
+            if self._sql:
+                self._productos.iniciar()
+            try:
+                yield self
+            except BaseException:
+                if self._sql:
+                    self._productos.revertir()
+                for id_prod, datos in self._originales.items():
+                    if datos is None:
+                        self._quitar(id_prod)
+                    else:
+                        self._poner(Producto.from_dict(datos))
+                raise
+            else:
+                if self._sql:
+                    self._productos.confirmar()
+                elif self._pendientes:
+                    if self._modo == "journal":
+                        self._anexar_journal(self._pendientes)
+                    else:
+                        self._sin_guardar.extend(self._pendientes)
+                        self._guardar()
+                cruces, self._reorden_en_transaccion = self._reorden_en_transaccion, {}
+                self._pendientes = None
+                for id_prod, bajo_antes in cruces.items():
+                    self._avisar_reorden(id_prod, bajo_antes)
+            finally:
+                self._pendientes = None
+                self._originales = {}
+                self._reorden_en_transaccion = {}
+
+    def aplicar_lote(self, operaciones: List[tuple]) -> bool:
+        # operaciones: [("agregar", id, nombre, cantidad, precio[, punto_reorden]), ("eliminar", id),
+        #               ("actualizar_cantidad", id, cantidad), ("actualizar_precio", id, precio),
+        #               ("actualizar_punto_reorden", id, punto_reorden)]
+        permitidas = ("agregar", "eliminar", "actualizar_cantidad", "actualizar_precio", "actualizar_punto_reorden")
+        try:
+            with self.transaccion():
+                for i, (nombre_op, *args) in enumerate(operaciones, 1):
+                    if nombre_op not in permitidas:
+                        raise ValueError(f"operación {i}: '{nombre_op}' no soportada")
+                    if not getattr(self, nombre_op)(*args):
+                        raise ValueError(f"operación {i}: {nombre_op} {args[0] if args else ''} falló")
+            return True
+        except (ValueError, TypeError) as e:
+            print(f"Lote revertido: {e}")
+            return False
+
+    # === IMPORTACIÓN / EXPORTACIÓN ===
+    def importar(self, ruta: str, tamano_bloque: int = 10_000, max_errores: int = 100) -> Dict:
+        # Lee el archivo en bloques de tamano_bloque filas; las filas inválidas o con ID ya existente se cuentan
+        # y se omiten sin abortar. Cada bloque se valida completo y se inserta de una vez; los índices se
+        # actualizan una sola vez al final. Todo va en una transacción: se persiste una sola vez al final y un
+        # error de lectura revierte lo importado. errores guarda como mucho max_errores pares (línea, motivo)
+        resultado = {'importados': 0, 'rechazados': 0, 'errores': []}
+        nuevos: List[str] = []
+        with self.transaccion():
+            self._indice_nombres = None  # se reconstruye de una pasada en la próxima búsqueda
+            try:
+                for bloque in _en_bloques(_leer_filas(ruta), tamano_bloque):
+                    validos: Dict[str, Producto] = {}
+                    for numero, fila in bloque:
+                        try:
+                            producto = _producto_desde_fila(fila)
+                            if producto.id_producto in validos or producto.id_producto in self._productos:
+                                raise ValueError(f"ID {producto.id_producto} ya existe")
+                        except ValueError as e:
+                            resultado['rechazados'] += 1
+                            if len(resultado['errores']) < max_errores:
+                                resultado['errores'].append((numero, str(e)))
+                            continue
+                        validos[producto.id_producto] = producto
+                    self._insertar_bloque(validos.values(), nuevos)
+                    resultado['importados'] += len(validos)
+            finally:
+                # También ante un error: la reversión de la transacción quita los productos por los índices
+                self._indexar_importados(nuevos)
+        return resultado
+
+    def _insertar_bloque(self, productos: Collection[Producto], nuevos: List[str]):
+        # Altas validadas (IDs nuevos) dentro de una transacción, sin tocar los índices: los IDs se anotan
+        # en nuevos y _indexar_importados los indexa al terminar la importación
+        if self._sql:
+            self._productos.agregar_muchos(productos)
+            nuevos.extend(producto.id_producto for producto in productos)
+            return
+        almacen, originales, pendientes = self._productos, self._originales, self._pendientes
+        for producto in productos:
+            id_prod = producto.id_producto
+            originales.setdefault(id_prod, None)
+            almacen[id_prod] = producto
+            nuevos.append(id_prod)
+            pendientes.append({'op': 'set', 'producto': producto.to_dict()})
+        if self._avisos_reorden:
+            for producto in productos:
+                self._cruce_reorden(producto.id_producto, False)
+
+    def _indexar_importados(self, nuevos: List[str]):
+        # Importación grande frente al inventario: se reconstruyen los índices de una pasada;
+        # si no, se indexa cada alta. Con SQLite la base ya tiene sus índices: solo cambia la generación
+        if not nuevos:
+            return
+        if self._sql:
+            self._generacion += 1
+            return
+        if len(nuevos) * 4 >= len(self._productos):
+            self._reconstruir_indices()
+            return
+        for id_prod in nuevos:
+            nombre, cantidad, precio, punto_reorden = self._productos.fila(id_prod)
+            self._indexar(id_prod, nombre, cantidad, precio, punto_reorden)
+
+    def exportar(self, ruta: str) -> int:
+        # Escribe producto a producto (CSV o JSON lines según la extensión) y devuelve cuántos se exportaron
+        if isinstance(self._productos, (AlmacenPerezoso, AlmacenSQLite)):
+            registros = (datos for _, datos in self._productos.registros())  # sin materializar Producto
+        else:
+            registros = (producto.to_dict() for producto in self._productos.values())
+        total = 0
+        with self._lock, open(ruta, 'w', encoding='utf-8', newline='') as f:
+            if _es_json_lines(ruta):
+                for datos in registros:
+                    f.write(json.dumps(datos, ensure_ascii=False) + '\n')
+                    total += 1
+            else:
+                escritor = csv.writer(f)
+                escritor.writerow(CAMPOS_PRODUCTO)
+                for datos in registros:
+                    escritor.writerow([datos.get(campo, 0) for campo in CAMPOS_PRODUCTO])
+                    total += 1
+        return total
+
+    def _antes_de_modificar(self, id_prod: str):
+        # Con SQLite el ROLLBACK de la base ya restaura el estado
+        if self._pendientes is not None and not self._sql and id_prod not in self._originales:
+            producto = self._productos.get(id_prod)
+            self._originales[id_prod] = producto.to_dict() if producto else None
+
+    # === ÍNDICES ===
+    # Toda alta, baja o reemplazo en _productos pasa por _poner/_quitar para mantener los índices
+    def _poner(self, producto: Producto):
+        if self._sql:
+            self._productos[producto.id_producto] = producto
+            return
+        anterior = self._productos.get(producto.id_producto)
+        if anterior is not None:
+            self._desindexar(anterior)
+        self._productos[producto.id_producto] = producto
+        self._indexar(producto.id_producto, producto.nombre, producto.cantidad, producto.precio,
+                      producto.punto_reorden)
+
+    def _quitar(self, id_prod: str):
+        if self._sql:
+            self._productos.pop(id_prod, None)
+            return
+        producto = self._productos.pop(id_prod, None)
+        if producto is not None:
+            self._desindexar(producto)
+            if not self._productos:
+                # Inventario vacío: se descarta el error de redondeo acumulado en las sumas
+                self._suma_precios = self._valor_acumulado = 0.0
+
+    # Recibe los campos sueltos para poder indexar registros crudos durante la carga sin crear el Producto
+    def _indexar(self, id_prod: str, nombre: str, cantidad: int, precio: float, punto_reorden: int = 0):
+        if self._indice_nombres is not None:
+            self._indice_nombres.agregar(self._productos.slot(id_prod), nombre)
+        self._ids_ordenados.agregar(id_prod)
+        self._acumular(id_prod, cantidad, precio, 1, punto_reorden)
+
+    def _desindexar(self, producto: Producto):
+        self._acumular(producto.id_producto, producto.cantidad, producto.precio, -1, producto.punto_reorden)
+        self._ids_ordenados.quitar(producto.id_producto)
+        if self._indice_nombres is not None:
+            self._indice_nombres.quitar(producto.nombre)
+            if self._indice_nombres.degradado():
+                self._indice_nombres = None
+
+    def _reconstruir_indices(self):
+        # Agregados, cubetas e IDs ordenados de una sola pasada sobre el almacén; el índice de n-gramas
+        # se construye con la primera búsqueda que lo necesite
+        ids: List[str] = []
+        total_items, suma_precios, valor_acumulado = 0, 0.0, 0.0
+        por_cantidad: Dict[int, Set[str]] = {}
+        por_margen: Dict[int, Set[str]] = {}
+        for id_prod, _, cantidad, precio, punto_reorden in self._productos.filas():
+            ids.append(id_prod)
+            total_items += cantidad
+            suma_precios += precio
+            valor_acumulado += cantidad * precio
+            cubeta = por_cantidad.get(cantidad)
+            if cubeta is None:
+                por_cantidad[cantidad] = {id_prod}
+            else:
+                cubeta.add(id_prod)
+            if punto_reorden > 0:
+                cubeta = por_margen.get(cantidad - punto_reorden)
+                if cubeta is None:
+                    por_margen[cantidad - punto_reorden] = {id_prod}
+                else:
+                    cubeta.add(id_prod)
+        self._ids_ordenados = ListaOrdenada(ids)
+        self._total_items, self._suma_precios, self._valor_acumulado = total_items, suma_precios, valor_acumulado
+        self._ids_por_cantidad, self._cantidades = por_cantidad, sorted(por_cantidad)
+        self._ids_por_margen, self._margenes = por_margen, sorted(por_margen)
+        self._indice_nombres = None
+        self._generacion += 1
+
+    def _indice(self) -> IndiceNgramas:
+        # Índice de n-gramas de los nombres, construido de una pasada la primera vez que se necesita
+        with self._lock:
+            if self._indice_nombres is None:
+                self._indice_nombres = IndiceNgramas(self._n_gram, self._productos.nombres())
+            return self._indice_nombres
+
+    def _acumular(self, id_prod: str, cantidad: int, precio: float, signo: int, punto_reorden: int = 0):
+        # signo 1 suma el producto a los agregados, -1 lo resta
+        self._generacion += 1
+        if self._sql:
+            return
+        self._total_items += signo * cantidad
+        self._suma_precios += signo * precio
+        self._valor_acumulado += signo * cantidad * precio
+        self._mover_en_cubeta(self._ids_por_cantidad, self._cantidades, cantidad, id_prod, signo)
+        if punto_reorden > 0:
+            self._mover_en_cubeta(self._ids_por_margen, self._margenes, cantidad - punto_reorden, id_prod, signo)
+
+    @staticmethod
+    def _mover_en_cubeta(cubetas: Dict[int, Set[str]], claves: List[int], clave: int, id_prod: str, signo: int):
+        # Índice por cubetas: clave -> IDs, con las claves en una lista ordenada para recorrer rangos con bisect
+        ids = cubetas.get(clave)
+        if signo > 0:
+            if ids is None:
+                ids = cubetas[clave] = set()
+                insort(claves, clave)
+            ids.add(id_prod)
+        elif ids is not None:
+            ids.discard(id_prod)
+            if not ids:
+                del cubetas[clave]
+                del claves[bisect_left(claves, clave)]
+
+    def _cruce_reorden(self, id_prod: str, bajo_antes: bool):
+        # Tras modificar id_prod; en una transacción se guarda el estado inicial y se avisa al confirmar
+        if not self._avisos_reorden:
+            return
+        if self._pendientes is not None:
+            self._reorden_en_transaccion.setdefault(id_prod, bajo_antes)
+        else:
+            self._avisar_reorden(id_prod, bajo_antes)
+
+    def _avisar_reorden(self, id_prod: str, bajo_antes: bool):
+        producto = self._productos.get(id_prod)
+        if producto is None or producto.bajo_reorden() == bajo_antes:
+            return
+        for aviso in list(self._avisos_reorden):
+            try:
+                aviso(producto, not bajo_antes)
+            except Exception as e:
+                print(f"Error en aviso de reorden: {e}")
+
+    def _ngramas(self, texto: str) -> Set[str]:
+        n = self._n_gram
+        return {texto[i:i + n] for i in range(len(texto) - n + 1)}
+
+    # === PERSISTENCIA ===
+    def _registrar(self, registro: Dict):
+        if self._sql:
+            return  # AlmacenSQLite ya escribió el cambio
+        if self._pendientes is not None:
+            self._pendientes.append(registro)
+        elif self._modo == "journal":
+            self._anexar_journal([registro])
+        else:
+            self._sin_guardar.append(registro)
+            self._guardar()
+
+    def _anexar_journal(self, registros: List[Dict]):
+        # Orden de locks en todo el inventario: primero self._lock, luego el del archivo
+        with self._lock, self._bloqueo.exclusivo() as bloqueo:
+            try:
+                if self._bloqueo.version(bloqueo) != self._version:
+                    self._sincronizar(registros)
+                with open(self._journal, 'a', encoding='utf-8') as f:
+                    f.write(''.join(json.dumps(r, separators=(',', ':')) + '\n' for r in registros))
+                    tamano = f.tell()
+                    self._journal_leido = (os.fstat(f.fileno()).st_ino, tamano)
+                self._version = self._bloqueo.incrementar(bloqueo)
+            except Exception as e:
+                print(f"Error al guardar: {e}")
+                return
+            if tamano > self._limite_journal and not self._compactando():
+                self._hilo_compactacion = threading.Thread(target=self.compactar, daemon=True)
+                self._hilo_compactacion.start()
+
+    def _compactando(self) -> bool:
+        return self._hilo_compactacion is not None and self._hilo_compactacion.is_alive()
+
+    def compactar(self):
+        # Bajo los locks solo se copia el estado y se rota el journal; el snapshot se escribe con ambos locks
+        # libres. Mientras tanto el disco sigue siendo coherente (snapshot anterior + rotado + journal nuevo) y
+        # las mutaciones siguen anexando al journal. El lock del archivo se vuelve a tomar solo para reemplazar
+        # el snapshot y borrar el rotado
+        rotado = self._journal + ".compactando"
+        with self._lock, self._bloqueo.exclusivo() as bloqueo:
+            if self._bloqueo.version(bloqueo) != self._version:
+                self._sincronizar()
+            datos = self._datos_snapshot()
+            if os.path.exists(self._journal):
+                if os.path.exists(rotado):
+                    # Una compactación anterior falló: se conservan sus registros
+                    with open(rotado, 'a', encoding='utf-8') as destino, \
+                            open(self._journal, 'r', encoding='utf-8') as origen:
+                        destino.write(origen.read())
+                    os.remove(self._journal)
+                else:
+                    os.replace(self._journal, rotado)
+            snapshot = self._firma(self._archivo)
+            journal_rotado = self._firma_rotado(rotado)
+
+        temporal = self._escribir_temporal(datos)
+        if temporal is None:
+            return  # el rotado se conserva y se reproduce en la próxima carga
+        with self._bloqueo.exclusivo() as bloqueo:
+            if self._firma_rotado(rotado) != journal_rotado:
+                os.remove(temporal)  # otra compactación tomó el rotado y su snapshot ya lo incluye
+                return
+            try:
+                if self._firma(self._archivo) == snapshot:
+                    os.replace(temporal, self._archivo)
+                else:
+                    # Otro proceso ya escribió un snapshot posterior, que incluye el rotado
+                    os.remove(temporal)
+                if journal_rotado is not None:
+                    os.remove(rotado)
+            except OSError as e:
+                print(f"Error al compactar: {e}")
+                if os.path.exists(temporal):
+                    os.remove(temporal)
+                return
+            # Si otro proceso escribió entre tanto, la memoria sigue sin sus cambios y debe sincronizarse
+            anterior = self._bloqueo.version(bloqueo)
+            nueva = self._bloqueo.incrementar(bloqueo)
+            if self._version == anterior:
+                self._version = nueva
+
+    @staticmethod
+    def _firma_rotado(ruta: str) -> Optional[tuple]:
+        # Otra compactación que anexe al rotado le cambia el tamaño; al terminar lo borra
+        try:
+            estado = os.stat(ruta)
+        except FileNotFoundError:
+            return None
+        return estado.st_ino, estado.st_size
+
+    def flush(self):
+        if self._escritor is not None:
+            self._escritor.flush()
+
+    def cerrar(self):
+        if self._escritor is not None:
+            self._escritor.cerrar()
+        if self._hilo_compactacion is not None:
+            self._hilo_compactacion.join()
+        if self._sql:
+            self._productos.cerrar()
+
+    def metricas_escritura(self) -> Dict:
+        if self._escritor is None:
+            return {}
+        return self._escritor.metricas()
+
+    # === INSTRUMENTACIÓN ===
+    def activar_instrumentacion(self, perfilar: bool = False) -> Instrumentacion:
+        # Empieza de cero; con perfilar=True las operaciones además se perfilan con cProfile
+        self._instrumentacion = Instrumentacion(perfilar)
+        return self._instrumentacion
+
+    def desactivar_instrumentacion(self):
+        self._instrumentacion = None
+
+    def metricas_operaciones(self) -> Dict[str, Dict]:
+        if self._instrumentacion is None:
+            return {}
+        return self._instrumentacion.resumen()
+
+    @_instrumentado
     def _guardar(self):
+        if self._escritor is not None:
+            self._escritor.marcar_sucio()
+        else:
+            self._escribir_estado()
+
+    @_instrumentado
+    def _escribir_estado(self) -> bool:
+        # La copia del estado se toma bajo el lock; la serialización y el disco quedan fuera.
+        # El lock del archivo cubre desde la comprobación de versión hasta el reemplazo del snapshot
+        with self._lock:
+            bloqueo = self._bloqueo.adquirir()
+            try:
+                if self._bloqueo.version(bloqueo) != self._version:
+                    self._sincronizar(self._sin_guardar)
+                datos = self._datos_snapshot()
+                escritos, self._sin_guardar = self._sin_guardar, []
+            except BaseException:
+                self._bloqueo.liberar(bloqueo)
+                raise
+        exito = False
+        try:
+            exito = self._escribir_snapshot(datos)
+            if exito:
+                self._version = self._bloqueo.incrementar(bloqueo)
+        finally:
+            self._bloqueo.liberar(bloqueo)
+        if not exito:
+            with self._lock:
+                self._sin_guardar[:0] = escritos  # se reaplican en el próximo guardado
+        return exito
+
+    def _datos_snapshot(self) -> Dict:
+        if isinstance(self._productos, AlmacenPerezoso):
+            return dict(self._productos.registros())  # sin materializar los productos aún no accedidos
+        return {id_p: p.to_dict() for id_p, p in self._productos.items()}
+
+    def _escribir_snapshot(self, datos: Dict) -> bool:
+        # Se escribe en un temporal del mismo directorio y se reemplaza atómicamente:
+        # un cierre inesperado deja el archivo anterior intacto, nunca uno truncado
+        temporal = self._escribir_temporal(datos)
+        if temporal is None:
+            return False
+        try:
+            os.replace(temporal, self._archivo)
+            return True
+        except OSError as e:
+            print(f"Error al guardar: {e}")
+            os.remove(temporal)
+            return False
+
+    def _escribir_temporal(self, datos: Dict) -> Optional[str]:
+        # Devuelve la ruta del temporal ya sincronizado en disco, o None si no se pudo escribir
+        directorio = os.path.dirname(self._archivo) or '.'
+        temporal = None
         try:
-            os.makedirs(os.path.dirname(self._archivo) if os.path.dirname(self._archivo) else '.', exist_ok=True)
-            with open(self._archivo, 'w', encoding='utf-8') as f:
-                json.dump({id_p: p.to_dict() for id_p, p in self._productos.items()}, f, indent=2)
+            os.makedirs(directorio, exist_ok=True)
+            descriptor, temporal = tempfile.mkstemp(prefix=os.path.basename(self._archivo) + ".", suffix=".tmp",
+                                                    dir=directorio)
+            if self._formato == "binario":
+                f = os.fdopen(descriptor, 'wb')
+                f.write(_serializar_binario(datos))
+            else:
+                f = os.fdopen(descriptor, 'w', encoding='utf-8')
+                _escribir_snapshot_json(f, datos)
+            with f:
+                f.flush()
+                os.fsync(f.fileno())
+            return temporal
         except Exception as e:
             print(f"Error al guardar: {e}")
+            if temporal is not None and os.path.exists(temporal):
+                os.remove(temporal)
+            return None
 
+    @_instrumentado
     def _cargar(self):
+        if self._sql:
+            return  # las consultas van directo a la base
+        with self._lock, self._bloqueo.compartido() as bloqueo:
+            self._version = self._bloqueo.version(bloqueo)
+            pendientes = self._cargar_datos()
+        if pendientes and self._modo == "json":
+            # En modo json el journal no se mantiene: se consolida en el snapshot
+            self.compactar()
+
+    def recargar_si_cambio(self) -> bool:
+        # Lectores: solo se vuelve a leer el disco si otro proceso escribió desde la última carga
+        if self._sql or self._bloqueo.version() == self._version:
+            return False
+        with self._lock:
+            if self._pendientes is not None:
+                return False  # no se descarta una transacción en curso
+            with self._bloqueo.compartido() as bloqueo:
+                version = self._bloqueo.version(bloqueo)
+                if version == self._version:
+                    return False
+                self._sincronizar(self._sin_guardar)
+                self._version = version
+        return True
+
+    def _sincronizar(self, propios: Iterable[Dict] = ()):
+        # Si el snapshot no cambió y el journal solo creció, basta con aplicar los registros nuevos de otros
+        # procesos; cualquier otro cambio (compactación, snapshot reescrito) obliga a recargar todo
+        propios = list(propios)
+        try:
+            estado = os.stat(self._journal)
+        except FileNotFoundError:
+            estado = None
+        if (estado is not None and self._firma(self._archivo) == self._firma_snapshot
+                and not os.path.exists(self._journal + ".compactando")
+                and (self._journal_leido is None
+                     or (estado.st_ino == self._journal_leido[0] and estado.st_size >= self._journal_leido[1]))):
+            desde = self._journal_leido[1] if self._journal_leido else 0
+            self._journal_leido = (estado.st_ino, self._reproducir_journal(self._journal, desde))
+            for registro in propios:
+                self._aplicar_registro(registro)
+        else:
+            self._recargar_desde_disco(propios)
+
+    @staticmethod
+    def _firma(ruta: str) -> Optional[tuple]:
+        try:
+            estado = os.stat(ruta)
+        except FileNotFoundError:
+            return None
+        return estado.st_ino, estado.st_mtime_ns
+
+    def _recargar_desde_disco(self, propios: Iterable[Dict] = ()):
+        # Estado del disco más los cambios locales aún no persistidos (gana el último escritor por producto)
+        propios = list(propios)
+        self._productos = AlmacenColumnar() if isinstance(self._productos, AlmacenColumnar) else AlmacenPerezoso()
+        self._indice_nombres = None
+        self._total_items = 0
+        self._suma_precios = 0.0
+        self._valor_acumulado = 0.0
+        self._ids_por_cantidad = {}
+        self._cantidades = []
+        self._ids_por_margen = {}
+        self._margenes = []
+        self._ids_ordenados = ListaOrdenada()
+        self._cargar_datos()
+        for registro in propios:
+            self._aplicar_registro(registro)
+
+    def _cargar_datos(self) -> List[str]:
+        self._firma_snapshot = self._firma(self._archivo)
+        self._journal_leido = None
         if os.path.exists(self._archivo):
+            # Carga en streaming: se guarda cada fila cruda (el Producto se crea al primer acceso) y los índices
+            # se construyen después de una pasada, no registro a registro
             try:
-                with open(self._archivo, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    for id_prod, prod_data in data.items():
-                        self._productos[id_prod] = Producto.from_dict(prod_data)
+                iterar = _iterar_snapshot_binario if formato_binario.es_binario(self._archivo) else _iterar_snapshot
+                self._productos.cargar_registros(iterar(self._archivo))
             except Exception as e:
                 print(f"Error al cargar: {e}")
+            self._reconstruir_indices()
+
+        # Replay del journal: primero el rotado por una compactación interrumpida, luego el activo
+        pendientes = [r for r in (self._journal + ".compactando", self._journal) if os.path.exists(r)]
+        for ruta in pendientes:
+            fin = self._reproducir_journal(ruta)
+            if ruta == self._journal:
+                self._journal_leido = (os.stat(ruta).st_ino, fin)
+        return pendientes
+
+    def _reproducir_journal(self, ruta: str, desde: int = 0) -> int:
+        # Devuelve la posición en bytes hasta la que se aplicó el journal
+        try:
+            with open(ruta, 'rb') as f:
+                f.seek(desde)
+                for linea in f:
+                    try:
+                        registro = json.loads(linea)
+                    except json.JSONDecodeError:
+                        continue  # línea truncada por un cierre inesperado
+                    self._aplicar_registro(registro)
+                return f.tell()
+        except Exception as e:
+            print(f"Error al cargar journal: {e}")
+            return desde
+
+    def _aplicar_registro(self, registro: Dict):
+        if registro['op'] == 'set':
+            self._poner(Producto.from_dict(registro['producto']))
+        elif registro['op'] == 'del':
+            self._quitar(registro['id'])
+
+
+class InventarioSharded:
+    # Reparte los productos entre varios Inventario, cada uno con su propio archivo en directorio:
+    # particion "hash": shards fijos, el shard sale del crc32 del ID (estable entre procesos, a diferencia de hash())
+    # particion "prefijo": un shard por almacén, tomado del ID hasta el primer separador ("QUITO-001" -> QUITO)
+    # Las escrituras tocan solo el shard del producto; búsquedas y estadísticas consultan todos en paralelo.
+    # extension ".sqlite" guarda cada shard en SQLite; el resto de opciones (modo, formato...) van a cada Inventario
+    MANIFIESTO = "shards.json"
+    SIN_ALMACEN = "GENERAL"  # shard de los IDs sin separador en la partición por prefijo
+
+    def __init__(self, directorio: str = "inventario_shards", shards: int = 4, particion: str = "hash",
+                 separador: str = "-", extension: str = ".json", hilos: Optional[int] = None, **opciones):
+        if particion not in ("hash", "prefijo"):
+            raise ValueError(f"Partición desconocida: {particion}")
+        if particion == "hash" and shards < 1:
+            raise ValueError("shards debe ser mayor o igual a 1")
+        self._directorio = directorio
+        self._particion = particion
+        self._separador = separador
+        self._opciones = opciones
+        self._extension = extension
+        self._lock = threading.Lock()  # protege la creación de shards nuevos
+        self._avisos_reorden: List[Callable[[Producto, bool], None]] = []  # también para los shards creados después
+        os.makedirs(directorio, exist_ok=True)
+        self._num_shards = self._leer_manifiesto(shards)
+        self._shards: Dict[str, Inventario] = {}
+        if particion == "hash":
+            for numero in range(self._num_shards):
+                self._abrir_shard(f"shard_{numero:03d}")
+        else:
+            # Un shard puede existir solo como journal (.json.log, .lock) hasta su primera compactación:
+            # cuenta cualquier archivo almacen_X<extension>[...]; X no lleva puntos (ver _nombre_shard)
+            encontrados = set()
+            for nombre in os.listdir(directorio):
+                base, separador, _ = nombre.partition(extension)
+                if separador and base.startswith("almacen_") and "." not in base:
+                    encontrados.add(base)
+            for base in sorted(encontrados):
+                self._abrir_shard(base)
+        self._pool = ThreadPoolExecutor(max_workers=hilos or min(32, max(1, len(self._shards)) + 4))
+
+    def _leer_manifiesto(self, shards: int) -> int:
+        # Cambiar la partición o el número de shards reubicaría los productos: se rechaza en lugar de perderlos
+        ruta = os.path.join(self._directorio, self.MANIFIESTO)
+        esperado = {'particion': self._particion, 'shards': shards if self._particion == "hash" else None,
+                    'separador': self._separador, 'extension': self._extension}
+        if os.path.exists(ruta):
+            with open(ruta, 'r', encoding='utf-8') as f:
+                existente = json.load(f)
+            if existente != esperado:
+                raise ValueError(f"El directorio {self._directorio} ya usa otra partición: {existente}")
+        else:
+            with open(ruta, 'w', encoding='utf-8') as f:
+                json.dump(esperado, f, indent=2)
+        return shards
+
+    def _abrir_shard(self, nombre: str) -> Inventario:
+        inventario = Inventario(os.path.join(self._directorio, nombre + self._extension), **self._opciones)
+        for aviso in self._avisos_reorden:
+            inventario.al_cruzar_reorden(aviso)
+        self._shards[nombre] = inventario
+        return inventario
+
+    def _nombre_shard(self, id_prod: str) -> str:
+        if self._particion == "hash":
+            return f"shard_{zlib.crc32(id_prod.encode('utf-8')) % self._num_shards:03d}"
+        prefijo = id_prod.split(self._separador, 1)[0] if self._separador in id_prod else self.SIN_ALMACEN
+        return "almacen_" + (re.sub(r'[^A-Z0-9_]', '_', prefijo) or self.SIN_ALMACEN)
+
+    def _shard(self, id_prod: str, crear: bool = False) -> Optional[Inventario]:
+        nombre = self._nombre_shard(id_prod.strip().upper())
+        inventario = self._shards.get(nombre)
+        if inventario is None and crear:
+            with self._lock:
+                inventario = self._shards.get(nombre) or self._abrir_shard(nombre)
+        return inventario
+
+    def _en_todos(self, funcion: Callable[[Inventario], object]) -> List:
+        shards = list(self._shards.values())
+        if len(shards) <= 1:
+            return [funcion(inventario) for inventario in shards]
+        return list(self._pool.map(funcion, shards))
+
+    @staticmethod
+    def _fusionar(listas: Iterable[List[Producto]]) -> List[Producto]:
+        return sorted((producto for lista in listas for producto in lista), key=lambda p: p.id_producto)
+
+    # === ESCRITURAS: solo el shard del producto ===
+    def agregar(self, id_prod: str, nombre: str, cantidad: int, precio: float, punto_reorden: int = 0) -> bool:
+        return self._shard(id_prod, crear=True).agregar(id_prod, nombre, cantidad, precio, punto_reorden)
+
+    def eliminar(self, id_prod: str) -> bool:
+        inventario = self._shard(id_prod)
+        return inventario is not None and inventario.eliminar(id_prod)
+
+    def actualizar_cantidad(self, id_prod: str, cantidad: int) -> bool:
+        inventario = self._shard(id_prod)
+        return inventario is not None and inventario.actualizar_cantidad(id_prod, cantidad)
+
+    def actualizar_precio(self, id_prod: str, precio: float) -> bool:
+        inventario = self._shard(id_prod)
+        return inventario is not None and inventario.actualizar_precio(id_prod, precio)
+
+    def actualizar_punto_reorden(self, id_prod: str, punto_reorden: int) -> bool:
+        inventario = self._shard(id_prod)
+        return inventario is not None and inventario.actualizar_punto_reorden(id_prod, punto_reorden)
+
+    def al_cruzar_reorden(self, aviso: Callable[[Producto, bool], None]) -> Callable[[Producto, bool], None]:
+        with self._lock:
+            self._avisos_reorden.append(aviso)
+            for inventario in self._shards.values():
+                inventario.al_cruzar_reorden(aviso)
+        return aviso
+
+    def quitar_aviso_reorden(self, aviso: Callable[[Producto, bool], None]):
+        with self._lock:
+            if aviso in self._avisos_reorden:
+                self._avisos_reorden.remove(aviso)
+            for inventario in self._shards.values():
+                inventario.quitar_aviso_reorden(aviso)
+
+    def obtener(self, id_prod: str) -> Optional[Producto]:
+        inventario = self._shard(id_prod)
+        return inventario.obtener(id_prod) if inventario is not None else None
+
+    # === CONSULTAS: todos los shards en paralelo ===
+    def buscar_por_nombre(self, nombre: str) -> List[Producto]:
+        return self._fusionar(self._en_todos(lambda inventario: inventario.buscar_por_nombre(nombre)))
+
+    def listar_todos(self) -> List[Producto]:
+        return self._fusionar(self._en_todos(Inventario.listar_todos))
+
+    def sin_stock(self) -> List[Producto]:
+        return self._fusionar(self._en_todos(Inventario.sin_stock))
+
+    def bajo_reorden(self, holgura: int = 0) -> List[Producto]:
+        # Cada shard ya entrega su lista por urgencia: se intercalan sin reordenar todo
+        listas = self._en_todos(lambda inventario: inventario.bajo_reorden(holgura))
+        return list(heapq.merge(*listas, key=lambda p: (p.cantidad - p.punto_reorden, p.id_producto)))
+
+    def consulta(self) -> 'Consulta':
+        return Consulta(self)
+
+    def valor_total(self) -> float:
+        return sum(self._en_todos(Inventario.valor_total))
+
+    def estadisticas(self) -> Dict:
+        parciales = [e for e in self._en_todos(Inventario.estadisticas) if e['total_productos']]
+        total = sum(e['total_productos'] for e in parciales)
+        if not total:
+            return {'total_productos': 0, 'valor_total': 0.0, 'sin_stock': 0}
+        return {
+            'total_productos': total,
+            'total_items': sum(e['total_items'] for e in parciales),
+            'valor_total': sum(e['valor_total'] for e in parciales),
+            'sin_stock': sum(e['sin_stock'] for e in parciales),
+            'precio_promedio': sum(e['precio_promedio'] * e['total_productos'] for e in parciales) / total
+        }
+
+    def estadisticas_por_shard(self) -> Dict[str, Dict]:
+        nombres = list(self._shards)
+        return dict(zip(nombres, self._en_todos(Inventario.estadisticas)))
+
+    def recargar_si_cambio(self) -> bool:
+        return any(self._en_todos(Inventario.recargar_si_cambio))
+
+    def flush(self):
+        self._en_todos(Inventario.flush)
+
+    def cerrar(self):
+        self._en_todos(Inventario.cerrar)
+        self._pool.shutdown()
+
+
+# === CONSULTAS COMPUESTAS ===
+# inventario.consulta().donde(cantidad__lt=5, nombre__contiene="usb").ordenar("precio").limite(50)
+# Condiciones campo__operador=valor (sin operador: igualdad); nombre se compara sin distinguir mayúsculas
+CAMPOS_CONSULTA = {'id': 'id_producto', 'id_producto': 'id_producto', 'nombre': 'nombre', 'cantidad': 'cantidad',
+                   'precio': 'precio'}
+_POSICION_CAMPO = {'id_producto': 0, 'nombre': 1, 'cantidad': 2, 'precio': 3}  # dentro de cada fila (id, nombre...)
+_OPERADORES_CONSULTA = {
+    'eq': operator.eq, 'ne': operator.ne, 'lt': operator.lt, 'le': operator.le, 'gt': operator.gt,
+    'ge': operator.ge,
+    'en': lambda valor, opciones: valor in opciones,
+    'contiene': lambda valor, texto: texto in valor,
+    'prefijo': lambda valor, prefijo: valor.startswith(prefijo),
+}
+
+
+class Consulta:
+    # Consulta inmutable sobre un Inventario o InventarioSharded: donde/ordenar/limite devuelven una copia,
+    # así una consulta base se reutiliza en varios reportes. Se planifica y ejecuta al recorrerla:
+    # el planificador toma el índice más selectivo (ID, n-gramas del nombre, cubetas de cantidad) o recorre
+    # por ID, y el resto de condiciones se evalúa en la misma pasada sobre los registros crudos.
+    # Con SQLite la consulta completa se traduce a un SELECT. Sin ordenar (o por ID) los productos salen
+    # uno a uno y el recorrido se detiene al llegar al límite; con otro orden y límite se usa un heap de tamaño límite
+    def __init__(self, inventario, condiciones: tuple = (), orden: Optional[str] = None, descendente: bool = False,
+                 limite: Optional[int] = None):
+        self._inventario = inventario
+        self._condiciones = condiciones
+        self._orden = orden
+        self._descendente = descendente
+        self._limite = limite
+
+    def _copia(self, **cambios) -> 'Consulta':
+        estado = {'condiciones': self._condiciones, 'orden': self._orden, 'descendente': self._descendente,
+                  'limite': self._limite}
+        estado.update(cambios)
+        return Consulta(self._inventario, **estado)
+
+    def donde(self, **condiciones) -> 'Consulta':
+        nuevas = list(self._condiciones)
+        for clave, valor in condiciones.items():
+            nombre_campo, _, operador = clave.partition('__')
+            operador = operador or 'eq'
+            if nombre_campo not in CAMPOS_CONSULTA:
+                raise ValueError(f"Campo de consulta desconocido: {nombre_campo}")
+            if operador not in _OPERADORES_CONSULTA:
+                raise ValueError(f"Operador de consulta desconocido: {operador}")
+            campo = CAMPOS_CONSULTA[nombre_campo]
+            if operador in ('contiene', 'prefijo') and campo not in ('id_producto', 'nombre'):
+                raise ValueError(f"El operador {operador} solo se aplica a id y nombre")
+            if operador == 'en':
+                valor = frozenset(self._normalizar(campo, v) for v in valor)
+            else:
+                valor = self._normalizar(campo, valor, recortar=operador != 'contiene')
+            nuevas.append((campo, operador, valor))
+        return self._copia(condiciones=tuple(nuevas))
+
+    @staticmethod
+    def _normalizar(campo: str, valor, recortar: bool = True):
+        # Los valores se llevan a la forma en que Producto guarda cada campo
+        if campo == 'id_producto':
+            return str(valor).strip().upper() if recortar else str(valor).upper()
+        if campo == 'nombre':
+            return str(valor).strip().lower() if recortar else str(valor).lower()
+        return float(valor)
+
+    def ordenar(self, campo: str, descendente: bool = False) -> 'Consulta':
+        if campo not in CAMPOS_CONSULTA:
+            raise ValueError(f"Campo de orden desconocido: {campo}")
+        return self._copia(orden=CAMPOS_CONSULTA[campo], descendente=descendente)
+
+    def limite(self, cantidad: Optional[int]) -> 'Consulta':
+        if cantidad is not None and cantidad < 0:
+            raise ValueError("El límite no puede ser negativo")
+        return self._copia(limite=cantidad)
+
+    # === RESULTADOS ===
+    def __iter__(self) -> Iterator[Producto]:
+        if not isinstance(self._inventario, InventarioSharded):
+            return self._ejecutar(self._inventario)
+        return self._fusionar_shards()
+
+    def lista(self) -> List[Producto]:
+        return list(self)
+
+    def primero(self) -> Optional[Producto]:
+        return next(iter(self.limite(1)), None)
+
+    def contar(self) -> int:
+        return sum(1 for _ in self)
+
+    def explicar(self) -> str:
+        # Plan elegido, sin ejecutar la consulta
+        if isinstance(self._inventario, InventarioSharded):
+            shards = list(self._inventario._shards.items())
+            return "\n".join(f"{nombre}: {self._describir(inventario)}" for nombre, inventario in shards)
+        return self._describir(self._inventario)
+
+    # === PLANIFICACIÓN ===
+    def _streaming(self) -> bool:
+        # Sin orden (o por ID ascendente) se entrega en el orden del recorrido y se corta en el límite
+        return self._orden in (None, 'id_producto') and not self._descendente
+
+    def _clave(self, fila: tuple) -> tuple:
+        orden = self._orden or 'id_producto'
+        valor = fila[_POSICION_CAMPO[orden]]
+        return (valor.lower() if orden == 'nombre' else valor), fila[0]
+
+    def _candidatos(self, inventario: Inventario) -> tuple:
+        # (estimación de candidatos, descripción, función que devuelve los IDs, si salen ordenados por ID);
+        # el recorrido completo no tiene función: se lee directo del almacén
+        planes = [(len(inventario._productos), "recorrido completo", None, True)]
+        inicio, tope = None, None  # rango de IDs: [inicio, tope)
+        n = inventario._n_gram
+        ngramas: Set[str] = set()
+        cantidad_min, cantidad_max, cantidades_en = None, None, None
+        for campo, operador, valor in self._condiciones:
+            if campo == 'id_producto':
+                if operador in ('eq', 'en'):
+                    ids = sorted({valor} if operador == 'eq' else valor)
+                    planes.append((len(ids), "índice de ID", lambda ids=ids: iter(ids), True))
+                elif operador in ('ge', 'gt', 'prefijo'):
+                    desde = valor + '\0' if operador == 'gt' else valor
+                    inicio = desde if inicio is None else max(inicio, desde)
+                if operador in ('lt', 'le') or (operador == 'prefijo' and valor):
+                    hasta = valor + '\0' if operador == 'le' else valor
+                    if operador == 'prefijo':
+                        hasta = valor[:-1] + chr(ord(valor[-1]) + 1)
+                    tope = hasta if tope is None else min(tope, hasta)
+            elif campo == 'nombre' and operador in ('eq', 'contiene', 'prefijo') and len(valor) >= n:
+                ngramas |= inventario._ngramas(valor)
+            elif campo == 'cantidad':
+                if operador == 'eq':
+                    cantidades_en = {valor} if cantidades_en is None else cantidades_en & {valor}
+                elif operador == 'en':
+                    cantidades_en = set(valor) if cantidades_en is None else cantidades_en & valor
+                elif operador in ('ge', 'gt'):
+                    cantidad_min = valor if cantidad_min is None else max(cantidad_min, valor)
+                elif operador in ('le', 'lt'):
+                    cantidad_max = valor if cantidad_max is None else min(cantidad_max, valor)
+
+        if inicio is not None or tope is not None:
+            ordenados = inventario._ids_ordenados
+            estimado = ((ordenados.posicion(tope) if tope is not None else len(ordenados))
+                        - (ordenados.posicion(inicio) if inicio is not None else 0))
+            planes.append((max(0, estimado), "rango de IDs", lambda: self._rango_ids(ordenados, inicio, tope), True))
+        if ngramas:
+            indice, id_en = inventario._indice(), inventario._productos.id_en
+            planes.append((indice.estimar(ngramas), "índice de n-gramas del nombre",
+                           lambda: filter(None, map(id_en, indice.candidatos(ngramas))), False))
+        if cantidades_en is not None or cantidad_min is not None or cantidad_max is not None:
+            claves = inventario._cantidades
+            desde = 0 if cantidad_min is None else bisect_left(claves, cantidad_min)
+            hasta = len(claves) if cantidad_max is None else bisect_right(claves, cantidad_max)
+            cubetas = [inventario._ids_por_cantidad[c] for c in claves[desde:hasta]
+                       if cantidades_en is None or c in cantidades_en]
+            planes.append((sum(len(ids) for ids in cubetas), "cubetas de cantidad",
+                           lambda: (id_p for ids in cubetas for id_p in list(ids)), False))
+        # El de menos candidatos; a igualdad, el que ya sale ordenado por ID
+        return min(planes, key=lambda plan: (plan[0], not plan[3]))
+
+    @staticmethod
+    def _rango_ids(ordenados: ListaOrdenada, inicio: Optional[str], tope: Optional[str]) -> Iterator[str]:
+        for id_p in ordenados.desde(inicio or ''):
+            if tope is not None and id_p >= tope:
+                return
+            yield id_p
+
+    def _describir(self, inventario: Inventario) -> str:
+        if inventario._sql:
+            sql, parametros = inventario._productos.sql_consulta(self._condiciones, self._orden, self._descendente,
+                                                                  self._limite)
+            return f"SQLite: {sql} | " + "; ".join(inventario._productos.plan_consulta(sql, parametros))
+        estimado, descripcion, _, por_id = self._candidatos(inventario)
+        partes = [f"{descripcion} (≤ {estimado} candidatos)"]
+        if self._condiciones:
+            partes.append(f"filtro de {len(self._condiciones)} condición(es) en la misma pasada")
+        if self._streaming():
+            if not por_id:
+                partes.append("orden por ID de los candidatos")
+            if self._limite is not None:
+                partes.append(f"corte en {self._limite}")
+        else:
+            sentido = "descendente" if self._descendente else "ascendente"
+            metodo = f"heap de {self._limite}" if self._limite is not None else "ordenamiento completo"
+            partes.append(f"orden {sentido} por {self._orden or 'id_producto'} ({metodo})")
+        return " -> ".join(partes)
+
+    # === EJECUCIÓN ===
+    def _ejecutar(self, inventario: Inventario) -> Iterator[Producto]:
+        productos = inventario._productos
+        if inventario._sql:
+            yield from productos.consultar(self._condiciones, self._orden, self._descendente, self._limite)
+            return
+        _, _, ids, por_id = self._candidatos(inventario)
+        if ids is None:
+            filas = (self._filas(productos, iter(inventario._ids_ordenados)) if self._streaming()
+                     else self._todas_las_filas(productos))
+        else:
+            ids = ids()
+            filas = self._filas(productos, sorted(ids) if self._streaming() and not por_id else ids)
+        cumple = self._condicion()
+        if cumple is not None:
+            filas = filter(cumple, filas)
+        if self._streaming():
+            filas = islice(filas, self._limite)
+        elif self._limite is not None:
+            seleccionar = heapq.nlargest if self._descendente else heapq.nsmallest
+            filas = seleccionar(self._limite, filas, key=self._clave)
+        else:
+            filas = sorted(filas, key=self._clave, reverse=self._descendente)
+        for fila in filas:
+            producto = productos.get(fila[0])
+            if producto is not None:  # eliminado mientras se recorría
+                yield producto
+
+    def _condicion(self) -> Optional[Callable[[tuple], bool]]:
+        # Todas las condiciones en una sola función sobre la fila; nombre se compara en minúsculas
+        pruebas = []
+        for campo, operador, valor in self._condiciones:
+            comparar = _OPERADORES_CONSULTA[operador]
+            if campo == 'nombre':
+                pruebas.append(lambda fila, comparar=comparar, valor=valor: comparar(fila[1].lower(), valor))
+            else:
+                posicion = _POSICION_CAMPO[campo]
+                pruebas.append(lambda fila, posicion=posicion, comparar=comparar, valor=valor:
+                               comparar(fila[posicion], valor))
+        if len(pruebas) <= 1:
+            return pruebas[0] if pruebas else None
+        return lambda fila: all(prueba(fila) for prueba in pruebas)
+
+    @staticmethod
+    def _filas(productos: MutableMapping, ids: Iterable[str]) -> Iterator[tuple]:
+        # Filas (id, nombre, cantidad, precio); en los almacenes en memoria se leen las filas crudas,
+        # sin crear los Producto ni las vistas que el filtro va a descartar
+        if isinstance(productos, _AlmacenPorPosiciones):
+            for id_p in ids:
+                try:
+                    yield (id_p,) + productos.fila(id_p)[:3]
+                except KeyError:
+                    continue
+        else:
+            campos = operator.attrgetter('id_producto', 'nombre', 'cantidad', 'precio')
+            for id_p in ids:
+                producto = productos.get(id_p)
+                if producto is not None:
+                    yield campos(producto)
+
+    @staticmethod
+    def _todas_las_filas(productos: MutableMapping) -> Iterator[tuple]:
+        # Recorrido en el orden del almacén, sin buscar cada ID
+        if isinstance(productos, _AlmacenPorPosiciones):
+            return (fila[:4] for fila in productos.filas())
+        return map(operator.attrgetter('id_producto', 'nombre', 'cantidad', 'precio'), productos.values())
+
+    def _fusionar_shards(self) -> Iterator[Producto]:
+        # Cada shard entrega su parte ya ordenada y limitada; heapq.merge las combina en un solo recorrido
+        inventarios = list(self._inventario._shards.values())
+        if self._streaming():
+            partes = [self._ejecutar(inventario) for inventario in inventarios]
+        else:
+            partes = self._inventario._en_todos(lambda inventario: list(self._ejecutar(inventario)))
+        orden = self._orden or 'id_producto'
+
+        def clave(producto: Producto) -> tuple:
+            valor = getattr(producto, orden)
+            return (valor.lower() if orden == 'nombre' else valor), producto.id_producto
+
+        return islice(heapq.merge(*partes, key=clave, reverse=self._descendente), self._limite)
+
+
+# === CONSULTAS EN PARALELO ===
+# Las columnas numéricas y los nombres viven en memoria compartida: los procesos reciben solo los nombres
+# de los segmentos y un rango de posiciones, nunca los productos serializados
+_segmentos_adjuntos: Dict[tuple, List[shared_memory.SharedMemory]] = {}
+
+
+def _adjuntar(nombres: tuple) -> List[memoryview]:
+    # Cada proceso conserva abiertos solo los segmentos de la copia más reciente
+    if nombres not in _segmentos_adjuntos:
+        for segmento in _segmentos_adjuntos.pop(next(iter(_segmentos_adjuntos), None), []):
+            segmento.close()
+        # Los trabajadores comparten el resource_tracker del proceso principal, que es quien los borra
+        _segmentos_adjuntos[nombres] = [shared_memory.SharedMemory(name=nombre) for nombre in nombres]
+    cantidades, precios, offsets, texto = _segmentos_adjuntos[nombres]
+    return [cantidades.buf.cast('q'), precios.buf.cast('d'), offsets.buf.cast('Q'), texto.buf]
+
+
+def _filtrar_bloque(nombres: tuple, inicio: int, fin: int, criterios: Dict) -> List[int]:
+    # Posiciones en [inicio, fin) que cumplen todos los criterios, en orden
+    cantidades, precios, offsets, texto = _adjuntar(nombres)
+    if criterios['nombre'] is not None:
+        # Búsqueda de la subcadena sobre los bytes del bloque; cada coincidencia se ubica en su nombre con bisect
+        consulta = criterios['nombre'].encode('utf-8')
+        desde = offsets[inicio]
+        bloque = bytes(texto[desde:offsets[fin]])
+        offsets_bloque = offsets[inicio:fin + 1].tolist()
+        posiciones, pos = [], bloque.find(consulta)
+        while pos != -1:
+            i = bisect_right(offsets_bloque, desde + pos) - 1
+            posiciones.append(inicio + i)
+            pos = bloque.find(consulta, offsets_bloque[i + 1] - desde)
+    else:
+        posiciones = range(inicio, fin)
+    for columna, minimo, maximo in ((cantidades, criterios['cantidad_min'], criterios['cantidad_max']),
+                                    (precios, criterios['precio_min'], criterios['precio_max'])):
+        if minimo is not None:
+            posiciones = [i for i in posiciones if columna[i] >= minimo]
+        if maximo is not None:
+            posiciones = [i for i in posiciones if columna[i] <= maximo]
+    return list(posiciones)
+
+
+def _agregar_bloque(nombres: tuple, inicio: int, fin: int, criterios: Dict) -> tuple:
+    # (productos, items, valor, sin stock, suma de precios) de las posiciones de [inicio, fin) que cumplen criterios
+    cantidades, precios, _, _ = _adjuntar(nombres)
+    if any(valor is not None for valor in criterios.values()):
+        posiciones = _filtrar_bloque(nombres, inicio, fin, criterios)
+        cant = [cantidades[i] for i in posiciones]
+        prec = [precios[i] for i in posiciones]
+    else:
+        cant = cantidades[inicio:fin].tolist()
+        prec = precios[inicio:fin].tolist()
+    return len(cant), sum(cant), sum(c * p for c, p in zip(cant, prec)), cant.count(0), sum(prec)
+
+
+class ConsultaParalela:
+    # Filtros y agregados de un Inventario repartidos en bloques entre procesos (ProcessPoolExecutor).
+    # Trabaja sobre una copia columnar en memoria compartida, ordenada por ID. Cuando el inventario cambia la
+    # copia se reconstruye en un hilo y, mientras tanto, las consultas se resuelven en serie: una escritura
+    # nunca hace esperar a la consulta siguiente. Lo que el Inventario ya resuelve con índices (búsqueda por
+    # n-gramas, sin_stock, estadisticas sin filtros) se le delega; también todo por debajo de umbral
+    # productos, con SQLite o en una máquina de un solo CPU, donde el pool solo suma el costo de repartir
+    def __init__(self, inventario: Inventario, procesos: Optional[int] = None, umbral: int = 200_000,
+                 bloques_por_proceso: int = 4):
+        self._inventario = inventario
+        self._procesos = procesos or os.cpu_count() or 1
+        self._paralelo = (os.cpu_count() or 1) > 1 and self._procesos > 1
+        self._umbral = umbral
+        self._bloques_por_proceso = bloques_por_proceso
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # La copia (_segmentos, _ids, _generacion) se reemplaza bajo _lock_copia; una consulta en curso
+        # lo mantiene para que el hilo no borre los segmentos que están leyendo los procesos
+        self._lock_copia = threading.Lock()
+        self._hilo_copia: Optional[threading.Thread] = None
+        self._segmentos: List[shared_memory.SharedMemory] = []
+        self._ids: List[str] = []
+        self._generacion: Optional[int] = None
+
+    def _serial(self) -> bool:
+        return not self._paralelo or self._inventario._sql or len(self._inventario._productos) < self._umbral
+
+    def _preparar(self):
+        # Copia columnar: cantidades (int64), precios (float64), offsets y nombres en minúsculas separados por \n
+        inventario = self._inventario
+        with inventario._lock:
+            productos = inventario._productos
+            fila = productos.fila if isinstance(productos, _AlmacenPorPosiciones) else None
+            ids, cantidades, precios, offsets, texto = [], array('q'), array('d'), array('Q', [0]), bytearray()
+            for id_p in inventario._ids_ordenados:
+                if fila is not None:
+                    nombre, cantidad, precio, _ = fila(id_p)  # sin materializar los productos aún no accedidos
+                else:
+                    producto = productos[id_p]
+                    nombre, cantidad, precio = producto.nombre, producto.cantidad, producto.precio
+                ids.append(id_p)
+                cantidades.append(cantidad)
+                precios.append(precio)
+                texto += nombre.lower().replace('\n', ' ').encode('utf-8') + b'\n'
+                offsets.append(len(texto))
+            generacion = inventario._generacion
+        segmentos = []
+        for datos in (cantidades, precios, offsets, texto):
+            contenido = datos.tobytes() if isinstance(datos, array) else bytes(datos)
+            segmento = shared_memory.SharedMemory(create=True, size=max(1, len(contenido)))
+            segmento.buf[:len(contenido)] = contenido
+            segmentos.append(segmento)
+        with self._lock_copia:
+            self._liberar_segmentos()
+            self._segmentos, self._ids, self._generacion = segmentos, ids, generacion
+
+    def _reconstruir(self):
+        try:
+            self._preparar()
+        except Exception as e:
+            print(f"Error al preparar la copia para consultas en paralelo: {e}")
+
+    def _en_paralelo(self, funcion: Callable, criterios: Dict) -> Optional[tuple]:
+        # (IDs de la copia, resultado de cada bloque), o None si la copia no refleja el inventario: entonces
+        # se lanza su reconstrucción en segundo plano y quien llama responde en serie
+        with self._lock_copia:
+            if self._generacion != self._inventario._generacion:
+                if self._hilo_copia is None or not self._hilo_copia.is_alive():
+                    self._hilo_copia = threading.Thread(target=self._reconstruir, daemon=True)
+                    self._hilo_copia.start()
+                return None
+            ids, total = self._ids, len(self._ids)
+            if not total:
+                return ids, []
+            nombres = tuple(segmento.name for segmento in self._segmentos)
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self._procesos)
+            tamano = -(-total // min(total, self._procesos * self._bloques_por_proceso))
+            futuros = [self._pool.submit(funcion, nombres, inicio, min(total, inicio + tamano), criterios)
+                       for inicio in range(0, total, tamano)]
+            return ids, [futuro.result() for futuro in futuros]
+
+    @staticmethod
+    def _criterios(nombre: Optional[str], cantidad_min: Optional[int], cantidad_max: Optional[int],
+                   precio_min: Optional[float], precio_max: Optional[float]) -> Dict:
+        return {'nombre': nombre.lower() if nombre else None, 'cantidad_min': cantidad_min,
+                'cantidad_max': cantidad_max, 'precio_min': precio_min, 'precio_max': precio_max}
+
+    @staticmethod
+    def _cumple(fila: tuple, criterios: Dict) -> bool:
+        # fila: (id, nombre, cantidad, precio, ...)
+        return ((criterios['nombre'] is None or criterios['nombre'] in fila[1].lower())
+                and (criterios['cantidad_min'] is None or fila[2] >= criterios['cantidad_min'])
+                and (criterios['cantidad_max'] is None or fila[2] <= criterios['cantidad_max'])
+                and (criterios['precio_min'] is None or fila[3] >= criterios['precio_min'])
+                and (criterios['precio_max'] is None or fila[3] <= criterios['precio_max']))
+
+    def _en_serie(self, criterios: Dict) -> List[Producto]:
+        # Recorrido en este proceso sobre las filas crudas del almacén: solo se crean los Producto que cumplen
+        inventario = self._inventario
+        with inventario._lock:
+            if not isinstance(inventario._productos, _AlmacenPorPosiciones):
+                return [p for p in inventario.listar_todos()
+                        if self._cumple((p.id_producto, p.nombre, p.cantidad, p.precio), criterios)]
+            ids = sorted(fila[0] for fila in inventario._productos.filas() if self._cumple(fila, criterios))
+            return [inventario._productos[id_p] for id_p in ids]
+
+    def filtrar(self, nombre: Optional[str] = None, cantidad_min: Optional[int] = None,
+                cantidad_max: Optional[int] = None, precio_min: Optional[float] = None,
+                precio_max: Optional[float] = None) -> List[Producto]:
+        # Productos que cumplen todos los criterios (nombre por subcadena, sin distinguir mayúsculas), por ID
+        criterios = self._criterios(nombre, cantidad_min, cantidad_max, precio_min, precio_max)
+        resultado = None
+        if not self._serial():
+            if criterios['nombre'] is not None and '\n' in criterios['nombre']:
+                return []
+            resultado = self._en_paralelo(_filtrar_bloque, criterios)
+        if resultado is None:
+            return self._en_serie(criterios)
+        ids, bloques = resultado
+        # Un producto borrado después de comprobar la copia simplemente no aparece
+        productos = self._inventario._productos
+        encontrados = (productos.get(ids[i]) for bloque in bloques for i in bloque)
+        return [producto for producto in encontrados if producto is not None]
+
+    def buscar_por_nombre(self, nombre: str) -> List[Producto]:
+        # El índice de n-gramas gana a cualquier recorrido; en paralelo solo las consultas más cortas que n_gram
+        if self._serial() or len(nombre) >= self._inventario._n_gram:
+            return self._inventario.buscar_por_nombre(nombre)
+        return self.filtrar(nombre=nombre)
+
+    def sin_stock(self) -> List[Producto]:
+        return self._inventario.sin_stock()  # ya es un índice: O(k) sin recorrer el inventario
+
+    def estadisticas(self, nombre: Optional[str] = None, cantidad_min: Optional[int] = None,
+                     cantidad_max: Optional[int] = None, precio_min: Optional[float] = None,
+                     precio_max: Optional[float] = None) -> Dict:
+        # Sin criterios devuelve los agregados que el Inventario mantiene; con criterios agrega el subconjunto
+        criterios = self._criterios(nombre, cantidad_min, cantidad_max, precio_min, precio_max)
+        if not any(valor is not None for valor in criterios.values()):
+            return self._inventario.estadisticas()
+        resultado = None if self._serial() else self._en_paralelo(_agregar_bloque, criterios)
+        if resultado is None:
+            productos = self._en_serie(criterios)
+            parciales = [(len(productos), sum(p.cantidad for p in productos), sum(p.valor_total() for p in productos),
+                          sum(1 for p in productos if p.cantidad == 0), sum(p.precio for p in productos))]
+        else:
+            parciales = resultado[1]
+        total, items, valor, sin_stock, suma_precios = (sum(columna) for columna in zip(*parciales or [(0,) * 5]))
+        if not total:
+            return {'total_productos': 0, 'valor_total': 0.0, 'sin_stock': 0}
+        return {'total_productos': total, 'total_items': items, 'valor_total': valor, 'sin_stock': sin_stock,
+                'precio_promedio': suma_precios / total}
+
+    def _liberar_segmentos(self):
+        for segmento in self._segmentos:
+            segmento.close()
+            segmento.unlink()
+        self._segmentos = []
+        self._generacion = None
+
+    def cerrar(self):
+        if self._hilo_copia is not None:
+            self._hilo_copia.join()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        with self._lock_copia:
+            self._liberar_segmentos()
+
+
+# El menú guarda con el escritor en segundo plano: las opciones no esperan a reescribir el archivo
+INTERVALO_GUARDADO_MENU = 0.5
 
 
 class Menu:
-    def __init__(self):
-        self.inventario = Inventario()
+    def __init__(self, instrumentar: bool = False, intervalo_guardado: Optional[float] = INTERVALO_GUARDADO_MENU):
+        self.inventario = Inventario(intervalo_guardado=intervalo_guardado, instrumentar=instrumentar)
+        self.inventario.al_cruzar_reorden(self._avisar_reorden)
+
+    @staticmethod
+    def _avisar_reorden(producto: Producto, bajo: bool):
+        if bajo:
+            print(f"🔔 {producto.id_producto} ({producto.nombre}) bajó de su punto de reorden: "
+                  f"{producto.cantidad} < {producto.punto_reorden}")
+        else:
+            print(f"✅ {producto.id_producto} ({producto.nombre}) volvió a superar su punto de reorden")
 
     def mostrar_menu(self):
         print("\n" + "=" * 50)
@@ -131,40 +2581,61 @@ class Menu:
         print("6. 📋 Mostrar todos")
         print("7. 📈 Estadísticas")
         print("8. ⚠️  Sin stock")
+        print("9. 📥 Importar CSV/JSONL")
+        print("10. 📤 Exportar CSV/JSONL")
+        print("11. ⏱️  Métricas de rendimiento")
+        print("12. 🧮 Consulta avanzada")
+        print("13. 🔔 Puntos de reorden")
         print("0. 🚪 Salir")
         print("=" * 50)
 
     def ejecutar(self):
-        while True:
-            try:
-                self.mostrar_menu()
-                opcion = input("Opción: ").strip()
-
-                if opcion == "0":
-                    print("¡Hasta luego!")
-                    break
-                elif opcion == "1":
-                    self._agregar_producto()
-                elif opcion == "2":
-                    self._eliminar_producto()
-                elif opcion == "3":
-                    self._actualizar_cantidad()
-                elif opcion == "4":
-                    self._actualizar_precio()
-                elif opcion == "5":
-                    self._buscar_productos()
-                elif opcion == "6":
-                    self._mostrar_todos()
-                elif opcion == "7":
-                    self._mostrar_estadisticas()
-                elif opcion == "8":
-                    self._mostrar_sin_stock()
-                else:
-                    print("❌ Opción inválida")
+        # cerrar() escribe lo que el escritor en segundo plano tenga pendiente, también si se sale con Ctrl+C
+        try:
+            while True:
+                try:
+                    self.mostrar_menu()
+                    opcion = input("Opción: ").strip()
+                    if self.inventario.recargar_si_cambio():
+                        print("🔄 Inventario actualizado por otro proceso")
 
-                input("\nPresione Enter para continuar...")
-            except Exception as e:
-                print(f"❌ Error: {e}")
+                    if opcion == "0":
+                        print("¡Hasta luego!")
+                        break
+                    elif opcion == "1":
+                        self._agregar_producto()
+                    elif opcion == "2":
+                        self._eliminar_producto()
+                    elif opcion == "3":
+                        self._actualizar_cantidad()
+                    elif opcion == "4":
+                        self._actualizar_precio()
+                    elif opcion == "5":
+                        self._buscar_productos()
+                    elif opcion == "6":
+                        self._mostrar_todos()
+                    elif opcion == "7":
+                        self._mostrar_estadisticas()
+                    elif opcion == "8":
+                        self._mostrar_sin_stock()
+                    elif opcion == "9":
+                        self._importar()
+                    elif opcion == "10":
+                        self._exportar()
+                    elif opcion == "11":
+                        self._metricas_rendimiento()
+                    elif opcion == "12":
+                        self._consulta_avanzada()
+                    elif opcion == "13":
+                        self._puntos_reorden()
+                    else:
+                        print("❌ Opción inválida")
+
+                    input("\nPresione Enter para continuar...")
+                except Exception as e:
+                    print(f"❌ Error: {e}")
+        finally:
+            self.inventario.cerrar()
 
     def _agregar_producto(self):
         print("\n➕ AGREGAR PRODUCTO")
@@ -177,8 +2648,9 @@ class Menu:
             nombre = input("Nombre: ").strip()
             cantidad = int(input("Cantidad: "))
             precio = float(input("Precio: $"))
+            punto_reorden = int(input("Punto de reorden (Enter = ninguno): ") or 0)
 
-            if self.inventario.agregar(id_prod, nombre, cantidad, precio):
+            if self.inventario.agregar(id_prod, nombre, cantidad, precio, punto_reorden):
                 print("✅ Producto agregado")
             else:
                 print("❌ ID ya existe")
@@ -285,15 +2757,297 @@ class Menu:
         else:
             print("✅ Todos tienen stock")
 
+    def _puntos_reorden(self):
+        print("\n🔔 PUNTOS DE REORDEN")
+        productos = self.inventario.bajo_reorden()
+        if productos:
+            print(f"{len(productos)} producto(s) bajo su punto de reorden (más urgentes primero):")
+            for i, p in enumerate(productos, 1):
+                print(f"{i}. {p} | Reorden: {p.punto_reorden} (faltan {p.punto_reorden - p.cantidad})")
+        else:
+            print("✅ Ningún producto bajo su punto de reorden")
+
+        id_prod = input("\nID para cambiar su punto de reorden (Enter para volver): ").strip()
+        if not id_prod:
+            return
+        try:
+            punto_reorden = int(input("Nuevo punto de reorden (0 = ninguno): "))
+            if self.inventario.actualizar_punto_reorden(id_prod, punto_reorden):
+                print("✅ Actualizado")
+            else:
+                print("❌ No encontrado")
+        except ValueError:
+            print("❌ Número inválido")
+
+    def _consulta_avanzada(self):
+        print("\n🧮 CONSULTA AVANZADA")
+        print("Condiciones separadas por coma, ej.: cantidad__lt=5, nombre__contiene=usb, id__en=P1|P2")
+        consulta = self.inventario.consulta()
+        for condicion in filter(None, (c.strip() for c in input("Condiciones: ").split(","))):
+            clave, _, valor = condicion.partition("=")
+            clave, valor = clave.strip(), valor.strip()
+            consulta = consulta.donde(**{clave: valor.split("|") if clave.endswith("__en") else valor})
+        orden = input("Ordenar por (id/nombre/cantidad/precio, '-' delante = descendente, Enter = ID): ").strip()
+        if orden:
+            consulta = consulta.ordenar(orden.lstrip("-"), descendente=orden.startswith("-"))
+        limite = input("Límite (Enter = sin límite): ").strip()
+        if limite:
+            consulta = consulta.limite(int(limite))
+
+        print(f"Plan: {consulta.explicar()}")
+        productos = consulta.lista()
+        if productos:
+            print(f"\n✅ {len(productos)} encontrado(s):")
+            for i, p in enumerate(productos, 1):
+                print(f"{i}. {p}")
+        else:
+            print("❌ No encontrado")
+
+    def _importar(self):
+        print("\n📥 IMPORTAR PRODUCTOS")
+        ruta = input("Archivo (.csv o .jsonl): ").strip()
+        inicio = time.perf_counter()
+        resultado = self.inventario.importar(ruta)
+        print(f"✅ {resultado['importados']} importados | ❌ {resultado['rechazados']} rechazados "
+              f"({time.perf_counter() - inicio:.2f} s)")
+        for numero, motivo in resultado['errores']:
+            print(f"   Línea {numero}: {motivo}")
+
+    def _exportar(self):
+        print("\n📤 EXPORTAR PRODUCTOS")
+        ruta = input("Archivo destino (.csv o .jsonl): ").strip()
+        print(f"✅ {self.inventario.exportar(ruta)} productos exportados a {ruta}")
+
+    def _metricas_rendimiento(self):
+        print("\n⏱️ MÉTRICAS DE RENDIMIENTO")
+        instrumentacion = self.inventario._instrumentacion
+        if instrumentacion is None:
+            if input("La instrumentación está desactivada. ¿Activarla? (s/N): ").lower() == 's':
+                perfilar = input("¿Perfilar también con cProfile? (s/N): ").lower() == 's'
+                self.inventario.activar_instrumentacion(perfilar)
+                print("✅ Instrumentación activada")
+            return
+
+        metricas = instrumentacion.resumen()
+        if not metricas:
+            print("❌ Aún no hay operaciones medidas")
+        for operacion, datos in metricas.items():
+            print(f"{operacion:>22} | {datos['llamadas']:>6} llamadas | prom {datos['promedio_ms']:>9.3f} ms "
+                  f"| máx {datos['max_ms']:>9.3f} ms")
+            print(f"{'':>22} | " + "  ".join(f"{cubeta}: {n}" for cubeta, n in datos['histograma'].items() if n))
+        ruta = input("Guardar en JSON (ruta, Enter para omitir): ").strip()
+        if ruta:
+            instrumentacion.volcar_json(ruta)
+            print(f"✅ Métricas guardadas en {ruta}")
+        ruta = input("Guardar perfil pstats (ruta, Enter para omitir): ").strip()
+        if ruta:
+            if instrumentacion.guardar_perfil(ruta):
+                print(f"✅ Perfil guardado en {ruta} (python -m pstats {ruta})")
+            else:
+                print("❌ El perfilado no está activo")
+
+
+# Benchmark: python "11.1 Tarea semana 11.py" --benchmark
+def _inventario_sintetico(cantidad: int, **opciones) -> Inventario:
+    # Inventario en memoria (archivo temporal inexistente) poblado sin pasar por la persistencia
+    directorio = tempfile.mkdtemp()
+    inventario = Inventario(os.path.join(directorio, "benchmark.json"), **opciones)
+    palabras = ["Mouse", "Teclado", "Monitor", "Cable", "Usb", "Laptop", "Disco", "Memoria", "Camara", "Audifono"]
+    for i in range(cantidad):
+        nombre = f"{palabras[i % 10]} {palabras[(i * 7) % 10]} Modelo {i}"
+        inventario._poner(Producto(f"P{i:07d}", nombre, i % 50, 1.0 + (i % 1000) / 10))
+    return inventario
+
+
+def benchmark_memoria(tamano: int = 1_000_000):
+    # Memoria del Inventario completo (almacén + índices, con el índice de n-gramas construido) por almacén
+    import tracemalloc
+    print(f"{'almacén':>10} | {'MB':>8} | {'bytes/producto':>14}")
+    for almacen in ("dict", "columnar"):
+        tracemalloc.start()
+        inventario = _inventario_sintetico(tamano, almacen=almacen)
+        inventario._indice()
+        memoria = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{almacen:>10} | {memoria / 2 ** 20:>8.1f} | {memoria / tamano:>14.1f}")
+        del inventario
+
+
+def benchmark_carga(tamano: int = 1_000_000):
+    # Tiempo de arranque y pico de memoria: json.load + un Producto por registro (la carga de la semana 10)
+    # frente a Inventario(ruta), que carga en streaming y construye los índices al final
+    import tracemalloc
+    inventario = _inventario_sintetico(tamano)
+    inventario._guardar()
+    ruta = inventario._archivo
+    del inventario
+    print(f"Archivo de {tamano} productos: {os.path.getsize(ruta) / 2 ** 20:.1f} MB")
+
+    def json_load_producto():
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return {id_p: Producto.from_dict(datos) for id_p, datos in json.load(f).items()}
+
+    print(f"{'carga':>22} | {'s':>6} | {'pico MB':>8}")
+    for nombre, cargar in (("json.load + Producto", json_load_producto), ("Inventario(ruta)", lambda: Inventario(ruta))):
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        resultado = cargar()
+        duracion = time.perf_counter() - inicio
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del resultado
+        # El tiempo se mide aparte: tracemalloc lo infla
+        inicio = time.perf_counter()
+        resultado = cargar()
+        duracion = time.perf_counter() - inicio
+        del resultado
+        print(f"{nombre:>22} | {duracion:>6.2f} | {pico / 2 ** 20:>8.1f}")
+
+
+def benchmark_formatos(tamano: int = 1_000_000):
+    inventario = _inventario_sintetico(tamano)
+    datos = inventario._datos_snapshot()
+    directorio = os.path.dirname(inventario._archivo)
+    print(f"{'formato':>8} | {'guardar (s)':>11} | {'cargar (s)':>10} | {'MB':>7}")
+    for formato, iterar in (("json", _iterar_snapshot), ("binario", _iterar_snapshot_binario)):
+        inventario._formato = formato
+        inventario._archivo = os.path.join(directorio, f"benchmark.{formato}")
+        inicio = time.perf_counter()
+        inventario._escribir_snapshot(datos)
+        guardar = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        for _ in iterar(inventario._archivo):
+            pass
+        cargar = time.perf_counter() - inicio
+        print(f"{formato:>8} | {guardar:>11.2f} | {cargar:>10.2f} | {os.path.getsize(inventario._archivo) / 2 ** 20:>7.1f}")
+
+
+def benchmark_busqueda(tamanos=(10_000, 100_000, 1_000_000), repeticiones: int = 20):
+    consultas = ["usb", "modelo 12", "teclado mon", "xyz"]
+    print(f"{'productos':>10} | {'secuencial (ms)':>16} | {'índice (ms)':>12} | {'construir índice (s)':>20}")
+    for tamano in tamanos:
+        inventario = _inventario_sintetico(tamano)
+        inicio = time.perf_counter()
+        inventario._indice()  # la primera búsqueda lo construye; se mide aparte
+        construccion = time.perf_counter() - inicio
+        tiempos = []
+        for funcion in (lambda c: inventario._buscar_secuencial(c), inventario.buscar_por_nombre):
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                for consulta in consultas:
+                    funcion(consulta)
+            tiempos.append((time.perf_counter() - inicio) * 1000 / (repeticiones * len(consultas)))
+        print(f"{tamano:>10} | {tiempos[0]:>16.3f} | {tiempos[1]:>12.3f} | {construccion:>20.2f}")
+
+
+# Prueba de estrés: python "11.1 Tarea semana 11.py" --estres
+def _escritor_concurrente(archivo: str, modo: str, numero: int, operaciones: int):
+    inventario = Inventario(archivo, modo=modo, limite_journal=20_000)
+    for i in range(operaciones):
+        id_prod = f"W{numero:02d}-{i:04d}"
+        inventario.agregar(id_prod, f"Producto {numero} {i}", 1, 1.0 + i)
+        if i % 3 == 0:
+            inventario.actualizar_cantidad(id_prod, 99)
+    inventario.cerrar()
+
+
+def prueba_estres_concurrente(procesos: int = 8, operaciones: int = 100) -> bool:
+    # Varios procesos escriben a la vez sobre el mismo archivo; al final no debe faltar ningún cambio
+    import multiprocessing
+    correcto = True
+    print(f"{'modo':>8} | {'segundos':>8} | {'productos':>9} | {'perdidos':>8} | {'cantidades mal':>14}")
+    for modo in ("json", "journal"):
+        archivo = os.path.join(tempfile.mkdtemp(), "compartido.json")
+        hijos = [multiprocessing.Process(target=_escritor_concurrente, args=(archivo, modo, n, operaciones))
+                 for n in range(procesos)]
+        inicio = time.perf_counter()
+        for hijo in hijos:
+            hijo.start()
+        for hijo in hijos:
+            hijo.join()
+        duracion = time.perf_counter() - inicio
+
+        final = Inventario(archivo, modo=modo)
+        perdidos = cantidades_mal = 0
+        for n in range(procesos):
+            for i in range(operaciones):
+                producto = final.obtener(f"W{n:02d}-{i:04d}")
+                if producto is None:
+                    perdidos += 1
+                elif producto.cantidad != (99 if i % 3 == 0 else 1):
+                    cantidades_mal += 1
+        total = len(final.listar_todos())
+        print(f"{modo:>8} | {duracion:>8.2f} | {total:>9} | {perdidos:>8} | {cantidades_mal:>14}")
+        correcto = correcto and perdidos == 0 and cantidades_mal == 0 and total == procesos * operaciones
+        correcto = correcto and all(hijo.exitcode == 0 for hijo in hijos)
+    return correcto
+
+
+# Importación/exportación sin menú: python "11.1 Tarea semana 11.py" --importar productos.csv --exportar copia.jsonl
+# Conversión de un snapshot JSON al formato binario: --convertir inventario.json inventario.bin
+def importar_exportar(argumentos: List[str]) -> bool:
+    if "--convertir" in argumentos:
+        posicion = argumentos.index("--convertir") + 1
+        if posicion + 1 >= len(argumentos):
+            print("❌ Uso: --convertir <origen.json> <destino>")
+            return False
+        inicio = time.perf_counter()
+        try:
+            total = convertir_json_a_binario(argumentos[posicion], argumentos[posicion + 1])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Error al convertir: {e}")
+            return False
+        print(f"✅ {total} productos convertidos a '{argumentos[posicion + 1]}'")
+        print(f"   ({time.perf_counter() - inicio:.2f} s)")
+        if "--importar" not in argumentos and "--exportar" not in argumentos:
+            return True
+
+    inventario = Inventario()
+    try:
+        for opcion in ("--importar", "--exportar"):
+            if opcion not in argumentos:
+                continue
+            posicion = argumentos.index(opcion) + 1
+            if posicion >= len(argumentos):
+                print(f"❌ Falta el archivo de {opcion}")
+                return False
+            inicio = time.perf_counter()
+            if opcion == "--importar":
+                resultado = inventario.importar(argumentos[posicion])
+                for numero, motivo in resultado['errores']:
+                    print(f"   Línea {numero}: {motivo}")
+                print(f"✅ {resultado['importados']} importados | ❌ {resultado['rechazados']} rechazados")
+            else:
+                print(f"✅ {inventario.exportar(argumentos[posicion])} productos exportados")
+            print(f"   ({time.perf_counter() - inicio:.2f} s)")
+    except (OSError, csv.Error, ValueError) as e:
+        print(f"❌ Error: {e}")
+        return False
+    finally:
+        inventario.cerrar()
+    return True
+
 
 # Función principal
 def main():
     try:
-        menu = Menu()
+        menu = Menu(instrumentar="--instrumentar" in sys.argv)
         menu.ejecutar()
+    except KeyboardInterrupt:
+        print("\n¡Hasta luego!")
     except Exception as e:
         print(f"❌ Error crítico: {e}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if "--benchmark" in sys.argv:
+        benchmark_busqueda()
+        benchmark_memoria()
+        benchmark_carga()
+        benchmark_formatos()
+    elif "--estres" in sys.argv:
+        sys.exit(0 if prueba_estres_concurrente() else 1)
+    elif "--importar" in sys.argv or "--exportar" in sys.argv or "--convertir" in sys.argv:
+        sys.exit(0 if importar_exportar(sys.argv) else 1)
+    else:
+        main()
\ No newline at end of file